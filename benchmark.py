@@ -0,0 +1,716 @@
+#!/usr/bin/env python3
+"""
+DeckWizard Benchmarks
+Reproducible timings for the storage, analysis and web paths, written to JSON
+so results can be compared between commits
+"""
+
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from deckwizard import CardDatabase, DeckManager, GameTracker, Card, VersionConflict
+from datagen import CatalogProfile, SyntheticDataGenerator
+
+CARD_TYPES = list(CatalogProfile().type_weights)
+RARITIES = list(CatalogProfile().rarity_weights)
+RESULTS = ['win', 'loss', 'draw']
+
+# Regressions smaller than this are treated as noise by compare_results()
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+
+# Field size for the tournament pairing benchmarks
+SWISS_PLAYERS = 10000
+ROUND_ROBIN_PLAYERS = 1000
+SIMULATION_PLAYERS = 64
+SIMULATION_RUNS = 100000
+
+# Connected spectators in the event stream benchmark
+EVENT_SUBSCRIBERS = 300
+
+# Threads editing one deck at once in the concurrency stress test
+CONCURRENT_EDITORS = 8
+
+# Length of the revision log built for the deck history benchmark
+DECK_REVISIONS = 1000
+
+# Games per matchup in the game simulator benchmark
+SIMULATED_GAMES = 5000
+
+# Decks edited and games recorded between incremental meta-game refreshes
+META_CHANGED_DECKS = 5
+META_NEW_GAMES = 100
+
+# Workspace databases behind the tenant router benchmark, and its pool size
+TENANT_WORKSPACES = 40
+TENANT_POOL_SIZE = 8
+
+# Rows per transaction in the migration backfill benchmark; small, so it
+# measures the per-chunk overhead a large production table would pay
+MIGRATION_BACKFILL_CHUNK = 100
+
+# Wall-clock budget for one `deckwizard.py card search` process, interpreter included
+CLI_STARTUP_BUDGET_MS = 150
+
+
+def time_operation(fn: Callable[[int], object], iterations: int) -> Dict:
+    """Run ``fn(i)`` for each iteration and summarize the wall-clock timings"""
+    durations = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        durations.append(time.perf_counter() - start)
+    return summarize_durations(durations)
+
+
+def summarize_durations(durations: List[float]) -> Dict:
+    """Timing summary of individual operation durations (in seconds)"""
+    durations = sorted(durations)
+    iterations = len(durations)
+    total = sum(durations)
+    return {
+        'iterations': iterations,
+        'total_s': round(total, 6),
+        'mean_ms': round(total / iterations * 1000, 4),
+        'median_ms': round(statistics.median(durations) * 1000, 4),
+        'p95_ms': round(durations[min(len(durations) - 1, int(len(durations) * 0.95))] * 1000, 4),
+        'min_ms': round(durations[0] * 1000, 4),
+        'ops_per_sec': round(iterations / total, 2) if total else None
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class BenchmarkSuite:
+    """Builds a synthetic database and times the main DeckWizard operations.
+
+    Every ``bench_*`` method is one benchmark; its name without the prefix is
+    the key in the results file and what ``only`` selects on.
+    """
+
+    def __init__(self, cards: int = 10000, decks: int = 200, games: int = 20000,
+                 seed: int = 42, iterations: Optional[int] = None,
+                 workdir: Optional[str] = None):
+        self.num_cards = cards
+        self.num_decks = decks
+        self.num_games = games
+        self.seed = seed
+        self.iterations = iterations
+        self.workdir = workdir
+
+    def available(self) -> List[str]:
+        return sorted(name[len('bench_'):] for name in dir(self) if name.startswith('bench_'))
+
+    def _iterations(self, default: int) -> int:
+        return self.iterations or default
+
+    def setup(self, directory: str):
+        """Create and populate the benchmark database in ``directory``"""
+        self.db_path = os.path.join(directory, 'bench.db')
+        self.card_db = CardDatabase(self.db_path)
+        self.deck_manager = DeckManager(self.db_path, card_db=self.card_db)
+        self.game_tracker = GameTracker(self.db_path)
+
+        generator = SyntheticDataGenerator(self.db_path, seed=self.seed)
+        start = time.perf_counter()
+        generator.generate(self.num_cards, self.num_decks, self.num_games)
+        self.setup_seconds = time.perf_counter() - start
+        self.card_ids = [card[0] for card in generator.cards]
+        self.deck_ids = [deck[0] for deck in generator.decks]
+
+        conn = sqlite3.connect(self.db_path)
+        self.sample_names = [row[0].split()[0] for row in conn.execute('SELECT name FROM cards LIMIT 50')]
+        conn.close()
+
+    def run(self, only: Optional[List[str]] = None) -> Dict:
+        """Run the selected benchmarks and return the results document"""
+        names = self.available()
+        if only:
+            unknown = sorted(set(only) - set(names))
+            if unknown:
+                raise ValueError(f"Unknown benchmarks: {', '.join(unknown)}")
+            names = [name for name in names if name in only]
+
+        results = {}
+        with tempfile.TemporaryDirectory(dir=self.workdir) as directory:
+            self.setup(directory)
+            for name in names:
+                outcome = getattr(self, f'bench_{name}')()
+                if outcome is None:
+                    continue
+                if 'iterations' in outcome:
+                    results[name] = outcome
+                else:
+                    results.update({f"{name}.{key}": value for key, value in outcome.items()})
+
+        return {
+            'meta': {
+                'timestamp': datetime.now().isoformat(),
+                'commit': _git_commit(),
+                'python': platform.python_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'platform': platform.platform(),
+                'cards': self.num_cards,
+                'decks': self.num_decks,
+                'games': self.num_games,
+                'seed': self.seed,
+                'setup_s': round(self.setup_seconds, 3)
+            },
+            'results': results
+        }
+
+    def bench_add_card(self) -> Dict:
+        def op(i):
+            self.card_db.add_card(Card(f"bench_add_{i}", f"Bench Card {i}", i % 10, 'Spell',
+                                       'Common', 'Bench Set', 'Added by benchmark'))
+        return time_operation(op, self._iterations(500))
+
+    def bench_search_cards(self) -> Dict:
+        rng = random.Random(self.seed)
+        filters = {
+            'name': lambda i: {'name': self.sample_names[i % len(self.sample_names)]},
+            'card_type': lambda i: {'card_type': CARD_TYPES[i % len(CARD_TYPES)]},
+            'rarity': lambda i: {'rarity': RARITIES[i % len(RARITIES)]},
+            'cost': lambda i: {'cost': rng.randint(0, 10)}
+        }
+        return {
+            key: time_operation(lambda i, make=make: self.card_db.search_cards(**make(i)),
+                                self._iterations(20))
+            for key, make in filters.items()
+        }
+
+    def bench_load_deck(self) -> Dict:
+        return time_operation(lambda i: self.deck_manager.load_deck(self.deck_ids[i % len(self.deck_ids)]),
+                              self._iterations(500))
+
+    def bench_save_deck(self) -> Dict:
+        decks = [self.deck_manager.load_deck(deck_id) for deck_id in self.deck_ids[:50]]
+        return time_operation(lambda i: self.deck_manager.save_deck(decks[i % len(decks)]),
+                              self._iterations(500))
+
+    def bench_analyze_deck(self) -> Dict:
+        decks = [self.deck_manager.load_deck(deck_id) for deck_id in self.deck_ids[:50]]
+        return time_operation(lambda i: self.deck_manager.analyze_deck(decks[i % len(decks)]),
+                              self._iterations(100))
+
+    def bench_record_game(self) -> Dict:
+        def op(i):
+            self.game_tracker.record_game(self.deck_ids[i % len(self.deck_ids)], 'Bench Opponent',
+                                          RESULTS[i % 3], 10, '')
+        return time_operation(op, self._iterations(500))
+
+    def bench_get_deck_statistics(self) -> Dict:
+        return time_operation(
+            lambda i: self.game_tracker.get_deck_statistics(self.deck_ids[i % len(self.deck_ids)]),
+            self._iterations(200))
+
+    def bench_swiss_pairing(self) -> Dict:
+        """Pair consecutive Swiss rounds of a large field with simulated results"""
+        from tournament import swiss_pairings
+
+        rng = random.Random(self.seed)
+        players = [f"player_{i}" for i in range(SWISS_PLAYERS)]
+        points = dict.fromkeys(players, 0)
+        opponents = {p: set() for p in players}
+        had_bye = set()
+
+        def op(i):
+            pairs, bye = swiss_pairings(players, points, opponents, had_bye)
+            for a, b in pairs:
+                opponents[a].add(b)
+                opponents[b].add(a)
+                points[a if rng.random() < 0.5 else b] += 3
+            if bye is not None:
+                had_bye.add(bye)
+                points[bye] += 3
+        return time_operation(op, self._iterations(8))
+
+    def bench_round_robin_round(self) -> Dict:
+        from tournament import round_robin_round
+
+        players = [f"player_{i}" for i in range(ROUND_ROBIN_PLAYERS)]
+        return time_operation(lambda i: round_robin_round(players, i % (ROUND_ROBIN_PLAYERS - 1) + 1),
+                              self._iterations(200))
+
+    def bench_tournament_simulation(self) -> Optional[Dict]:
+        """Monte Carlo runs of a double elimination bracket of stored decks, one process"""
+        from tournament_sim import TournamentSimulator, np
+        if np is None:
+            print("⚠️  Skipping tournament simulation benchmark: numpy is not installed", file=sys.stderr)
+            return None
+
+        simulator = TournamentSimulator(self.db_path)
+        participants = self.deck_ids[:SIMULATION_PLAYERS]
+        return time_operation(
+            lambda i: simulator.simulate('double_elimination', participants, runs=SIMULATION_RUNS,
+                                         tolerance=0, workers=1, seed=i),
+            self._iterations(3))
+
+    def bench_bulk_export(self) -> Dict:
+        """Stream every deck through the zip and NDJSON exporters"""
+        from deck_io import DeckExporter
+
+        exporter = DeckExporter(self.db_path)
+        return {
+            archive: time_operation(lambda i, archive=archive: sum(
+                len(chunk) for chunk in exporter.stream(archive, 'mtg')), self._iterations(5))
+            for archive in ('zip', 'ndjson')
+        }
+
+    def bench_deck_import(self) -> Dict:
+        """Parse and resolve exported MTG lists, some with typos, into new decks"""
+        from deck_io import DeckExporter, DeckImporter
+
+        exporter = DeckExporter(self.db_path)
+        cards = exporter.card_map()
+        lists = []
+        for number, deck in enumerate(exporter.iter_decks()):
+            lines = exporter.render(deck, 'mtg', cards)['mainboard']
+            if number % 4 == 0 and lines:
+                lines[0] = lines[0][:-2] + lines[0][-1]  # drop a character to force a fuzzy lookup
+            lists.append({'list': '\n'.join(lines), 'name': f"Imported {deck.name}"})
+
+        importer = DeckImporter(self.db_path)
+        importer.index  # built once, outside the timed section
+        result = time_operation(lambda i: importer.import_lists(lists), self._iterations(3))
+        result['lists_per_sec'] = round(len(lists) * result['ops_per_sec'], 1)
+        return result
+
+    def bench_columnar(self) -> Dict:
+        """Load the columnar tables and run their filters and aggregations"""
+        from columnar import CardTable, GameTable
+
+        cards = CardTable.from_db(self.db_path)
+        games = GameTable.from_db(self.db_path)
+        return {
+            'load_cards': time_operation(lambda i: CardTable.from_db(self.db_path), self._iterations(3)),
+            'load_games': time_operation(lambda i: GameTable.from_db(self.db_path), self._iterations(3)),
+            'select_cards': time_operation(
+                lambda i: cards.select(card_type=CARD_TYPES[i % len(CARD_TYPES)], max_cost=3),
+                self._iterations(50)),
+            'deck_records': time_operation(lambda i: games.deck_records(), self._iterations(20)),
+            'matchups': time_operation(lambda i: games.matchups(self.deck_ids[i % len(self.deck_ids)]),
+                                       self._iterations(50))
+        }
+
+    def bench_snapshot(self) -> Dict:
+        """Write a columnar snapshot and query its memory-mapped columns"""
+        from snapshot import Snapshot, SnapshotWriter
+
+        path = os.path.join(os.path.dirname(self.db_path), 'snapshot')
+        writer = SnapshotWriter(self.db_path)
+        writer.create(path)
+        return {
+            'create': time_operation(lambda i: writer.create(path), self._iterations(3)),
+            'append_no_new_games': time_operation(lambda i: writer.append(path), self._iterations(3)),
+            'deck_records': time_operation(lambda i: Snapshot(path).deck_records(), self._iterations(20)),
+            'matchups': time_operation(
+                lambda i: Snapshot(path).matchups(self.deck_ids[i % len(self.deck_ids)]), self._iterations(50))
+        }
+
+    def bench_event_fanout(self) -> Dict:
+        """Publish game events to many subscribed event-stream clients"""
+        from events import EventBroker
+
+        broker = EventBroker()
+        subscriptions = [broker.subscribe() for _ in range(EVENT_SUBSCRIBERS)]
+        watchers = [broker.subscribe({f"deck:{deck_id}"}) for deck_id in self.deck_ids[:EVENT_SUBSCRIBERS]]
+
+        def publish(i):
+            deck_id = self.deck_ids[i % len(self.deck_ids)]
+            broker.publish('game', {'deck_id': deck_id, 'result': RESULTS[i % 3], 'game_length': 10},
+                           [f"deck:{deck_id}"])
+
+        result = {
+            'publish': time_operation(publish, self._iterations(1000)),
+            'drain': time_operation(lambda i: subscriptions[i % len(subscriptions)].next_batch(0),
+                                    self._iterations(EVENT_SUBSCRIBERS))
+        }
+        for subscription in subscriptions + watchers:
+            broker.unsubscribe(subscription)
+        return result
+
+    def bench_concurrent_deck_edits(self) -> Dict:
+        """Editors in parallel threads on one deck; every change must survive.
+
+        ``batched`` sends two-card deltas through update_deck_cards();
+        ``optimistic`` loads, edits and saves, reloading on version
+        conflicts. ``lost_updates`` compares the final card count with the
+        number of cards added and must be 0.
+        """
+        import threading
+
+        per_editor = self._iterations(50)
+        card_ids = self.card_ids[:CONCURRENT_EDITORS * 2]
+        results = {}
+
+        def run_editors(name: str, edit: Callable[[DeckManager, str, int, int], int], cards_per_edit: int):
+            deck = self.deck_manager.create_deck(f"Contended {name}", 'Standard')
+            durations, retries = [], []
+            lock = threading.Lock()
+
+            def editor(number: int):
+                manager = DeckManager(self.db_path, card_db=self.card_db)
+                mine, retried = [], 0
+                for i in range(per_editor):
+                    start = time.perf_counter()
+                    retried += edit(manager, deck.id, number, i)
+                    mine.append(time.perf_counter() - start)
+                with lock:
+                    durations.extend(mine)
+                    retries.append(retried)
+
+            threads = [threading.Thread(target=editor, args=(n,)) for n in range(CONCURRENT_EDITORS)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            stored = self.deck_manager.load_deck(deck.id)
+            expected = CONCURRENT_EDITORS * per_editor * cards_per_edit
+            result = summarize_durations(durations)
+            result.update({'editors': CONCURRENT_EDITORS, 'version': stored.version,
+                           'conflict_retries': sum(retries),
+                           'lost_updates': expected - stored.get_total_cards()})
+            results[name] = result
+
+        def batched(manager: DeckManager, deck_id: str, number: int, i: int) -> int:
+            manager.update_deck_cards(deck_id, [(card_ids[number], 1), (card_ids[(number + i) % len(card_ids)], 1)])
+            return 0
+
+        def optimistic(manager: DeckManager, deck_id: str, number: int, i: int) -> int:
+            retried = 0
+            while not manager.add_card_to_deck(manager.load_deck(deck_id), card_ids[number], 1):
+                retried += 1
+            return retried
+
+        run_editors('batched', batched, 2)
+        run_editors('optimistic', optimistic, 1)
+
+        # A stale expected version is refused rather than applied
+        deck = self.deck_manager.create_deck('Stale Editor', 'Standard')
+        self.deck_manager.update_deck_cards(deck.id, [(card_ids[0], 1)])
+        try:
+            self.deck_manager.update_deck_cards(deck.id, [(card_ids[1], 1)], expected_version=deck.version)
+            results['batched']['stale_version_rejected'] = False
+        except VersionConflict:
+            results['batched']['stale_version_rejected'] = True
+        return results
+
+    def bench_deck_revisions(self) -> Dict:
+        """Rebuild, diff and score revisions of a deck with a long revision log"""
+        rng = random.Random(self.seed)
+        deck_id = self.deck_ids[0]
+        for i in range(DECK_REVISIONS):
+            self.deck_manager.update_deck_cards(deck_id, [(rng.choice(self.card_ids), rng.choice((1, 1, -1)))])
+            if i % 10 == 0:
+                self.game_tracker.record_game(deck_id, 'Bench Opponent', RESULTS[i % 3], 10)
+        latest = self.deck_manager.load_deck(deck_id).version
+
+        return {
+            'log_revision': time_operation(
+                lambda i: self.deck_manager.update_deck_cards(deck_id, [(self.card_ids[i], 1)]),
+                self._iterations(200)),
+            'cards_at': time_operation(lambda i: self.deck_manager.cards_at(deck_id, rng.randint(1, latest)),
+                                       self._iterations(200)),
+            'diff': time_operation(
+                lambda i: self.deck_manager.diff_decks(f"{deck_id}@{rng.randint(1, latest)}", deck_id),
+                self._iterations(100)),
+            'revision_history': time_operation(lambda i: self.deck_manager.revision_history(deck_id),
+                                               self._iterations(20))
+        }
+
+    def bench_game_simulator(self) -> Dict:
+        """Single games, an in-process matchup and recording simulated games"""
+        import random as random_module
+        from game_sim import GameSimulator, play_game
+
+        simulator = GameSimulator(self.db_path, deck_manager=self.deck_manager, game_tracker=self.game_tracker)
+        deck, opponent = (simulator.compile_deck(self.deck_manager.load_deck(deck_id))
+                          for deck_id in self.deck_ids[:2])
+        rng = random_module.Random(self.seed)
+
+        matchup = time_operation(
+            lambda i: simulator.simulate_matchup(self.deck_ids[0], self.deck_ids[1], SIMULATED_GAMES,
+                                                 workers=1, seed=i, record=False),
+            self._iterations(3))
+        matchup['games_per_minute'] = round(SIMULATED_GAMES / matchup['median_ms'] * 60000)
+        return {
+            'play_game': time_operation(lambda i: play_game(deck, opponent, rng), self._iterations(2000)),
+            'matchup': matchup,
+            'record': time_operation(
+                lambda i: simulator.simulate_matchup(self.deck_ids[0], self.deck_ids[1], 1000,
+                                                     workers=1, seed=i),
+                self._iterations(5))
+        }
+
+    def bench_format_rules(self) -> Dict:
+        """Deck legality: one deck, every stored deck and the decks hit by a ban"""
+        registry = self.deck_manager.format_registry
+        deck = self.deck_manager.load_deck(self.deck_ids[0])
+        registry.validate(deck)
+        # Ban one card of a stored deck, then lift the ban again
+        card_id = next(iter(deck.cards))
+        return {
+            'validate': time_operation(lambda i: registry.validate(deck), self._iterations(2000)),
+            'revalidate_all': time_operation(lambda i: registry.revalidate(), self._iterations(5)),
+            'ban_change': time_operation(
+                lambda i: registry.set_card_status(deck.format, [card_id], 'banned' if i % 2 == 0 else None),
+                self._iterations(20))
+        }
+
+    def bench_metagame(self) -> Dict:
+        """Meta-game rollups: clustering every format, incremental refreshes and cached reports.
+
+        Each ``incremental`` iteration first edits META_CHANGED_DECKS decks
+        and records META_NEW_GAMES games, outside the timed refresh.
+        """
+        from metagame import MetaRollup
+
+        rollup = MetaRollup(self.db_path, card_db=self.card_db)
+        rollup.refresh(full=True)
+        deck_format = rollup.formats()[0]['format']
+        full = time_operation(lambda i: rollup.refresh(full=True), self._iterations(3))
+
+        durations = []
+        for i in range(self._iterations(10)):
+            for n in range(META_CHANGED_DECKS):
+                deck_id = self.deck_ids[(i * META_CHANGED_DECKS + n) % len(self.deck_ids)]
+                self.deck_manager.update_deck_cards(deck_id, [(self.card_ids[i % len(self.card_ids)], 1)])
+            for n in range(META_NEW_GAMES):
+                self.game_tracker.record_game(self.deck_ids[n % len(self.deck_ids)], 'Bench Opponent',
+                                              RESULTS[n % 3], 10)
+            start = time.perf_counter()
+            rollup.refresh()
+            durations.append(time.perf_counter() - start)
+
+        rollup.format_report(deck_format)
+        return {
+            'full': full,
+            'incremental': summarize_durations(durations),
+            'report_cached': time_operation(lambda i: rollup.format_report(deck_format), self._iterations(200))
+        }
+
+    def bench_tenant_router(self) -> Dict:
+        """Workspace checkouts, parallel writers and a cross-workspace fan-out.
+
+        ``parallel_writes`` records games from CONCURRENT_EDITORS threads,
+        each in its own workspace; ``shared_writes`` does the same against
+        the one shared database for comparison.
+        """
+        import threading
+        from tenancy import TenantRouter
+
+        router = TenantRouter(os.path.join(os.path.dirname(self.db_path), 'workspaces'), self.db_path,
+                              max_open=TENANT_POOL_SIZE)
+        names = [f"team{n:03d}" for n in range(TENANT_WORKSPACES)]
+        deck_ids = {}
+        for name in names:
+            router.create(name)
+            with router.workspace(name) as workspace:
+                deck = workspace.deck_manager.create_deck(f"{name} deck", 'Standard')
+                workspace.deck_manager.update_deck_cards(deck.id, [(card_id, 2) for card_id in self.card_ids[:15]])
+                deck_ids[name] = deck.id
+
+        def record(name: str):
+            with router.workspace(name) as workspace:
+                workspace.game_tracker.record_game(deck_ids[name], 'Bench Opponent', 'win', 10)
+
+        def run_writers(write: Callable[[int], None]) -> Dict:
+            per_writer = self._iterations(50)
+            durations = []
+            lock = threading.Lock()
+
+            def writer(number: int):
+                mine = []
+                for _ in range(per_writer):
+                    start = time.perf_counter()
+                    write(number)
+                    mine.append(time.perf_counter() - start)
+                with lock:
+                    durations.extend(mine)
+
+            threads = [threading.Thread(target=writer, args=(n,)) for n in range(CONCURRENT_EDITORS)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            result = summarize_durations(durations)
+            result.update({'writers': CONCURRENT_EDITORS,
+                           'games_per_s': round(len(durations) / (time.perf_counter() - start), 1)})
+            return result
+
+        shared = GameTracker(self.db_path)
+        results = {
+            'checkout_hot': time_operation(lambda i: record(names[0]), self._iterations(200)),
+            # Cycling through more workspaces than the pool holds opens one every time
+            'checkout_evicting': time_operation(lambda i: record(names[i % TENANT_WORKSPACES]),
+                                                self._iterations(200)),
+            'parallel_writes': run_writers(lambda n: record(names[n])),
+            'shared_writes': run_writers(
+                lambda n: shared.record_game(self.deck_ids[n], 'Bench Opponent', 'win', 10)),
+        }
+        fan_out = time_operation(lambda i: router.fan_out(lambda workspace: workspace.summary()),
+                                 self._iterations(20))
+        fan_out.update({'workspaces': TENANT_WORKSPACES, 'pool_size': TENANT_POOL_SIZE,
+                        'max_open_seen': router.open_count})
+        results['fan_out'] = fan_out
+        router.close()
+        return results
+
+    def bench_migrations(self) -> Dict:
+        """Schema setup of a new file and a chunked backfill over every stored deck.
+
+        Each ``backfill`` iteration first clears ``decks.wins`` and rewinds
+        the backfill's saved position, outside the timed run.
+        """
+        import migrations
+
+        directory = os.path.dirname(self.db_path)
+        new_database = time_operation(
+            lambda i: migrations.require_current(os.path.join(directory, f'migrate{i}.db')), self._iterations(20))
+
+        version = migrations.SCHEMA_VERSION
+        durations = []
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            for i in range(self._iterations(3)):
+                conn.execute('UPDATE decks SET wins = NULL')
+                conn.execute('UPDATE schema_backfills SET last_rowid = 0, rows_updated = 0, finished = NULL '
+                             'WHERE version = ?', (version,))
+                start = time.perf_counter()
+                migrations.run_backfill(conn, version, chunk_rows=MIGRATION_BACKFILL_CHUNK, pause=0)
+                durations.append(time.perf_counter() - start)
+        finally:
+            conn.close()
+        return {'new_database': new_database, 'backfill': summarize_durations(durations)}
+
+    def bench_cli_startup(self) -> Dict:
+        """Time complete `deckwizard.py card search` processes against the budget"""
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'deckwizard.py')
+        command = [sys.executable, script, '--db', self.db_path, '--log-file', '',
+                   'card', 'search', '--name', 'no such card']
+        result = time_operation(lambda i: subprocess.run(command, stdout=subprocess.DEVNULL, check=True),
+                                self._iterations(10))
+        result['budget_ms'] = CLI_STARTUP_BUDGET_MS
+        result['within_budget'] = result['median_ms'] <= CLI_STARTUP_BUDGET_MS
+        return result
+
+    def bench_web(self) -> Optional[Dict]:
+        """Time the main Flask endpoints through the test client"""
+        os.environ['DECKWIZARD_DB'] = self.db_path
+        try:
+            import web_interface
+        except ImportError as e:
+            print(f"⚠️  Skipping web benchmarks: {e}", file=sys.stderr)
+            return None
+
+        web_interface.card_db = self.card_db
+        web_interface.deck_manager = self.deck_manager
+        web_interface.game_tracker = self.game_tracker
+        client = web_interface.app.test_client()
+        deck_id = lambda i: self.deck_ids[i % len(self.deck_ids)]
+        etags = {card_type: client.get(f"/api/cards?type={card_type}&rarity=Legendary").headers['ETag']
+                 for card_type in CARD_TYPES}
+
+        endpoints = {
+            'get_cards': lambda i: client.get(f"/api/cards?type={CARD_TYPES[i % len(CARD_TYPES)]}"
+                                              f"&rarity=Legendary"),
+            'get_cards_not_modified': lambda i: client.get(
+                f"/api/cards?type={CARD_TYPES[i % len(CARD_TYPES)]}&rarity=Legendary",
+                headers={'If-None-Match': etags[CARD_TYPES[i % len(CARD_TYPES)]]}),
+            'analyze_deck': lambda i: client.get(f"/api/decks/{deck_id(i)}/analyze"),
+            'deck_stats': lambda i: client.get(f"/api/decks/{deck_id(i)}/stats"),
+            'export_deck': lambda i: client.get(f"/api/export/deck/{deck_id(i)}?format=mtg"),
+            'record_game': lambda i: client.post('/api/games', json={
+                'deck_id': deck_id(i), 'opponent_deck': 'Bench Opponent',
+                'result': RESULTS[i % 3], 'game_length': 10
+            })
+        }
+        return {key: time_operation(fn, self._iterations(50)) for key, fn in endpoints.items()}
+
+
+def compare_results(baseline: Dict, current: Dict,
+                    threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> List[Dict]:
+    """Compare median timings of two results documents"""
+    rows = []
+    for name, result in sorted(current['results'].items()):
+        before = baseline.get('results', {}).get(name)
+        if not before or not before.get('median_ms'):
+            continue
+        ratio = result['median_ms'] / before['median_ms']
+        rows.append({
+            'benchmark': name,
+            'baseline_ms': before['median_ms'],
+            'current_ms': result['median_ms'],
+            'ratio': round(ratio, 3),
+            'status': 'regression' if ratio > 1 + threshold
+                      else 'improvement' if ratio < 1 - threshold else 'unchanged'
+        })
+    return rows
+
+
+def print_results(document: Dict, comparison: Optional[List[Dict]] = None):
+    """Print a results document as a table"""
+    meta = document['meta']
+    print(f"\n⏱️  DeckWizard benchmarks ({meta['cards']} cards, {meta['decks']} decks, "
+          f"{meta['games']} games, setup {meta['setup_s']}s)")
+    for name, result in sorted(document['results'].items()):
+        budget = ''
+        if 'budget_ms' in result:
+            budget = f"   {'✅' if result['within_budget'] else '❌'} budget {result['budget_ms']} ms"
+        elif 'lost_updates' in result:
+            budget = (f"   {'✅' if result['lost_updates'] == 0 else '❌'} {result['lost_updates']} lost updates, "
+                      f"{result['conflict_retries']} conflict retries")
+        print(f"  {name:<32} median {result['median_ms']:>10.3f} ms   "
+              f"p95 {result['p95_ms']:>10.3f} ms   {result['ops_per_sec'] or 0:>10.1f} ops/s{budget}")
+
+    if comparison:
+        print("\n📊 Compared with baseline:")
+        icons = {'regression': '❌', 'improvement': '✅', 'unchanged': '  '}
+        for row in comparison:
+            print(f"  {icons[row['status']]} {row['benchmark']:<32} {row['baseline_ms']:>10.3f} ms -> "
+                  f"{row['current_ms']:>10.3f} ms  (x{row['ratio']})")
+
+
+def run_benchmarks(cards: int = 10000, decks: int = 200, games: int = 20000, seed: int = 42,
+                   iterations: Optional[int] = None, only: Optional[List[str]] = None,
+                   output: Optional[str] = None, compare: Optional[str] = None,
+                   threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> Dict:
+    """Run the suite, print a summary and optionally save/compare JSON results"""
+    suite = BenchmarkSuite(cards=cards, decks=decks, games=games, seed=seed, iterations=iterations)
+    document = suite.run(only=only)
+
+    comparison = None
+    if compare:
+        with open(compare) as f:
+            comparison = compare_results(json.load(f), document, threshold)
+        document['comparison'] = comparison
+
+    print_results(document, comparison)
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump(document, f, indent=2)
+        print(f"\n💾 Results written to {output}")
+
+    return document
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+DeckWizard Columnar Tables
+Compact column-oriented views of the card catalog and game history for
+analytics, backed by array.array and exposed as NumPy arrays when available
+"""
+
+import sqlite3
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+from deckwizard import Card, logger
+
+try:
+    import numpy as np
+except ImportError:  # columns stay array.array and aggregations fall back to loops
+    np = None
+
+# Stored in integer columns in place of NULL
+MISSING = -1
+
+# Result codes of GameTable.result
+RESULT_CODES = {'loss': 0, 'win': 1, 'draw': 2}
+RESULT_NAMES = ('loss', 'win', 'draw')
+
+# Rows fetched per cursor batch while loading
+LOAD_FETCH_SIZE = 10000
+
+
+class DictionaryColumn:
+    """Dictionary-encoded string column: int32 codes into a list of distinct values"""
+
+    __slots__ = ('values', 'codes', '_lookup')
+
+    def __init__(self, values: Optional[List[str]] = None, codes: Optional[array] = None):
+        self.values: List[str] = list(values or [])
+        self.codes = codes if codes is not None else array('i')
+        self._lookup = {value: code for code, value in enumerate(self.values)}
+
+    def encode(self, value: str) -> int:
+        """Code for ``value``, adding it to the dictionary if needed"""
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def append(self, value: str):
+        self.codes.append(self.encode(value))
+
+    def code(self, value: str) -> Optional[int]:
+        """Code for ``value``, or None when it never occurs"""
+        return self._lookup.get(value)
+
+    def __getitem__(self, index: int) -> str:
+        return self.values[self.codes[index]]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+
+def as_numpy(column):
+    """Zero-copy NumPy view of an array.array (or codes of a DictionaryColumn)"""
+    if isinstance(column, DictionaryColumn):
+        column = column.codes
+    if np is None or not isinstance(column, array):
+        return column
+    return np.frombuffer(column, dtype=column.typecode) if len(column) else np.array([], dtype=column.typecode)
+
+
+def bincount(codes, minlength: int, weights=None) -> List[float]:
+    """Count (or sum ``weights``) per code, vectorized when NumPy is available"""
+    if np is not None:
+        counts = np.bincount(as_numpy(codes), weights=None if weights is None else as_numpy(weights),
+                             minlength=minlength)
+        return counts.tolist()
+    totals = [0] * minlength
+    if weights is None:
+        for code in codes:
+            totals[code] += 1
+    else:
+        for code, weight in zip(codes, weights):
+            totals[code] += weight
+    return totals
+
+
+class CardTable:
+    """The card catalog as parallel columns.
+
+    ``cost``, ``attack`` and ``health`` are int16 columns (MISSING for
+    NULL); ``card_type``, ``rarity`` and ``set_name`` are dictionary
+    encoded. Descriptions and abilities are not loaded; use to_card() or
+    CardDatabase.get_card() for the full record.
+    """
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        self.cost = array('h')
+        self.attack = array('h')
+        self.health = array('h')
+        self.card_type = DictionaryColumn()
+        self.rarity = DictionaryColumn()
+        self.set_name = DictionaryColumn()
+        self._positions: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def append(self, card_id: str, name: str, cost: int, card_type: str, rarity: str,
+               set_name: str, attack: Optional[int] = None, health: Optional[int] = None):
+        self.ids.append(card_id)
+        self.names.append(name)
+        self.cost.append(cost)
+        self.attack.append(MISSING if attack is None else attack)
+        self.health.append(MISSING if health is None else health)
+        self.card_type.append(card_type)
+        self.rarity.append(rarity)
+        self.set_name.append(set_name)
+        self._positions = None
+
+    @classmethod
+    def from_cards(cls, cards: Iterable[Card]) -> 'CardTable':
+        table = cls()
+        for card in cards:
+            table.append(card.id, card.name, card.cost, card.card_type, card.rarity,
+                         card.set_name, card.attack, card.health)
+        return table
+
+    @classmethod
+    def from_db(cls, db_path: str) -> 'CardTable':
+        """Load the catalog straight from SQLite without building Card objects"""
+        table = cls()
+        conn = sqlite3.connect(db_path)
+        try:
+            cursor = conn.execute('''
+                SELECT id, name, cost, card_type, rarity, set_name, attack, health FROM cards
+            ''')
+            while True:
+                rows = cursor.fetchmany(LOAD_FETCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    table.append(*row)
+        finally:
+            conn.close()
+        logger.info("Loaded %d cards into a columnar table", len(table))
+        return table
+
+    def position(self, card_id: str) -> Optional[int]:
+        if self._positions is None:
+            self._positions = {card_id: i for i, card_id in enumerate(self.ids)}
+        return self._positions.get(card_id)
+
+    def to_card(self, index: int) -> Card:
+        """Materialize one row (without description or abilities)"""
+        attack, health = int(self.attack[index]), int(self.health[index])
+        return Card(
+            id=self.ids[index], name=self.names[index], cost=int(self.cost[index]),
+            card_type=self.card_type[index], rarity=self.rarity[index],
+            set_name=self.set_name[index], description='',
+            attack=None if attack == MISSING else attack,
+            health=None if health == MISSING else health
+        )
+
+    def select(self, card_type: Optional[str] = None, rarity: Optional[str] = None,
+               set_name: Optional[str] = None, min_cost: Optional[int] = None,
+               max_cost: Optional[int] = None) -> List[int]:
+        """Row indices matching every given filter"""
+        conditions = []
+        for column, value in ((self.card_type, card_type), (self.rarity, rarity), (self.set_name, set_name)):
+            if value is not None:
+                code = column.code(value)
+                if code is None:
+                    return []
+                conditions.append((column.codes, '==', code))
+        if min_cost is not None:
+            conditions.append((self.cost, '>=', min_cost))
+        if max_cost is not None:
+            conditions.append((self.cost, '<=', max_cost))
+
+        if np is not None:
+            mask = np.ones(len(self), dtype=bool)
+            for column, op, value in conditions:
+                values = as_numpy(column)
+                mask &= (values == value) if op == '==' else (values >= value) if op == '>=' else (values <= value)
+            return np.flatnonzero(mask).tolist()
+
+        rows = range(len(self))
+        for column, op, value in conditions:
+            if op == '==':
+                rows = [i for i in rows if column[i] == value]
+            elif op == '>=':
+                rows = [i for i in rows if column[i] >= value]
+            else:
+                rows = [i for i in rows if column[i] <= value]
+        return list(rows)
+
+    def count_by(self, column: str) -> Dict[str, int]:
+        """Number of cards per card_type, rarity or set_name"""
+        encoded: DictionaryColumn = getattr(self, column)
+        counts = bincount(encoded.codes, len(encoded.values))
+        return {value: int(count) for value, count in zip(encoded.values, counts)}
+
+    def mean_cost_by(self, column: str) -> Dict[str, float]:
+        """Average cost per card_type, rarity or set_name"""
+        encoded: DictionaryColumn = getattr(self, column)
+        counts = bincount(encoded.codes, len(encoded.values))
+        totals = bincount(encoded.codes, len(encoded.values), weights=self.cost)
+        return {value: total / count for value, count, total in zip(encoded.values, counts, totals) if count}
+
+
+class GameTable:
+    """Game history as parallel columns.
+
+    ``deck`` and ``opponent`` are dictionary encoded (opponent holds deck
+    ids or free-form names, as recorded), ``result`` is an int8 code from
+    RESULT_CODES, ``game_length`` is int32 and ``day`` is the dictionary
+    encoded date (YYYY-MM-DD). Game ids, notes and simulated games are
+    not loaded.
+    ``last_rowid`` is the highest game_results rowid loaded, so
+    append_from_db() only reads newer games.
+    """
+
+    def __init__(self):
+        self.deck = DictionaryColumn()
+        self.opponent = DictionaryColumn()
+        self.result = array('b')
+        self.game_length = array('i')
+        self.day = DictionaryColumn()
+        self.last_rowid = 0
+
+    def __len__(self) -> int:
+        return len(self.result)
+
+    def append(self, deck_id: str, opponent: str, result: str, game_length: int, date_played: str):
+        self.deck.append(deck_id)
+        self.opponent.append(opponent or '')
+        self.result.append(RESULT_CODES.get(result, RESULT_CODES['draw']))
+        self.game_length.append(game_length or 0)
+        self.day.append((date_played or '')[:10])
+
+    @classmethod
+    def from_db(cls, db_path: str) -> 'GameTable':
+        table = cls()
+        table.append_from_db(db_path)
+        return table
+
+    def append_from_db(self, db_path: str) -> int:
+        """Load games recorded since the last load; returns how many were added"""
+        # The hot loop works on bound methods and the dictionaries directly;
+        # result codes and days are computed by SQLite
+        columns = {}
+        for name in ('deck', 'opponent', 'day'):
+            column = getattr(self, name)
+            columns[name] = (column._lookup, column.values, column.codes.append)
+        append_result = self.result.append
+        append_length = self.game_length.append
+
+        conn = sqlite3.connect(db_path)
+        added = 0
+        try:
+            cursor = conn.execute('''
+                SELECT rowid, deck_id, COALESCE(opponent_deck, ''),
+                       CASE result WHEN 'loss' THEN 0 WHEN 'win' THEN 1 ELSE 2 END,
+                       COALESCE(game_length, 0), COALESCE(substr(date_played, 1, 10), '')
+                FROM game_results WHERE rowid > ? AND simulated = 0 ORDER BY rowid
+            ''', (self.last_rowid,))
+            while True:
+                rows = cursor.fetchmany(LOAD_FETCH_SIZE)
+                if not rows:
+                    break
+                for column_index, name in ((1, 'deck'), (2, 'opponent'), (5, 'day')):
+                    lookup, values, append = columns[name]
+                    for row in rows:
+                        value = row[column_index]
+                        code = lookup.get(value)
+                        if code is None:
+                            code = lookup[value] = len(values)
+                            values.append(value)
+                        append(code)
+                for row in rows:
+                    append_result(row[3])
+                    append_length(row[4])
+                self.last_rowid = rows[-1][0]
+                added += len(rows)
+        finally:
+            conn.close()
+        logger.info("Loaded %d games into a columnar table", added)
+        return added
+
+    def deck_records(self) -> Dict[str, Dict]:
+        """Wins, losses, draws, games, win rate and average length per deck"""
+        size = len(self.deck.values)
+        codes = as_numpy(self.deck.codes)
+        if np is not None:
+            results = as_numpy(self.result)
+            per_result = [np.bincount(codes[results == code], minlength=size).tolist()
+                          for code in range(len(RESULT_NAMES))]
+        else:
+            per_result = [[0] * size for _ in RESULT_NAMES]
+            for code, result in zip(self.deck.codes, self.result):
+                per_result[result][code] += 1
+        lengths = bincount(self.deck.codes, size, weights=self.game_length)
+
+        records = {}
+        for code, deck_id in enumerate(self.deck.values):
+            losses, wins, draws = per_result[0][code], per_result[1][code], per_result[2][code]
+            games = wins + losses + draws
+            if not games:
+                continue
+            records[deck_id] = {
+                'games': games, 'wins': wins, 'losses': losses, 'draws': draws,
+                'win_rate': wins / games,
+                'average_game_length': lengths[code] / games
+            }
+        return records
+
+    def matchups(self, deck_id: str) -> Dict[str, Dict]:
+        """Record of one deck against each opponent it has played"""
+        code = self.deck.code(deck_id)
+        if code is None:
+            return {}
+        size = len(self.opponent.values)
+        if np is not None:
+            rows = as_numpy(self.deck.codes) == code
+            opponents = as_numpy(self.opponent.codes)[rows]
+            results = as_numpy(self.result)[rows]
+            per_result = [np.bincount(opponents[results == r], minlength=size).tolist()
+                          for r in range(len(RESULT_NAMES))]
+        else:
+            per_result = [[0] * size for _ in RESULT_NAMES]
+            for deck, opponent, result in zip(self.deck.codes, self.opponent.codes, self.result):
+                if deck == code:
+                    per_result[result][opponent] += 1
+
+        matchups = {}
+        for opponent_code, opponent in enumerate(self.opponent.values):
+            losses, wins, draws = (per_result[r][opponent_code] for r in range(3))
+            games = wins + losses + draws
+            if games:
+                matchups[opponent] = {'games': games, 'wins': wins, 'losses': losses,
+                                      'draws': draws, 'win_rate': wins / games}
+        return matchups
@@ -0,0 +1,606 @@
+#!/usr/bin/env python3
+"""
+DeckWizard Deck Import/Export
+Bulk deck export as streamed zip or NDJSON archives, and deck list import
+with fuzzy card-name resolution
+"""
+
+import difflib
+import io
+import json
+import os
+import re
+import unicodedata
+import zipfile
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from deckwizard import Deck, SQLiteStore, logger, new_record_id
+
+EXPORT_FORMATS = ('mtg', 'arena', 'json')
+ARCHIVE_TYPES = ('zip', 'ndjson')
+
+# Rows pulled from the decks cursor at a time while streaming
+EXPORT_FETCH_SIZE = 500
+
+ARCHIVE_MIMETYPES = {'zip': 'application/zip', 'ndjson': 'application/x-ndjson'}
+_ENTRY_EXTENSIONS = {'mtg': 'txt', 'arena': 'txt', 'json': 'json'}
+
+
+class _ChunkSink:
+    """Write-only, unseekable file object that collects what zipfile writes.
+
+    zipfile falls back to data descriptors for unseekable outputs, so each
+    entry can be handed to the caller as soon as it is written.
+    """
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+class DeckExporter(SQLiteStore):
+    """Renders stored decks in MTG, Arena or JSON form and streams archives.
+
+    Card names are resolved through one id -> (name, set_name) map loaded
+    up front instead of a lookup per deck entry, and decks are read from a
+    cursor in EXPORT_FETCH_SIZE batches, so memory stays flat no matter how
+    many decks are exported.
+    """
+
+    def __init__(self, db_path: str = "deckwizard.db"):
+        self.db_path = db_path
+
+    def card_map(self, card_ids=None) -> Dict[str, Tuple[str, str]]:
+        """id -> (name, set_name) for ``card_ids``, or for the whole catalog"""
+        if card_ids is None:
+            with self._connection() as conn:
+                return {row[0]: (row[1], row[2])
+                        for row in conn.execute('SELECT id, name, set_name FROM cards')}
+
+        card_ids = list(card_ids)
+        if not card_ids:
+            return {}
+        with self._connection() as conn:
+            return {row[0]: (row[1], row[2]) for row in conn.execute(
+                f"SELECT id, name, set_name FROM cards WHERE id IN ({','.join('?' * len(card_ids))})",
+                card_ids)}
+
+    def iter_decks(self, deck_ids: Optional[List[str]] = None,
+                   deck_format: Optional[str] = None) -> Iterator[Deck]:
+        """Yield stored decks lazily, optionally filtered by id and game format"""
+        query = '''SELECT id, name, format, cards, created_date, last_modified, win_rate, games_played
+                   FROM decks WHERE 1=1'''
+        params: list = []
+        if deck_ids:
+            query += f" AND id IN ({','.join('?' * len(deck_ids))})"
+            params.extend(deck_ids)
+        if deck_format:
+            query += ' AND format = ?'
+            params.append(deck_format)
+        query += ' ORDER BY id'
+
+        with self._connection() as conn:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    yield Deck(
+                        id=row[0], name=row[1], format=row[2],
+                        cards=json.loads(row[3]) if row[3] else {},
+                        created_date=row[4], last_modified=row[5],
+                        win_rate=row[6], games_played=row[7]
+                    )
+
+    @staticmethod
+    def render(deck: Deck, export_format: str, cards: Dict[str, Tuple[str, str]]) -> Dict:
+        """One deck in the shape returned by /api/export/deck/<id>"""
+        if export_format == 'mtg':
+            return {
+                'name': deck.name,
+                'format': deck.format,
+                'mainboard': [f"{quantity} {cards[card_id][0]}"
+                              for card_id, quantity in deck.cards.items() if card_id in cards],
+                'sideboard': []
+            }
+        if export_format == 'arena':
+            return {
+                'deck': '\n'.join(f"{quantity} {cards[card_id][0]} ({cards[card_id][1]}) {card_id}"
+                                  for card_id, quantity in deck.cards.items() if card_id in cards)
+            }
+        return {
+            'name': deck.name,
+            'format': deck.format,
+            'cards': deck.cards,
+            'created_date': deck.created_date,
+            'last_modified': deck.last_modified
+        }
+
+    @classmethod
+    def render_text(cls, deck: Deck, export_format: str, cards: Dict[str, Tuple[str, str]]) -> str:
+        """One deck as the contents of an archive entry"""
+        rendered = cls.render(deck, export_format, cards)
+        if export_format == 'mtg':
+            return '\n'.join(rendered['mainboard']) + '\n'
+        if export_format == 'arena':
+            return 'Deck\n' + rendered['deck'] + '\n'
+        return json.dumps(rendered, indent=2)
+
+    def _validate(self, archive: str, export_format: str):
+        if archive not in ARCHIVE_TYPES:
+            raise ValueError(f"Unknown archive type: {archive} (expected {', '.join(ARCHIVE_TYPES)})")
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {export_format} (expected {', '.join(EXPORT_FORMATS)})")
+
+    def stream(self, archive: str = 'zip', export_format: str = 'json',
+               deck_ids: Optional[List[str]] = None, deck_format: Optional[str] = None) -> Iterator[bytes]:
+        """Yield the archive as byte chunks, one deck at a time.
+
+        Arguments are validated before the first chunk is produced, so a bad
+        request fails when this is called rather than mid-stream.
+        """
+        self._validate(archive, export_format)
+        decks = self.iter_decks(deck_ids, deck_format)
+        if archive == 'ndjson':
+            return self._stream_ndjson(decks, export_format)
+        return self._stream_zip(decks, export_format)
+
+    def _stream_ndjson(self, decks: Iterator[Deck], export_format: str) -> Iterator[bytes]:
+        cards = self.card_map()
+        count = 0
+        for deck in decks:
+            line = {'id': deck.id, **self.render(deck, export_format, cards)}
+            yield (json.dumps(line) + '\n').encode('utf-8')
+            count += 1
+        logger.info("Exported %d decks as ndjson", count, extra={'event': 'decks_exported'})
+
+    def _stream_zip(self, decks: Iterator[Deck], export_format: str) -> Iterator[bytes]:
+        cards = self.card_map()
+        extension = _ENTRY_EXTENSIONS[export_format]
+        sink = _ChunkSink()
+        count = 0
+        with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for deck in decks:
+                slug = re.sub(r'[^A-Za-z0-9_-]+', '_', deck.name).strip('_') or 'deck'
+                archive.writestr(f"{slug}_{deck.id}.{extension}",
+                                 self.render_text(deck, export_format, cards))
+                count += 1
+                yield sink.drain()
+        # Closing the archive wrote the central directory
+        yield sink.drain()
+        logger.info("Exported %d decks as zip", count, extra={'event': 'decks_exported'})
+
+    def export(self, output, archive: str = 'zip', export_format: str = 'json',
+               deck_ids: Optional[List[str]] = None, deck_format: Optional[str] = None) -> int:
+        """Write an archive to a binary file object; returns the bytes written"""
+        written = 0
+        for chunk in self.stream(archive, export_format, deck_ids, deck_format):
+            output.write(chunk)
+            written += len(chunk)
+        return written
+
+
+def archive_filename(archive: str) -> str:
+    """Default download name for a bulk export"""
+    return f"decks_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{archive}"
+
+
+# ---------------------------------------------------------------------------
+# Deck list import
+# ---------------------------------------------------------------------------
+
+# "4 Fire Bolt", "4x Fire Bolt", "4 Fire Bolt (M21) 137", "SB: 2 Fire Bolt"
+_COUNTED_LINE = re.compile(r'^(?:(SB):\s*)?(\d+)\s*[xX]?\s+(.+?)(?:\s+\(([^()]+)\)(?:\s+(\S+))?)?$')
+# "Fire Bolt x4" (plain text lists)
+_TRAILING_COUNT_LINE = re.compile(r'^(.+?)\s+[xX]\s*(\d+)$')
+_SECTION_HEADERS = {'deck': 'mainboard', 'main': 'mainboard', 'mainboard': 'mainboard',
+                    'commander': 'mainboard', 'companion': 'sideboard',
+                    'sideboard': 'sideboard', 'side': 'sideboard', 'maybeboard': None}
+_METADATA_LINE = re.compile(r'^(?://\s*)?(name|format)\s*:\s*(.+)$', re.IGNORECASE)
+
+# Fuzzy matches below this similarity are reported as unresolved
+FUZZY_CUTOFF = 0.8
+# Candidates (by shared trigrams) compared with difflib for each fuzzy lookup
+FUZZY_CANDIDATES = 10
+# Decks inserted per executemany() call during bulk import
+IMPORT_CHUNK_SIZE = 1000
+
+
+def normalize_name(name: str) -> str:
+    """Case-, accent- and punctuation-insensitive form of a card name"""
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(ch for ch in name if not unicodedata.combining(ch)).lower()
+    name = re.sub(r"['\u2019]", '', name)
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', name).split())
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass
+class DeckListEntry:
+    """One resolved-or-not line of a deck list"""
+    quantity: int
+    name: str
+    set_name: Optional[str] = None
+    card_id: Optional[str] = None
+
+
+@dataclass
+class ParsedDeckList:
+    """A deck list split into mainboard and sideboard entries"""
+    name: Optional[str] = None
+    format: Optional[str] = None
+    mainboard: List[DeckListEntry] = field(default_factory=list)
+    sideboard: List[DeckListEntry] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+
+def parse_deck_list(text: str) -> ParsedDeckList:
+    """Parse an MTG (MTGO), Arena or plain-text deck list.
+
+    Understands ``4 Name``/``4x Name`` lines, Arena's ``(SET) number``
+    suffix (or the card id DeckWizard's Arena export puts there), ``SB:``
+    prefixes, ``Deck``/``Sideboard``/``Commander`` section headers, the
+    MTGO convention of a blank line before the sideboard, ``Name:`` and
+    ``Format:`` metadata lines, ``Name x4`` and bare names (one copy).
+    ``#`` and ``//`` lines are comments.
+    """
+    parsed = ParsedDeckList()
+    section = 'mainboard'
+    seen_cards = False
+    headers_used = False
+    blank_after_cards = False
+
+    for line_number, raw in enumerate(text.splitlines(), 1):
+        line = raw.strip()
+        if not line:
+            if seen_cards:
+                blank_after_cards = True
+            continue
+
+        metadata = _METADATA_LINE.match(line)
+        if metadata:
+            setattr(parsed, metadata.group(1).lower(), metadata.group(2).strip())
+            continue
+        if line.startswith(('#', '//')):
+            continue
+
+        header = line.rstrip(':').lower()
+        if header in _SECTION_HEADERS:
+            section = _SECTION_HEADERS[header]
+            headers_used = True
+            continue
+
+        match = _COUNTED_LINE.match(line)
+        if match:
+            sideboard_prefix, quantity, name, set_name, collector = match.groups()
+            quantity = int(quantity)
+        else:
+            sideboard_prefix = set_name = collector = None
+            trailing = _TRAILING_COUNT_LINE.match(line)
+            name, quantity = (trailing.group(1), int(trailing.group(2))) if trailing else (line, 1)
+
+        if quantity <= 0:
+            parsed.errors.append(f"Line {line_number}: invalid quantity: {raw}")
+            continue
+
+        target = section
+        if sideboard_prefix or (blank_after_cards and not headers_used):
+            target = 'sideboard'
+        if target is None:
+            continue
+        # Arena numbers are collector numbers; DeckWizard exports put the card id there
+        entry = DeckListEntry(quantity, name.strip(), set_name, collector)
+        getattr(parsed, target).append(entry)
+        seen_cards = True
+
+    return parsed
+
+
+class CardNameIndex:
+    """Resolves card names from deck lists to catalog ids.
+
+    Exact lookups go through a normalized-name dict (preferring the
+    printing from the requested set). Misses fall back to a trigram
+    inverted index that shortlists FUZZY_CANDIDATES names, which are then
+    ranked with difflib; the trigram index is only built on the first
+    miss. Lookups are memoized by raw name since pasted lists repeat names.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[str, str, str]]):
+        self.by_name: Dict[str, List[Tuple[str, str]]] = {}
+        self.display_names: Dict[str, str] = {}
+        self.ids = set()
+        for card_id, name, set_name in rows:
+            normalized = normalize_name(name)
+            self.by_name.setdefault(normalized, []).append((card_id, set_name))
+            self.display_names.setdefault(normalized, name)
+            self.ids.add(card_id)
+        self._names: Optional[List[str]] = None
+        self._postings: Optional[Dict[str, List[int]]] = None
+        # raw name -> (normalized catalog name or None, corrected display name or None)
+        self._lookups: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+
+    def _build_trigrams(self):
+        self._names = list(self.by_name)
+        self._postings = {}
+        for position, name in enumerate(self._names):
+            for gram in _trigrams(name):
+                self._postings.setdefault(gram, []).append(position)
+
+    def _fuzzy(self, normalized: str) -> Optional[str]:
+        if self._postings is None:
+            self._build_trigrams()
+
+        shared: Dict[int, int] = {}
+        for gram in _trigrams(normalized):
+            for position in self._postings.get(gram, ()):
+                shared[position] = shared.get(position, 0) + 1
+        shortlist = sorted(shared, key=shared.get, reverse=True)[:FUZZY_CANDIDATES]
+
+        best, best_ratio = None, FUZZY_CUTOFF
+        matcher = difflib.SequenceMatcher(b=normalized, autojunk=False)
+        for position in shortlist:
+            matcher.set_seq1(self._names[position])
+            ratio = matcher.ratio()
+            if ratio >= best_ratio:
+                best, best_ratio = self._names[position], ratio
+        return best
+
+    def _lookup(self, name: str) -> Tuple[Optional[str], Optional[str]]:
+        cached = self._lookups.get(name)
+        if cached is not None:
+            return cached
+        normalized = normalize_name(name)
+        if normalized in self.by_name:
+            result = (normalized, None)
+        else:
+            corrected = self._fuzzy(normalized) if normalized else None
+            result = (corrected, self.display_names[corrected] if corrected else None)
+        self._lookups[name] = result
+        return result
+
+    def resolve(self, name: str, set_name: Optional[str] = None,
+                card_id: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+        """Return ``(card_id, corrected_name)``; corrected_name is set for fuzzy matches only"""
+        if card_id and card_id in self.ids:
+            return card_id, None
+        normalized, corrected = self._lookup(name)
+        if normalized is None:
+            return None, None
+        printings = self.by_name[normalized]
+        if set_name and len(printings) > 1:
+            wanted = set_name.lower()
+            for printing_id, printing_set in printings:
+                if printing_set and printing_set.lower() == wanted:
+                    return printing_id, corrected
+        return printings[0][0], corrected
+
+
+class DeckImporter(SQLiteStore):
+    """Creates decks from pasted deck lists.
+
+    The card name index is built from the catalog on first use and kept
+    for the importer's lifetime; call refresh_index() after adding cards.
+    Sideboards are parsed and reported but not stored, since decks only
+    hold a single card list.
+    """
+
+    def __init__(self, db_path: str = "deckwizard.db"):
+        self.db_path = db_path
+        self._index: Optional[CardNameIndex] = None
+
+    @property
+    def index(self) -> CardNameIndex:
+        if self._index is None:
+            with self._connection() as conn:
+                self._index = CardNameIndex(conn.execute('SELECT id, name, set_name FROM cards'))
+        return self._index
+
+    def refresh_index(self):
+        self._index = None
+
+    def build_deck(self, text: str, name: Optional[str] = None, deck_format: Optional[str] = None,
+                   fallback_name: Optional[str] = None) -> Tuple[Deck, Dict]:
+        """Parse and resolve one list; returns the (unsaved) deck and a report.
+
+        The deck is named ``name``, else the list's ``Name:`` line, else
+        ``fallback_name`` (e.g. the file it came from).
+        """
+        parsed = parse_deck_list(text)
+        index = self.index
+        cards: Dict[str, int] = {}
+        unresolved: List[str] = []
+        corrected: Dict[str, str] = {}
+        for entry in parsed.mainboard:
+            card_id, corrected_name = index.resolve(entry.name, entry.set_name, entry.card_id)
+            if card_id is None:
+                unresolved.append(entry.name)
+                continue
+            if corrected_name:
+                corrected[entry.name] = corrected_name
+            cards[card_id] = cards.get(card_id, 0) + entry.quantity
+
+        now = datetime.now().isoformat()
+        deck = Deck(
+            id=new_record_id('deck'),
+            name=name or parsed.name or fallback_name or 'Imported Deck',
+            format=deck_format or parsed.format or 'Standard',
+            cards=cards,
+            created_date=now,
+            last_modified=now
+        )
+        report = {
+            'id': deck.id,
+            'name': deck.name,
+            'format': deck.format,
+            'total_cards': deck.get_total_cards(),
+            'unresolved': unresolved,
+            'corrected': corrected,
+            'sideboard_cards': sum(entry.quantity for entry in parsed.sideboard),
+            'errors': parsed.errors
+        }
+        return deck, report
+
+    def build_deck_from_cards(self, cards: Dict[str, int], name: Optional[str] = None,
+                              deck_format: Optional[str] = None,
+                              fallback_name: Optional[str] = None) -> Tuple[Deck, Dict]:
+        """Build a deck from an id -> quantity map, as in JSON exports; same report as build_deck().
+
+        Ids are checked against the catalog, without any name matching;
+        unknown ids and invalid quantities are reported and left out.
+        """
+        ids = self.index.ids
+        resolved: Dict[str, int] = {}
+        unresolved: List[str] = []
+        errors: List[str] = []
+        for card_id, quantity in cards.items():
+            if card_id not in ids:
+                unresolved.append(card_id)
+            elif isinstance(quantity, bool) or not isinstance(quantity, int) or quantity < 1:
+                errors.append(f"Invalid quantity for {card_id}: {quantity!r}")
+            else:
+                resolved[card_id] = resolved.get(card_id, 0) + quantity
+
+        now = datetime.now().isoformat()
+        deck = Deck(
+            id=new_record_id('deck'),
+            name=name or fallback_name or 'Imported Deck',
+            format=deck_format or 'Standard',
+            cards=resolved,
+            created_date=now,
+            last_modified=now
+        )
+        report = {
+            'id': deck.id,
+            'name': deck.name,
+            'format': deck.format,
+            'total_cards': deck.get_total_cards(),
+            'unresolved': unresolved,
+            'corrected': {},
+            'sideboard_cards': 0,
+            'errors': errors
+        }
+        return deck, report
+
+    def import_lists(self, lists: Iterable[Dict], dry_run: bool = False) -> List[Dict]:
+        """Create one deck per ``{'list': text, 'name': ..., 'format': ..., 'fallback_name': ...}``.
+
+        Items holding a ``cards`` id -> quantity map instead of a ``list``
+        (JSON exports) are built from those ids directly. Decks and their
+        first revision are inserted with executemany() in IMPORT_CHUNK_SIZE
+        batches inside a single transaction. Lists that resolve to no cards
+        are reported with ``'id': None`` and skipped.
+        """
+        reports = []
+        pending = []
+        with self._connection() as conn:
+            for item in lists:
+                if isinstance(item.get('cards'), dict):
+                    deck, report = self.build_deck_from_cards(item['cards'], item.get('name'), item.get('format'),
+                                                              item.get('fallback_name'))
+                else:
+                    deck, report = self.build_deck(item.get('list', ''), item.get('name'), item.get('format'),
+                                                   item.get('fallback_name'))
+                if not deck.cards:
+                    report['id'] = None
+                    report['errors'].append('No cards could be resolved')
+                else:
+                    pending.append(deck)
+                reports.append(report)
+                if len(pending) >= IMPORT_CHUNK_SIZE:
+                    self._insert(conn, pending, dry_run)
+                    pending = []
+            self._insert(conn, pending, dry_run)
+
+        imported = sum(1 for report in reports if report['id'])
+        logger.info("%s %d of %d deck lists", 'Resolved' if dry_run else 'Imported', imported, len(reports),
+                    extra={'event': 'decks_imported'})
+        return reports
+
+    @staticmethod
+    def _insert(conn, decks: List[Deck], dry_run: bool):
+        if dry_run or not decks:
+            return
+        conn.executemany('''
+            INSERT INTO decks (id, name, format, cards, created_date, last_modified, win_rate, games_played)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [(deck.id, deck.name, deck.format, json.dumps(deck.cards), deck.created_date,
+               deck.last_modified, deck.win_rate, deck.games_played) for deck in decks])
+        # Version 1 of the revision log, as DeckManager.save_deck writes for a
+        # new deck: the delta from an empty deck is the full card list
+        revisions = []
+        for deck in decks:
+            cards = json.dumps(deck.cards, separators=(',', ':'))
+            revisions.append((deck.id, 1, deck.created_date, cards, cards))
+        conn.executemany('''
+            INSERT INTO deck_revisions (deck_id, version, created_date, delta, snapshot)
+            VALUES (?, ?, ?, ?, ?)
+        ''', revisions)
+
+
+def read_deck_lists(path: str, deck_format: Optional[str] = None) -> Iterator[Dict]:
+    """Yield ``{'list', 'name', 'format'}`` items from a deck list file.
+
+    Accepts plain text (one list per file, named after the file), zip
+    archives of such files or of JSON entries (as written by ``deck
+    export``) and NDJSON with one object per line. A JSON object holds
+    ``cards`` (id -> quantity, the JSON export; yielded as a ``cards`` item
+    instead of a ``list``), ``list``, ``deck`` (Arena export) or
+    ``mainboard`` (MTG export), plus optional ``name``/``format``.
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if path.endswith('.zip'):
+        with zipfile.ZipFile(path) as archive:
+            for entry in archive.namelist():
+                if entry.endswith('/'):
+                    continue
+                text = archive.read(entry).decode('utf-8')
+                if entry.endswith('.json'):
+                    yield _item_from_json(json.loads(text), os.path.splitext(entry)[0], deck_format)
+                else:
+                    yield {'list': text, 'name': None, 'format': deck_format,
+                           'fallback_name': os.path.splitext(os.path.basename(entry))[0]}
+    elif path.endswith(('.ndjson', '.jsonl')):
+        with open(path) as handle:
+            for number, line in enumerate(handle, 1):
+                if line.strip():
+                    yield _item_from_json(json.loads(line), f"{stem}_{number}", deck_format)
+    else:
+        with io.open(path, encoding='utf-8') as handle:
+            yield {'list': handle.read(), 'name': None, 'format': deck_format, 'fallback_name': stem}
+
+
+def _item_from_json(data: Dict, fallback_name: str, deck_format: Optional[str]) -> Dict:
+    if isinstance(data.get('cards'), dict):
+        return {'cards': data['cards'], 'name': data.get('name'), 'format': deck_format or data.get('format'),
+                'fallback_name': fallback_name}
+    if 'list' in data:
+        text = data['list']
+    elif 'deck' in data:
+        text = data['deck']
+    elif 'mainboard' in data:
+        text = '\n'.join(data['mainboard'])
+        if data.get('sideboard'):
+            text += '\nSideboard\n' + '\n'.join(data['sideboard'])
+    else:
+        text = ''
+    return {'list': text, 'name': data.get('name'), 'format': deck_format or data.get('format'),
+            'fallback_name': fallback_name}
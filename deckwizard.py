@@ -8,29 +8,195 @@ Version: 1.0.0
 
 import json
 import sqlite3
-import random
 import argparse
+import atexit
+import bisect
+import os
+import queue
 import sys
+import threading
+import time
+import uuid
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass, asdict
-from pathlib import Path
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass
+from contextlib import contextmanager
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('deckwizard.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# Library modules only get a NullHandler; entry points call configure_logging()
 logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
 
-@dataclass
+_STANDARD_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats log records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_RECORD_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """Token-bucket limiter for per-row messages.
+
+    Records logged with an ``event`` extra (``card_added``, ``deck_saved``,
+    ``game_recorded``...) are limited to ``rate`` per second per event, with
+    bursts of up to ``burst``. The next record let through for an event
+    carries a ``suppressed`` count of the records dropped before it.
+    Records without an ``event`` always pass.
+    """
+
+    def __init__(self, rate: float = 20.0, burst: int = 100):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, List[float]] = {}  # event -> [tokens, last_refill]
+        self._suppressed: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = getattr(record, 'event', None)
+        if event is None:
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(event)
+            if bucket is None:
+                bucket = self._buckets[event] = [float(self.burst), now]
+            else:
+                bucket[0] = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] < 1.0:
+                self._suppressed[event] = self._suppressed.get(event, 0) + 1
+                return False
+
+            bucket[0] -= 1.0
+            dropped = self._suppressed.pop(event, 0)
+
+        if dropped:
+            record.suppressed = dropped
+        return True
+
+
+def _deferred_queue_handler(log_queue) -> logging.Handler:
+    """QueueHandler that leaves message formatting to the listener thread"""
+    # logging.handlers pulls in socket & co; only pay for it once logging is configured
+    import logging.handlers
+
+    class DeferredQueueHandler(logging.handlers.QueueHandler):
+        def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+            return record
+
+    return DeferredQueueHandler(log_queue)
+
+
+_log_listener = None  # logging.handlers.QueueListener once configured
+_log_handler: Optional[logging.Handler] = None
+
+
+def configure_logging(level: Optional[str] = None, log_file: Optional[str] = None,
+                      json_format: Optional[bool] = None, stream=None,
+                      rate: float = 20.0, burst: int = 100) -> 'logging.handlers.QueueListener':
+    """Install the asynchronous logging pipeline on the root logger.
+
+    Callers only pay for enqueueing a record; formatting and file/console I/O
+    happen on a background QueueListener thread. Unset arguments fall back to
+    the DECKWIZARD_LOG_LEVEL, DECKWIZARD_LOG_FILE and DECKWIZARD_LOG_JSON
+    environment variables. An empty ``log_file`` disables the file handler.
+    Calling this again replaces the previous configuration.
+    """
+    global _log_listener, _log_handler
+
+    if level is None:
+        level = os.environ.get('DECKWIZARD_LOG_LEVEL', 'INFO')
+    if log_file is None:
+        log_file = os.environ.get('DECKWIZARD_LOG_FILE', 'deckwizard.log')
+    if json_format is None:
+        json_format = os.environ.get('DECKWIZARD_LOG_JSON', '').lower() in ('1', 'true', 'yes')
+
+    shutdown_logging()
+
+    if json_format:
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+
+    handlers = []
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, delay=True))
+    handlers.append(logging.StreamHandler(stream or sys.stdout))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    _log_handler = _deferred_queue_handler(log_queue)
+    _log_handler.addFilter(RateLimitFilter(rate=rate, burst=burst))
+
+    root = logging.getLogger()
+    root.addHandler(_log_handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    _log_listener = logging.handlers.QueueListener(log_queue, *handlers)
+    _log_listener.start()
+    return _log_listener
+
+
+def shutdown_logging():
+    """Flush pending records and stop the background log listener"""
+    global _log_listener, _log_handler
+
+    if _log_handler is not None:
+        logging.getLogger().removeHandler(_log_handler)
+        _log_handler = None
+    if _log_listener is not None:
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            handler.close()
+        _log_listener = None
+
+
+atexit.register(shutdown_logging)
+
+# Every Nth deck version also stores the full card list, so rebuilding a
+# revision replays at most this many deltas
+REVISION_CHECKPOINT_INTERVAL = 50
+
+
+def new_record_id(prefix: str) -> str:
+    """Generate a timestamped id that stays unique within the same second"""
+    return f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+# Record types drop the per-instance __dict__ where dataclasses support it (3.10+)
+_RECORD_OPTIONS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@lru_cache(maxsize=4096)
+def _parse_abilities(raw: Optional[str]) -> Tuple[str, ...]:
+    """Decode a stored abilities JSON list once per distinct value"""
+    return tuple(json.loads(raw)) if raw else ()
+
+@dataclass(**_RECORD_OPTIONS)
 class Card:
-    """Represents a single card in the collection"""
+    """Represents a single card in the collection.
+    
+    ``card_type``, ``rarity`` and ``set_name`` are interned, so a large
+    catalog holds one copy of each distinct value.
+    """
     id: str
     name: str
     cost: int
@@ -45,10 +211,17 @@ class Card:
     def __post_init__(self):
         if self.abilities is None:
             self.abilities = []
+        self.card_type = sys.intern(self.card_type)
+        self.rarity = sys.intern(self.rarity)
+        self.set_name = sys.intern(self.set_name)
 
-@dataclass
+@dataclass(**_RECORD_OPTIONS)
 class Deck:
-    """Represents a deck configuration"""
+    """Represents a deck configuration.
+    
+    ``version`` is the stored version this copy was loaded at (0 for a deck
+    that was never saved); saves only succeed while it is still current.
+    """
     id: str
     name: str
     format: str
@@ -57,6 +230,7 @@ class Deck:
     last_modified: str
     win_rate: float = 0.0
     games_played: int = 0
+    version: int = 0
     
     def get_total_cards(self) -> int:
         return sum(self.cards.values())
@@ -70,7 +244,7 @@ class Deck:
             curve[cost] = curve.get(cost, 0) + quantity
         return curve
 
-@dataclass
+@dataclass(**_RECORD_OPTIONS)
 class GameResult:
     """Represents a game result"""
     id: str
@@ -80,8 +254,140 @@ class GameResult:
     game_length: int  # in turns
     date_played: str
     notes: str = ""
+    
+    def __post_init__(self):
+        self.result = sys.intern(self.result)
+
+class VersionConflict(Exception):
+    """A deck was changed by someone else since the caller read it"""
+    
+    def __init__(self, deck_id: str, expected: int, current: int):
+        super().__init__(f"Deck {deck_id} is at version {current}, not {expected}")
+        self.deck_id = deck_id
+        self.expected = expected
+        self.current = current
+
+
+def apply_card_deltas(cards: Dict[str, int], deltas: List[Tuple[str, int]]) -> Dict[str, int]:
+    """New card_id -> quantity mapping after adding (positive) or removing
+    (negative) quantities; cards that drop to zero or below are removed"""
+    updated = dict(cards)
+    for card_id, quantity in deltas:
+        if not isinstance(card_id, str) or not card_id:
+            raise ValueError(f"Invalid card id: {card_id!r}")
+        if not isinstance(quantity, int) or isinstance(quantity, bool):
+            raise ValueError(f"Invalid quantity for {card_id}: {quantity!r}")
+        remaining = updated.get(card_id, 0) + quantity
+        if remaining > 0:
+            updated[card_id] = remaining
+        else:
+            updated.pop(card_id, None)
+    return updated
+
+
+def card_delta(old: Dict[str, int], new: Dict[str, int]) -> Dict[str, int]:
+    """Quantity change per card from ``old`` to ``new`` (unchanged cards omitted)"""
+    delta = {card_id: new.get(card_id, 0) - quantity for card_id, quantity in old.items()
+             if new.get(card_id, 0) != quantity}
+    delta.update((card_id, quantity) for card_id, quantity in new.items() if card_id not in old)
+    return delta
+
+
+def parse_deck_ref(ref: str) -> Tuple[str, Optional[int]]:
+    """Split 'deck_id@version' (or a bare deck_id for the current version)"""
+    deck_id, _, version = ref.partition('@')
+    if not deck_id:
+        raise ValueError(f"Invalid deck reference: {ref!r}")
+    if not version:
+        return deck_id, None
+    if not version.isdigit():
+        raise ValueError(f"Invalid deck version in {ref!r}")
+    return deck_id, int(version)
+
+
+class DatabaseSession:
+    """One long-lived connection shared by several stores.
+    
+    Normally every store operation opens and closes its own connection. The
+    interactive shell and batch mode bind a session to all their stores
+    instead, so operations reuse one connection and card lookups go through
+    a per-session cache. Inside begin()/commit() every operation runs in its
+    own savepoint, so a failed operation is undone without aborting the
+    surrounding transaction.
+    """
+    
+    def __init__(self, db_path: str = "deckwizard.db"):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.in_transaction = False
+        self.card_cache: Dict[str, 'Card'] = {}
+    
+    def begin(self):
+        """Start an explicit transaction spanning many operations"""
+        self.conn.execute('BEGIN')
+        self.in_transaction = True
+    
+    def commit(self):
+        self.conn.commit()
+        self.in_transaction = False
+    
+    def rollback(self):
+        self.conn.rollback()
+        self.in_transaction = False
+        self.card_cache.clear()
+    
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+        self.conn.close()
+
+
+class SQLiteStore:
+    """Base for the classes that persist to a DeckWizard database file"""
+    
+    db_path: str
+    session: Optional[DatabaseSession] = None
+    
+    @contextmanager
+    def _connection(self):
+        """Yield a connection and commit on success, roll back on error"""
+        session = self.session
+        if session is None:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+        elif session.in_transaction:
+            conn = session.conn
+            conn.execute('SAVEPOINT store_op')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK TO store_op')
+                raise
+            finally:
+                conn.execute('RELEASE store_op')
+        else:
+            conn = session.conn
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+    
+    def _require_schema(self):
+        """Raise SchemaOutdatedError unless the file is migrated (checked once per process)"""
+        from migrations import require_current
+        require_current(self.db_path)
 
-class CardDatabase:
+
+class CardDatabase(SQLiteStore):
     """Manages the card database and collection"""
     
     def __init__(self, db_path: str = "deckwizard.db"):
@@ -89,88 +395,39 @@ class CardDatabase:
         self.init_database()
         
     def init_database(self):
-        """Initialize the SQLite database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Cards table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS cards (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                cost INTEGER NOT NULL,
-                card_type TEXT NOT NULL,
-                rarity TEXT NOT NULL,
-                set_name TEXT NOT NULL,
-                description TEXT,
-                attack INTEGER,
-                health INTEGER,
-                abilities TEXT
-            )
-        ''')
-        
-        # Collection table (owned cards)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS collection (
-                card_id TEXT,
-                quantity INTEGER DEFAULT 1,
-                condition TEXT DEFAULT 'mint',
-                acquired_date TEXT,
-                FOREIGN KEY (card_id) REFERENCES cards (id)
-            )
-        ''')
-        
-        # Decks table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS decks (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                format TEXT NOT NULL,
-                cards TEXT,  -- JSON string
-                created_date TEXT,
-                last_modified TEXT,
-                win_rate REAL DEFAULT 0.0,
-                games_played INTEGER DEFAULT 0
-            )
-        ''')
-        
-        # Game results table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS game_results (
-                id TEXT PRIMARY KEY,
-                deck_id TEXT,
-                opponent_deck TEXT,
-                result TEXT,
-                game_length INTEGER,
-                date_played TEXT,
-                notes TEXT,
-                FOREIGN KEY (deck_id) REFERENCES decks (id)
-            )
-        ''')
+        """Check the database schema; a new file is given the full schema.
         
-        conn.commit()
-        conn.close()
-        logger.info("Database initialized successfully")
+        Existing files are upgraded by the ``migrate`` command at deploy
+        time (see migrations.py), not when stores are constructed.
+        """
+        self._require_schema()
+    
+    @staticmethod
+    def _row_to_card(row) -> Card:
+        abilities = list(_parse_abilities(row[9]))
+        return Card(
+            id=row[0], name=row[1], cost=row[2], card_type=row[3],
+            rarity=row[4], set_name=row[5], description=row[6],
+            attack=row[7], health=row[8], abilities=abilities
+        )
     
     def add_card(self, card: Card) -> bool:
         """Add a card to the database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO cards 
-                (id, name, cost, card_type, rarity, set_name, description, attack, health, abilities)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                card.id, card.name, card.cost, card.card_type, card.rarity,
-                card.set_name, card.description, card.attack, card.health,
-                json.dumps(card.abilities)
-            ))
-            
-            conn.commit()
-            conn.close()
-            logger.info(f"Added card: {card.name}")
+            with self._connection() as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO cards 
+                    (id, name, cost, card_type, rarity, set_name, description, attack, health, abilities)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    card.id, card.name, card.cost, card.card_type, card.rarity,
+                    card.set_name, card.description, card.attack, card.health,
+                    json.dumps(card.abilities)
+                ))
+            
+            if self.session is not None:
+                self.session.card_cache[card.id] = card
+            logger.info("Added card: %s", card.name, extra={'event': 'card_added', 'card_id': card.id})
             return True
         except Exception as e:
             logger.error(f"Error adding card: {e}")
@@ -178,32 +435,50 @@ class CardDatabase:
     
     def get_card(self, card_id: str) -> Optional[Card]:
         """Retrieve a card by ID"""
+        if self.session is not None and card_id in self.session.card_cache:
+            return self.session.card_cache[card_id]
+        
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT * FROM cards WHERE id = ?', (card_id,))
-            row = cursor.fetchone()
-            conn.close()
+            with self._connection() as conn:
+                row = conn.execute('SELECT * FROM cards WHERE id = ?', (card_id,)).fetchone()
             
             if row:
-                abilities = json.loads(row[9]) if row[9] else []
-                return Card(
-                    id=row[0], name=row[1], cost=row[2], card_type=row[3],
-                    rarity=row[4], set_name=row[5], description=row[6],
-                    attack=row[7], health=row[8], abilities=abilities
-                )
+                card = self._row_to_card(row)
+                if self.session is not None:
+                    self.session.card_cache[card_id] = card
+                return card
             return None
         except Exception as e:
             logger.error(f"Error retrieving card: {e}")
             return None
     
+    def get_card_names(self, card_ids: List[str]) -> Dict[str, str]:
+        """Names of many cards in a few queries; unknown ids are left out"""
+        names = {}
+        card_ids = list(card_ids)
+        with self._connection() as conn:
+            # Stay well below SQLite's bound parameter limit
+            for start in range(0, len(card_ids), 500):
+                chunk = card_ids[start:start + 500]
+                names.update(conn.execute(
+                    f"SELECT id, name FROM cards WHERE id IN ({','.join('?' * len(chunk))})", chunk))
+        return names
+    
+    def get_cards(self, card_ids: List[str]) -> Dict[str, Card]:
+        """Many cards by id in a few queries; unknown ids are left out"""
+        cards = {}
+        card_ids = list(card_ids)
+        with self._connection() as conn:
+            for start in range(0, len(card_ids), 500):
+                chunk = card_ids[start:start + 500]
+                for row in conn.execute(
+                        f"SELECT * FROM cards WHERE id IN ({','.join('?' * len(chunk))})", chunk):
+                    cards[row[0]] = self._row_to_card(row)
+        return cards
+    
     def search_cards(self, **filters) -> List[Card]:
         """Search cards with filters"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             query = "SELECT * FROM cards WHERE 1=1"
             params = []
             
@@ -223,34 +498,34 @@ class CardDatabase:
                 query += " AND cost = ?"
                 params.append(filters['cost'])
             
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
-            conn.close()
-            
-            cards = []
-            for row in rows:
-                abilities = json.loads(row[9]) if row[9] else []
-                cards.append(Card(
-                    id=row[0], name=row[1], cost=row[2], card_type=row[3],
-                    rarity=row[4], set_name=row[5], description=row[6],
-                    attack=row[7], health=row[8], abilities=abilities
-                ))
+            with self._connection() as conn:
+                rows = conn.execute(query, params).fetchall()
             
-            return cards
+            return [self._row_to_card(row) for row in rows]
         except Exception as e:
             logger.error(f"Error searching cards: {e}")
             return []
 
-class DeckManager:
+class DeckManager(SQLiteStore):
     """Manages deck creation, modification, and analysis"""
     
-    def __init__(self, db_path: str = "deckwizard.db"):
+    def __init__(self, db_path: str = "deckwizard.db", card_db: Optional[CardDatabase] = None):
         self.db_path = db_path
-        self.card_db = CardDatabase(db_path)
+        self.card_db = card_db or CardDatabase(db_path)
+        self._format_registry = None
+    
+    @property
+    def format_registry(self):
+        """Format rules and legality indexes, loaded on first use"""
+        if self._format_registry is None:
+            from formats import FormatRegistry
+            self._format_registry = FormatRegistry(self.db_path, card_db=self.card_db)
+        self._format_registry.session = self.session
+        return self._format_registry
     
     def create_deck(self, name: str, format: str) -> Deck:
         """Create a new deck"""
-        deck_id = f"deck_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        deck_id = new_record_id('deck')
         current_time = datetime.now().isoformat()
         
         deck = Deck(
@@ -263,54 +538,245 @@ class DeckManager:
         )
         
         self.save_deck(deck)
-        logger.info(f"Created deck: {name}")
+        logger.info("Created deck: %s", name, extra={'event': 'deck_created', 'deck_id': deck_id})
         return deck
     
     def save_deck(self, deck: Deck) -> bool:
-        """Save deck to database"""
+        """Save deck to database.
+        
+        A deck that was never saved is inserted; otherwise the update is a
+        compare-and-swap on ``deck.version`` and returns False without
+        writing when the stored deck has moved on (reload and retry).
+        Win rate and games played are maintained by GameTracker and are
+        not written back. Card changes are appended to the revision log.
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO decks 
-                (id, name, format, cards, created_date, last_modified, win_rate, games_played)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                deck.id, deck.name, deck.format, json.dumps(deck.cards),
-                deck.created_date, deck.last_modified, deck.win_rate, deck.games_played
-            ))
-            
-            conn.commit()
-            conn.close()
-            logger.info(f"Saved deck: {deck.name}")
+            with self._connection() as conn:
+                if deck.version == 0:
+                    conn.execute('''
+                        INSERT INTO decks 
+                        (id, name, format, cards, created_date, last_modified, win_rate, games_played, version)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1)
+                    ''', (
+                        deck.id, deck.name, deck.format, json.dumps(deck.cards),
+                        deck.created_date, deck.last_modified, deck.win_rate, deck.games_played
+                    ))
+                    self._log_revision(conn, deck.id, 1, None, deck.cards, deck.created_date)
+                else:
+                    if not conn.in_transaction:
+                        conn.execute('BEGIN IMMEDIATE')
+                    row = conn.execute('''
+                        SELECT cards, last_modified FROM decks WHERE id = ? AND version = ?
+                    ''', (deck.id, deck.version)).fetchone()
+                    if not row:
+                        logger.warning("Deck %s changed since version %d; not saved", deck.id, deck.version,
+                                       extra={'event': 'deck_version_conflict', 'deck_id': deck.id})
+                        return False
+                    conn.execute('''
+                        UPDATE decks SET name = ?, format = ?, cards = ?, last_modified = ?,
+                                         version = version + 1
+                        WHERE id = ? AND version = ?
+                    ''', (
+                        deck.name, deck.format, json.dumps(deck.cards), deck.last_modified,
+                        deck.id, deck.version
+                    ))
+                    self._log_revision(conn, deck.id, deck.version + 1, (json.loads(row[0]) if row[0] else {}, row[1]),
+                                       deck.cards, datetime.now().isoformat())
+            
+            deck.version += 1
+            logger.info("Saved deck: %s", deck.name, extra={'event': 'deck_saved', 'deck_id': deck.id})
             return True
         except Exception as e:
             logger.error(f"Error saving deck: {e}")
             return False
     
+    def update_deck_cards(self, deck_id: str, deltas: List[Tuple[str, int]],
+                          expected_version: Optional[int] = None) -> Deck:
+        """Apply many add/remove deltas to a stored deck in one transaction.
+        
+        The deck is read under the write lock, so concurrent callers are
+        serialized and none of their changes are lost. With
+        ``expected_version`` the update is rejected with VersionConflict
+        unless the deck is still at that version. Raises LookupError for an
+        unknown deck and ValueError for malformed deltas.
+        """
+        with self._connection() as conn:
+            if not conn.in_transaction:
+                conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT * FROM decks WHERE id = ?', (deck_id,)).fetchone()
+            if not row:
+                raise LookupError(f"Deck not found: {deck_id}")
+            deck = self._row_to_deck(row)
+            if expected_version is not None and deck.version != expected_version:
+                raise VersionConflict(deck_id, expected_version, deck.version)
+            
+            previous = (deck.cards, deck.last_modified)
+            deck.cards = apply_card_deltas(deck.cards, deltas)
+            deck.last_modified = datetime.now().isoformat()
+            updated = conn.execute('''
+                UPDATE decks SET cards = ?, last_modified = ?, version = version + 1
+                WHERE id = ? AND version = ?
+            ''', (json.dumps(deck.cards), deck.last_modified, deck_id, deck.version)).rowcount
+            if not updated:
+                current = conn.execute('SELECT version FROM decks WHERE id = ?', (deck_id,)).fetchone()
+                raise VersionConflict(deck_id, deck.version, current[0] if current else 0)
+            self._log_revision(conn, deck_id, deck.version + 1, previous, deck.cards, deck.last_modified)
+        
+        deck.version += 1
+        logger.info("Updated %d cards in deck %s", len(deltas), deck_id,
+                    extra={'event': 'deck_cards_updated', 'deck_id': deck_id})
+        return deck
+    
+    @staticmethod
+    def _log_revision(conn, deck_id: str, version: int, previous: Optional[Tuple[Dict[str, int], str]],
+                      cards: Dict[str, int], created_date: str):
+        """Append the card change that produced ``version`` to the revision log.
+        
+        ``previous`` is the (cards, last_modified) the deck had before, or
+        None for a new deck. Versions that only renamed the deck are not
+        logged. Decks that predate the log get their previous contents
+        recorded as a base revision first.
+        """
+        old_cards = previous[0] if previous else {}
+        delta = card_delta(old_cards, cards)
+        if previous is not None:
+            if not delta:
+                return
+            if not conn.execute('SELECT 1 FROM deck_revisions WHERE deck_id = ? LIMIT 1', (deck_id,)).fetchone():
+                base = json.dumps(old_cards, separators=(',', ':'))
+                conn.execute('''
+                    INSERT INTO deck_revisions (deck_id, version, created_date, delta, snapshot)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (deck_id, version - 1, previous[1] or created_date, base, base))
+        
+        # The first revision and every checkpoint also carry the full card list
+        snapshot = None
+        if previous is None or version % REVISION_CHECKPOINT_INTERVAL == 0:
+            snapshot = json.dumps(cards, separators=(',', ':'))
+        conn.execute('''
+            INSERT INTO deck_revisions (deck_id, version, created_date, delta, snapshot)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (deck_id, version, created_date, json.dumps(delta, separators=(',', ':')), snapshot))
+    
+    def cards_at(self, deck_id: str, version: Optional[int] = None) -> Dict[str, int]:
+        """Card list of a deck at ``version`` (default: current), rebuilt from
+        the nearest checkpoint and the deltas after it.
+        
+        Raises LookupError for an unknown deck and ValueError for a version
+        the deck never had or that predates its revision log.
+        """
+        with self._connection() as conn:
+            row = conn.execute('SELECT cards, version FROM decks WHERE id = ?', (deck_id,)).fetchone()
+            if not row:
+                raise LookupError(f"Deck not found: {deck_id}")
+            current = row[1]
+            if version is None or version == current:
+                return json.loads(row[0]) if row[0] else {}
+            if version < 1 or version > current:
+                raise ValueError(f"Deck {deck_id} has versions 1 to {current}, not {version}")
+            
+            revisions = conn.execute('''
+                SELECT delta, snapshot FROM deck_revisions
+                WHERE deck_id = ? AND version <= ? AND version >= (
+                    SELECT MAX(version) FROM deck_revisions
+                    WHERE deck_id = ? AND version <= ? AND snapshot IS NOT NULL
+                )
+                ORDER BY version
+            ''', (deck_id, version, deck_id, version)).fetchall()
+        
+        if not revisions:
+            raise ValueError(f"Deck {deck_id} has no history for version {version}")
+        cards = json.loads(revisions[0][1])
+        for delta, _ in revisions[1:]:
+            cards = apply_card_deltas(cards, json.loads(delta).items())
+        return cards
+    
+    def diff_decks(self, ref_a: str, ref_b: Optional[str] = None) -> Dict:
+        """Card differences from ``ref_a`` to ``ref_b`` ('deck_id' or 'deck_id@version').
+        
+        Without ``ref_b`` a revision is compared with the current version of
+        the same deck.
+        """
+        deck_a, version_a = parse_deck_ref(ref_a)
+        deck_b, version_b = parse_deck_ref(ref_b) if ref_b else (deck_a, None)
+        cards_a = self.cards_at(deck_a, version_a)
+        cards_b = self.cards_at(deck_b, version_b)
+        
+        delta = card_delta(cards_a, cards_b)
+        names = self.card_db.get_card_names(delta)
+        changes = []
+        for card_id, change in sorted(delta.items()):
+            changes.append({
+                'card_id': card_id, 'name': names.get(card_id, card_id),
+                'from': cards_a.get(card_id, 0), 'to': cards_b.get(card_id, 0), 'change': change
+            })
+        return {
+            'from': {'deck_id': deck_a, 'version': version_a, 'total_cards': sum(cards_a.values())},
+            'to': {'deck_id': deck_b, 'version': version_b, 'total_cards': sum(cards_b.values())},
+            'added': sum(c['change'] for c in changes if c['change'] > 0),
+            'removed': -sum(c['change'] for c in changes if c['change'] < 0),
+            'changes': changes
+        }
+    
+    def revision_history(self, deck_id: str) -> List[Dict]:
+        """Each logged revision with the record of the games played while it was current.
+        
+        A game belongs to the latest revision created before it was played;
+        simulated games are left out. ``win_rate_change`` compares with the
+        previous revision that has games.
+        """
+        with self._connection() as conn:
+            revisions = conn.execute('''
+                SELECT version, created_date, delta FROM deck_revisions
+                WHERE deck_id = ? ORDER BY version
+            ''', (deck_id,)).fetchall()
+            games = conn.execute('''
+                SELECT date_played, result FROM game_results
+                WHERE deck_id = ? AND date_played >= ? AND simulated = 0
+            ''', (deck_id, revisions[0][1] if revisions else '')).fetchall() if revisions else []
+        
+        starts = [created for _, created, _ in revisions]
+        history = [{
+            'version': version, 'created_date': created,
+            'delta': json.loads(delta), 'games': 0, 'wins': 0, 'losses': 0, 'draws': 0
+        } for version, created, delta in revisions]
+        for date_played, result in games:
+            index = bisect.bisect_right(starts, date_played) - 1
+            if index >= 0 and result in ('win', 'loss', 'draw'):
+                entry = history[index]
+                entry['games'] += 1
+                entry[{'win': 'wins', 'loss': 'losses', 'draw': 'draws'}[result]] += 1
+        
+        previous_rate = None
+        for entry in history:
+            entry['win_rate'] = entry['wins'] / entry['games'] if entry['games'] else None
+            entry['win_rate_change'] = (entry['win_rate'] - previous_rate
+                                        if entry['win_rate'] is not None and previous_rate is not None else None)
+            if entry['win_rate'] is not None:
+                previous_rate = entry['win_rate']
+        return history
+    
     def load_deck(self, deck_id: str) -> Optional[Deck]:
         """Load deck from database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT * FROM decks WHERE id = ?', (deck_id,))
-            row = cursor.fetchone()
-            conn.close()
+            with self._connection() as conn:
+                row = conn.execute('SELECT * FROM decks WHERE id = ?', (deck_id,)).fetchone()
             
             if row:
-                cards = json.loads(row[3]) if row[3] else {}
-                return Deck(
-                    id=row[0], name=row[1], format=row[2], cards=cards,
-                    created_date=row[4], last_modified=row[5],
-                    win_rate=row[6], games_played=row[7]
-                )
+                return self._row_to_deck(row)
             return None
         except Exception as e:
             logger.error(f"Error loading deck: {e}")
             return None
     
+    @staticmethod
+    def _row_to_deck(row) -> Deck:
+        return Deck(
+            id=row[0], name=row[1], format=row[2], cards=json.loads(row[3]) if row[3] else {},
+            created_date=row[4], last_modified=row[5],
+            win_rate=row[6], games_played=row[7], version=row[8]
+        )
+    
     def add_card_to_deck(self, deck: Deck, card_id: str, quantity: int = 1) -> bool:
         """Add cards to deck"""
         if card_id in deck.cards:
@@ -349,11 +815,11 @@ class DeckManager:
                 analysis['card_types'][card.card_type] = analysis['card_types'].get(card.card_type, 0) + quantity
                 analysis['rarities'][card.rarity] = analysis['rarities'].get(card.rarity, 0) + quantity
         
-        # Generate recommendations
-        if analysis['total_cards'] < 30:
-            analysis['recommendations'].append("Deck is below minimum size (30 cards)")
-        elif analysis['total_cards'] > 60:
-            analysis['recommendations'].append("Deck is above recommended size (60 cards)")
+        # Generate recommendations from the format's construction rules
+        legality = self.format_registry.validate(deck)
+        analysis['legal'] = legality['legal']
+        analysis['legality_problems'] = legality['problems']
+        analysis['recommendations'].extend(problem['message'] for problem in legality['problems'])
         
         # Mana curve analysis
         curve = analysis['mana_curve']
@@ -378,17 +844,27 @@ class DeckManager:
         
         return suggestions[:count]
 
-class GameTracker:
+class GameTracker(SQLiteStore):
     """Tracks game results and statistics"""
     
     def __init__(self, db_path: str = "deckwizard.db"):
         self.db_path = db_path
+        self.listeners: List[Callable[[GameResult, Optional[Dict]], None]] = []
+    
+    def add_listener(self, callback: Callable[[GameResult, Optional[Dict]], None]):
+        """Call ``callback(game, deck_totals)`` after each recorded game.
+        
+        ``deck_totals`` holds the deck's updated games_played and win_rate,
+        or None when the deck is not stored.
+        """
+        self.listeners.append(callback)
     
     def record_game(self, deck_id: str, opponent_deck: str, result: str, 
-                   game_length: int, notes: str = "") -> bool:
+                   game_length: int, notes: str = "", game_id: Optional[str] = None) -> bool:
         """Record a game result"""
+        deck_totals = None
         try:
-            game_id = f"game_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            game_id = game_id or new_record_id('game')
             game_result = GameResult(
                 id=game_id,
                 deck_id=deck_id,
@@ -399,63 +875,85 @@ class GameTracker:
                 notes=notes
             )
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO game_results 
-                (id, deck_id, opponent_deck, result, game_length, date_played, notes)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                game_result.id, game_result.deck_id, game_result.opponent_deck,
-                game_result.result, game_result.game_length, game_result.date_played,
-                game_result.notes
-            ))
-            
-            # Update deck statistics
-            cursor.execute('''
-                SELECT games_played, win_rate FROM decks WHERE id = ?
-            ''', (deck_id,))
-            
-            row = cursor.fetchone()
-            if row:
-                games_played = row[0] + 1
-                current_wins = row[1] * row[0]
-                new_wins = current_wins + (1 if result == 'win' else 0)
-                new_win_rate = new_wins / games_played
+            with self._connection() as conn:
+                cursor = conn.cursor()
                 
                 cursor.execute('''
-                    UPDATE decks SET games_played = ?, win_rate = ? WHERE id = ?
-                ''', (games_played, new_win_rate, deck_id))
+                    INSERT INTO game_results 
+                    (id, deck_id, opponent_deck, result, game_length, date_played, notes)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    game_result.id, game_result.deck_id, game_result.opponent_deck,
+                    game_result.result, game_result.game_length, game_result.date_played,
+                    game_result.notes
+                ))
+                
+                # Update deck statistics
+                cursor.execute('''
+                    SELECT games_played, win_rate, wins FROM decks WHERE id = ?
+                ''', (deck_id,))
+                
+                row = cursor.fetchone()
+                if row:
+                    games_played = row[0] + 1
+                    # Decks stored without a win count get one from their win rate
+                    current_wins = row[2] if row[2] is not None else round(row[1] * row[0])
+                    new_wins = current_wins + (1 if result == 'win' else 0)
+                    new_win_rate = new_wins / games_played
+                    
+                    cursor.execute('''
+                        UPDATE decks SET games_played = ?, win_rate = ?, wins = ? WHERE id = ?
+                    ''', (games_played, new_win_rate, new_wins, deck_id))
+                    deck_totals = {'games_played': games_played, 'win_rate': new_win_rate}
             
-            conn.commit()
-            conn.close()
-            logger.info(f"Recorded game result: {result}")
-            return True
+            logger.info("Recorded game result: %s", result,
+                        extra={'event': 'game_recorded', 'deck_id': deck_id})
         except Exception as e:
             logger.error(f"Error recording game: {e}")
             return False
+        
+        for callback in self.listeners:
+            try:
+                callback(game_result, deck_totals)
+            except Exception as e:
+                logger.error(f"Error in game listener: {e}")
+        return True
+    
+    def record_simulated_games(self, games: List[GameResult]) -> int:
+        """Store games played by the simulator in one transaction.
+        
+        They are flagged ``simulated`` and left out of the deck's own
+        win_rate/games_played and of the statistics built from real games;
+        no listeners are called.
+        """
+        with self._connection() as conn:
+            conn.executemany('''
+                INSERT INTO game_results
+                (id, deck_id, opponent_deck, result, game_length, date_played, notes, simulated)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 1)
+            ''', ((game.id, game.deck_id, game.opponent_deck, game.result, game.game_length,
+                   game.date_played, game.notes) for game in games))
+        logger.info("Recorded %d simulated games", len(games), extra={'event': 'games_simulated'})
+        return len(games)
     
     def get_deck_statistics(self, deck_id: str) -> Dict:
         """Get comprehensive statistics for a deck"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Get basic deck stats
-            cursor.execute('''
-                SELECT games_played, win_rate FROM decks WHERE id = ?
-            ''', (deck_id,))
-            deck_row = cursor.fetchone()
-            
-            # Get game results
-            cursor.execute('''
-                SELECT result, game_length, date_played FROM game_results 
-                WHERE deck_id = ? ORDER BY date_played DESC
-            ''', (deck_id,))
-            games = cursor.fetchall()
-            
-            conn.close()
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                
+                # Get basic deck stats
+                cursor.execute('''
+                    SELECT games_played, win_rate FROM decks WHERE id = ?
+                ''', (deck_id,))
+                deck_row = cursor.fetchone()
+                
+                # Get game results
+                cursor.execute('''
+                    SELECT result, game_length, date_played FROM game_results 
+                    WHERE deck_id = ? AND simulated = 0 ORDER BY date_played DESC
+                ''', (deck_id,))
+                games = cursor.fetchall()
             
             if not deck_row:
                 return {}
@@ -478,14 +976,86 @@ class GameTracker:
 class DeckWizardCLI:
     """Command-line interface for DeckWizard"""
     
-    def __init__(self):
-        self.card_db = CardDatabase()
-        self.deck_manager = DeckManager()
-        self.game_tracker = GameTracker()
+    # Commands that can run inside the shell and batch modes
+    SESSION_COMMANDS = ('card', 'deck', 'game', 'tournament')
+    
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.environ.get('DECKWIZARD_DB', 'deckwizard.db')
+        self.workspace_root = os.environ.get('DECKWIZARD_WORKSPACES', 'workspaces')
+        # Set when commands run in a workspace, with db_path as the shared catalog
+        self.catalog_path: Optional[str] = None
+        self.session: Optional[DatabaseSession] = None
+        self._card_db = None
+        self._deck_manager = None
+        self._game_tracker = None
+        self._tournament_manager = None
     
-    def run(self):
-        """Main CLI loop"""
+    # Components are built on first use so that --help, argument errors and
+    # commands that only need one of them don't pay for the others
+    @property
+    def card_db(self) -> CardDatabase:
+        if self._card_db is None:
+            self._card_db = CardDatabase(self.db_path)
+            self._card_db.session = self.session
+        return self._card_db
+    
+    @property
+    def deck_manager(self) -> DeckManager:
+        if self._deck_manager is None:
+            self._deck_manager = DeckManager(self.db_path, card_db=self.card_db)
+            self._deck_manager.session = self.session
+        return self._deck_manager
+    
+    @property
+    def game_tracker(self) -> GameTracker:
+        if self._game_tracker is None:
+            self._game_tracker = GameTracker(self.db_path)
+            self._game_tracker.session = self.session
+        return self._game_tracker
+    
+    @property
+    def tournament_manager(self):
+        if self._tournament_manager is None:
+            from tournament import TournamentManager
+            self._tournament_manager = TournamentManager(self.db_path, game_tracker=self.game_tracker)
+            self._tournament_manager.session = self.session
+        return self._tournament_manager
+    
+    def open_session(self) -> DatabaseSession:
+        """Bind one shared connection to every component"""
+        if self.session is not None:
+            return self.session
+        if self.catalog_path:
+            from tenancy import WorkspaceSession
+            self.session = WorkspaceSession(self.db_path, self.catalog_path)
+        else:
+            self.session = DatabaseSession(self.db_path)
+        for component in (self._card_db, self._deck_manager, self._game_tracker,
+                          self._tournament_manager):
+            if component is not None:
+                component.session = self.session
+        return self.session
+    
+    def close_session(self):
+        if self.session is not None:
+            self.session.close()
+        for component in (self._card_db, self._deck_manager, self._game_tracker,
+                          self._tournament_manager):
+            if component is not None:
+                component.session = None
+        self.session = None
+    
+    def build_parser(self) -> argparse.ArgumentParser:
+        """Build the argument parser for all commands"""
         parser = argparse.ArgumentParser(description="DeckWizard - Advanced Card Game Management Suite")
+        parser.add_argument('--db', help='Database file (default: $DECKWIZARD_DB or deckwizard.db); '
+                                         'the shared card catalog with --workspace')
+        parser.add_argument('--workspace', help='Run against this workspace database')
+        parser.add_argument('--workspace-root',
+                            help='Directory of workspace databases (default: $DECKWIZARD_WORKSPACES or workspaces)')
+        parser.add_argument('--log-level', help='Log level (default: $DECKWIZARD_LOG_LEVEL or INFO)')
+        parser.add_argument('--log-file', help='Log file path, empty to disable (default: deckwizard.log)')
+        parser.add_argument('--log-json', action='store_true', default=None, help='Write structured JSON log lines')
         subparsers = parser.add_subparsers(dest='command', help='Available commands')
         
         # Card management commands
@@ -519,6 +1089,30 @@ class DeckWizardCLI:
         analyze_deck_parser = deck_subparsers.add_parser('analyze', help='Analyze a deck')
         analyze_deck_parser.add_argument('--id', required=True, help='Deck ID')
         
+        export_deck_parser = deck_subparsers.add_parser('export', help='Export decks to a zip or NDJSON archive')
+        export_deck_parser.add_argument('--output', required=True, help="Archive file ('-' for stdout)")
+        export_deck_parser.add_argument('--archive', choices=['zip', 'ndjson'],
+                                        help='Archive type (default: from the output extension, else zip)')
+        export_deck_parser.add_argument('--format', default='json', choices=['mtg', 'arena', 'json'],
+                                        help='Deck list format')
+        export_deck_parser.add_argument('--ids', help='Comma-separated deck IDs (default: all decks)')
+        export_deck_parser.add_argument('--deck-format', help='Only decks of this game format')
+        
+        import_deck_parser = deck_subparsers.add_parser('import', help='Create decks from deck list files')
+        import_deck_parser.add_argument('paths', nargs='+',
+                                        help='Deck list .txt files, .zip archives or .ndjson files')
+        import_deck_parser.add_argument('--format', help='Game format (default: from the list, else Standard)')
+        import_deck_parser.add_argument('--name', help='Deck name (single list only)')
+        import_deck_parser.add_argument('--dry-run', action='store_true', help='Resolve and report without saving')
+        
+        diff_deck_parser = deck_subparsers.add_parser('diff', help='Compare two decks or revisions')
+        diff_deck_parser.add_argument('source', help='deck_id or deck_id@version')
+        diff_deck_parser.add_argument('target', nargs='?',
+                                      help='deck_id or deck_id@version (default: current version of source)')
+        
+        history_deck_parser = deck_subparsers.add_parser('history', help='Revisions with win rate per revision')
+        history_deck_parser.add_argument('--id', required=True, help='Deck ID')
+        
         # Game tracking commands
         game_parser = subparsers.add_parser('game', help='Game tracking')
         game_subparsers = game_parser.add_subparsers(dest='game_action')
@@ -533,22 +1127,378 @@ class DeckWizardCLI:
         stats_parser = game_subparsers.add_parser('stats', help='View deck statistics')
         stats_parser.add_argument('--deck-id', required=True, help='Deck ID')
         
+        # Tournament commands
+        tournament_parser = subparsers.add_parser('tournament', help='Tournament management')
+        tournament_subparsers = tournament_parser.add_subparsers(dest='tournament_action')
+        
+        create_tournament_parser = tournament_subparsers.add_parser('create', help='Create a tournament')
+        create_tournament_parser.add_argument('--name', required=True, help='Tournament name')
+        create_tournament_parser.add_argument('--type', default='swiss',
+                                              choices=['swiss', 'single_elimination',
+                                                       'double_elimination', 'round_robin'])
+        create_tournament_parser.add_argument('--participants', required=True,
+                                              help='Comma-separated deck IDs or player names')
+        create_tournament_parser.add_argument('--rounds', type=int, help='Swiss rounds (default: log2 of players)')
+        
+        pair_parser = tournament_subparsers.add_parser('pair', help='Pair the next Swiss/round-robin round')
+        pair_parser.add_argument('--id', required=True, help='Tournament ID')
+        
+        report_parser = tournament_subparsers.add_parser('report', help='Report a match result')
+        report_parser.add_argument('--id', required=True, help='Tournament ID')
+        report_parser.add_argument('--match', required=True, help='Match code, e.g. R1-3 or W2-1')
+        report_parser.add_argument('--result', required=True, choices=['player1', 'player2', 'draw'])
+        report_parser.add_argument('--length', type=int, default=0, help='Game length in turns')
+        
+        standings_parser = tournament_subparsers.add_parser('standings', help='Show standings')
+        standings_parser.add_argument('--id', required=True, help='Tournament ID')
+        
+        simulate_parser = tournament_subparsers.add_parser(
+            'simulate', help='Project win/top-N probabilities from matchup history')
+        simulate_parser.add_argument('--type', default='single_elimination',
+                                     choices=['swiss', 'single_elimination',
+                                              'double_elimination', 'round_robin'])
+        simulate_parser.add_argument('--participants', required=True,
+                                     help='Comma-separated deck IDs in seed order')
+        simulate_parser.add_argument('--rounds', type=int, help='Swiss rounds (default: log2 of players)')
+        simulate_parser.add_argument('--runs', type=int, default=1000000, help='Maximum simulated events')
+        simulate_parser.add_argument('--top', default='4,8', help='Comma-separated top-N cut sizes')
+        simulate_parser.add_argument('--tolerance', type=float, default=0.0025,
+                                     help='Stop once every 95%% CI half-width is below this')
+        simulate_parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+        simulate_parser.add_argument('--seed', type=int, help='Random seed')
+        simulate_parser.add_argument('--include-simulated', action='store_true',
+                                     help='Also learn matchups from simulator games')
+        
+        # Columnar snapshot commands
+        snapshot_parser = subparsers.add_parser('snapshot', help='Columnar snapshots for analytics')
+        snapshot_subparsers = snapshot_parser.add_subparsers(dest='snapshot_action')
+        
+        create_snapshot_parser = snapshot_subparsers.add_parser('create', help='Write a full snapshot')
+        create_snapshot_parser.add_argument('path', help='Snapshot directory')
+        create_snapshot_parser.add_argument('--format', choices=['npy', 'parquet'], default='npy',
+                                            help='Column file format (parquet needs pyarrow)')
+        
+        append_snapshot_parser = snapshot_subparsers.add_parser('append', help='Add games recorded since the snapshot')
+        append_snapshot_parser.add_argument('path', help='Snapshot directory')
+        
+        snapshot_stats_parser = snapshot_subparsers.add_parser('stats', help='Win rates and matchups from a snapshot')
+        snapshot_stats_parser.add_argument('path', help='Snapshot directory')
+        snapshot_stats_parser.add_argument('--deck-id', help='Show matchups of this deck')
+        snapshot_stats_parser.add_argument('--top', type=int, default=10, help='Decks to list')
+        
         # Demo command
-        demo_parser = subparsers.add_parser('demo', help='Run demo with sample data')
+        subparsers.add_parser('demo', help='Run demo with sample data')
+        
+        # Game simulator commands
+        sim_parser = subparsers.add_parser('simulate', help='AI-vs-AI games between stored decks')
+        sim_subparsers = sim_parser.add_subparsers(dest='simulate_action')
+        
+        matchup_parser = sim_subparsers.add_parser('matchup', help='Play one deck against another')
+        matchup_parser.add_argument('--deck-id', required=True, help='Deck ID')
+        matchup_parser.add_argument('--opponent', required=True, help='Opponent deck ID')
+        
+        gauntlet_parser = sim_subparsers.add_parser('gauntlet', help='Play a deck against several opponents')
+        gauntlet_parser.add_argument('--deck-id', required=True, help='Deck ID')
+        gauntlet_parser.add_argument('--opponents', help='Comma-separated deck IDs (default: most played of its format)')
+        
+        tune_parser = sim_subparsers.add_parser('optimize', help='Rank one-card swaps by simulated win rate')
+        tune_parser.add_argument('--deck-id', required=True, help='Deck ID')
+        tune_parser.add_argument('--opponents', help='Comma-separated deck IDs (default: most played of its format)')
+        
+        for sim_action_parser, default_games in ((matchup_parser, 1000), (gauntlet_parser, 1000), (tune_parser, 200)):
+            sim_action_parser.add_argument('--games', type=int, default=default_games, help='Games per opponent')
+            sim_action_parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+            sim_action_parser.add_argument('--seed', type=int, help='Random seed')
+        for sim_action_parser in (matchup_parser, gauntlet_parser):
+            sim_action_parser.add_argument('--no-record', action='store_true', help="Don't store the simulated games")
+        
+        # Format rules commands
+        format_parser = subparsers.add_parser('format', help='Format rules, ban lists and deck legality')
+        format_subparsers = format_parser.add_subparsers(dest='format_action')
+        format_subparsers.add_parser('list', help='List formats and their deck rules')
+        format_show_parser = format_subparsers.add_parser('show', help="Show a format's rules and card lists")
+        format_show_parser.add_argument('name', help='Format name')
+        format_set_parser = format_subparsers.add_parser('set', help='Change deck size, copy limit or legal sets')
+        format_set_parser.add_argument('name', help='Format name')
+        format_set_parser.add_argument('--min-size', type=int, help='Minimum deck size')
+        format_set_parser.add_argument('--max-size', type=int, help='Maximum deck size')
+        format_set_parser.add_argument('--no-max-size', action='store_true', help='Remove the maximum deck size')
+        format_set_parser.add_argument('--max-copies', type=int, help='Copies allowed of each card')
+        format_set_parser.add_argument('--sets', help='Comma-separated legal sets')
+        format_set_parser.add_argument('--all-sets', action='store_true', help='Make every set legal')
+        for action, action_help in (('ban', 'Ban cards'), ('restrict', 'Limit cards to one copy'),
+                                    ('unlimit', 'Exempt cards from the copy limit (basic lands)'),
+                                    ('unban', 'Take cards off every list of the format')):
+            card_list_parser = format_subparsers.add_parser(action, help=action_help)
+            card_list_parser.add_argument('name', help='Format name')
+            card_list_parser.add_argument('cards', nargs='+', help='Card IDs or exact card names')
+        format_check_parser = format_subparsers.add_parser('check', help='Validate one deck or re-check stored decks')
+        format_check_parser.add_argument('--deck-id', help='Validate this deck')
+        format_check_parser.add_argument('--format', help='Only re-check decks of this format')
+        format_check_parser.add_argument('--limit', type=int, default=20, help='Illegal decks to list')
+        
+        # Meta-game rollup commands
+        meta_parser = subparsers.add_parser('meta', help='Archetypes, card inclusion and win rates per format')
+        meta_subparsers = meta_parser.add_subparsers(dest='meta_action')
+        refresh_parser = meta_subparsers.add_parser('refresh', help='Update the meta-game rollups')
+        refresh_parser.add_argument('--full', action='store_true', help='Re-cluster archetypes from scratch')
+        refresh_parser.add_argument('--format', help='Only refresh this format')
+        refresh_parser.add_argument('--every', type=float, help='Keep refreshing every N seconds')
+        meta_show_parser = meta_subparsers.add_parser('show', help='Show the meta of a format (all formats if omitted)')
+        meta_show_parser.add_argument('--format', help='Deck format')
+        meta_show_parser.add_argument('--top', type=int, default=10, help='Most included cards to list')
         
-        args = parser.parse_args()
+        # Workspace administration commands
+        workspace_parser = subparsers.add_parser('workspace', help='Per-user/team workspace databases')
+        workspace_subparsers = workspace_parser.add_subparsers(dest='workspace_action')
+        workspace_subparsers.add_parser('list', help='List workspaces')
+        create_workspace_parser = workspace_subparsers.add_parser('create', help='Create a workspace')
+        create_workspace_parser.add_argument('name', help='Workspace name')
+        workspace_stats_parser = workspace_subparsers.add_parser('stats', help='Decks, games and collection per workspace')
+        workspace_stats_parser.add_argument('--jobs', type=int, help='Workspaces queried in parallel')
         
+        # Database maintenance commands
+        maintenance_parser = subparsers.add_parser('maintenance', help='Backups, compaction, checks and archiving')
+        maintenance_subparsers = maintenance_parser.add_subparsers(dest='maintenance_action')
+        maintenance_subparsers.add_parser('status', help='Size, free pages and last maintenance runs')
+        backup_parser = maintenance_subparsers.add_parser('backup', help='Online backup of the database')
+        backup_parser.add_argument('destination', help='Backup file or directory')
+        backup_parser.add_argument('--pages', type=int, default=1024, help='Pages copied per step')
+        vacuum_parser = maintenance_subparsers.add_parser('vacuum', help='Return free pages to the file system')
+        vacuum_parser.add_argument('--pages', type=int, help='Free at most this many pages')
+        vacuum_parser.add_argument('--full', action='store_true',
+                                   help='Rewrite the file and enable incremental vacuum (blocks writers)')
+        maintenance_subparsers.add_parser('wal', help='Switch to write-ahead logging so backups never block writers')
+        analyze_parser = maintenance_subparsers.add_parser('analyze', help='Refresh query planner statistics')
+        analyze_parser.add_argument('--full', action='store_true', help='Run a complete ANALYZE')
+        check_parser = maintenance_subparsers.add_parser('check', help='Integrity and foreign key checks')
+        check_parser.add_argument('--quick', action='store_true', help='Run the faster quick_check')
+        archive_parser = maintenance_subparsers.add_parser('archive', help='Move old game results to an archive database')
+        archive_parser.add_argument('--archive', required=True, help='Archive database file')
+        archive_when = archive_parser.add_mutually_exclusive_group(required=True)
+        archive_when.add_argument('--before', help='Archive games played before this date (YYYY-MM-DD)')
+        archive_when.add_argument('--keep-days', type=int, help='Archive games older than this many days')
+        run_parser = maintenance_subparsers.add_parser('run', help='Run the maintenance tasks that are due')
+        run_parser.add_argument('--backup-dir', help='Directory for scheduled backups')
+        run_parser.add_argument('--archive', help='Archive database for scheduled archiving')
+        run_parser.add_argument('--keep-days', type=int, help='Days of game results kept when archiving')
+        run_parser.add_argument('--force', action='store_true', help='Run every task now')
+        run_parser.add_argument('--every', type=float, help='Keep checking for due tasks every N seconds')
+        
+        # Schema migrations
+        migrate_parser = subparsers.add_parser('migrate', help='Upgrade the database schema (run once per deploy)')
+        migrate_parser.add_argument('--status', action='store_true', help='Show the schema version and pending migrations')
+        migrate_parser.add_argument('--to', type=int, help='Stop at this schema version')
+        migrate_parser.add_argument('--backup', help='Back up to this file or directory first when migrations are pending')
+        migrate_parser.add_argument('--chunk', type=int, default=5000, help='Rows updated per backfill transaction')
+        migrate_parser.add_argument('--no-backfill', action='store_true',
+                                    help='Only apply schema changes; a later run finishes the backfills')
+        migrate_parser.add_argument('--workspaces', action='store_true',
+                                    help='Also migrate every workspace database')
+        
+        # Shell and batch modes
+        subparsers.add_parser('shell', help='Interactive shell running card/deck/game/tournament commands')
+        batch_parser = subparsers.add_parser('batch', help='Run card/deck/game/tournament commands from a file in one transaction')
+        batch_parser.add_argument('file', help="Command file, one command per line ('-' for stdin)")
+        batch_parser.add_argument('--dry-run', action='store_true', help='Roll back instead of committing')
+        
+        # Synthetic data command
+        generate_parser = subparsers.add_parser('generate', help='Generate synthetic data for load testing')
+        generate_parser.add_argument('--cards', type=int, default=10000, help='Number of cards')
+        generate_parser.add_argument('--decks', type=int, default=1000, help='Number of decks')
+        generate_parser.add_argument('--games', type=int, default=100000, help='Number of games')
+        generate_parser.add_argument('--seed', type=int, default=42, help='Random seed')
+        
+        # Benchmark command
+        bench_parser = subparsers.add_parser('bench', help='Run performance benchmarks')
+        bench_parser.add_argument('--cards', type=int, default=10000, help='Synthetic catalog size')
+        bench_parser.add_argument('--decks', type=int, default=200, help='Synthetic deck count')
+        bench_parser.add_argument('--games', type=int, default=20000, help='Synthetic game count')
+        bench_parser.add_argument('--seed', type=int, default=42, help='Random seed')
+        bench_parser.add_argument('--iterations', type=int, help='Override iterations per benchmark')
+        bench_parser.add_argument('--only', help='Comma-separated benchmarks to run')
+        bench_parser.add_argument('--output', help='Write results to this JSON file')
+        bench_parser.add_argument('--compare', help='Baseline results JSON to compare against')
+        bench_parser.add_argument('--threshold', type=float, default=0.10,
+                                  help='Relative slowdown reported as a regression')
+        
+        return parser
+    
+    def run(self, argv: Optional[List[str]] = None):
+        """Main CLI entry point"""
+        parser = self.build_parser()
+        args = parser.parse_args(argv)
+        # Keep console logging out of archives streamed to stdout
+        stream = sys.stderr if getattr(args, 'output', None) == '-' else None
+        configure_logging(level=args.log_level, log_file=args.log_file, json_format=args.log_json,
+                          stream=stream)
+        if args.db:
+            self.db_path = args.db
+        if args.workspace_root:
+            self.workspace_root = args.workspace_root
+        
+        from migrations import SchemaOutdatedError
+        try:
+            if args.workspace and args.command != 'workspace':
+                if not self.use_workspace(args.workspace):
+                    sys.exit(1)
+                try:
+                    self.dispatch(args, parser)
+                finally:
+                    self.close_session()
+                return
+            
+            self.dispatch(args, parser)
+        except SchemaOutdatedError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+    
+    def tenant_router(self, **options):
+        from tenancy import TenantRouter
+        return TenantRouter(self.workspace_root, self.db_path, **options)
+    
+    def use_workspace(self, name: str) -> bool:
+        """Point every component at a workspace database, with db_path as the catalog"""
+        router = self.tenant_router()
+        try:
+            exists = router.exists(name)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return False
+        if not exists:
+            print(f"❌ Workspace not found: {name} (create it with 'workspace create {name}')")
+            return False
+        self.catalog_path = self.db_path
+        self.db_path = router.workspace_path(name)
+        self.open_session()
+        return True
+    
+    def dispatch(self, args, parser: argparse.ArgumentParser):
+        """Run the command selected by parsed arguments"""
         if args.command == 'card':
             self.handle_card_command(args)
         elif args.command == 'deck':
             self.handle_deck_command(args)
         elif args.command == 'game':
             self.handle_game_command(args)
+        elif args.command == 'tournament':
+            self.handle_tournament_command(args)
+        elif args.command == 'snapshot':
+            self.handle_snapshot_command(args)
+        elif args.command == 'simulate':
+            self.handle_simulate_command(args)
+        elif args.command == 'format':
+            self.handle_format_command(args)
+        elif args.command == 'maintenance':
+            self.handle_maintenance_command(args)
+        elif args.command == 'migrate':
+            self.handle_migrate_command(args)
+        elif args.command == 'meta':
+            self.handle_meta_command(args)
+        elif args.command == 'workspace':
+            self.handle_workspace_command(args)
         elif args.command == 'demo':
             self.run_demo()
+        elif args.command == 'generate':
+            self.run_generate(args)
+        elif args.command == 'bench':
+            self.run_bench(args)
+        elif args.command == 'shell':
+            self.run_shell()
+        elif args.command == 'batch':
+            if not self.run_batch(args.file, dry_run=args.dry_run):
+                sys.exit(1)
         else:
             parser.print_help()
     
+    def execute_line(self, parser: argparse.ArgumentParser, line: str) -> bool:
+        """Parse and run one shell/batch command line"""
+        import shlex
+        
+        try:
+            args = parser.parse_args(shlex.split(line))
+        except ValueError as e:
+            print(f"❌ {e}")
+            return False
+        except SystemExit:
+            # argparse already printed the usage error (or --help)
+            return False
+        
+        if args.command not in self.SESSION_COMMANDS:
+            print(f"❌ Only {', '.join(self.SESSION_COMMANDS)} commands are available here")
+            return False
+        
+        self.dispatch(args, parser)
+        return True
+    
+    def run_shell(self):
+        """Interactive prompt that runs many commands over one connection"""
+        try:
+            import readline  # noqa: F401 - line editing and history for input()
+        except ImportError:
+            pass
+        
+        parser = self.build_parser()
+        self.open_session()
+        print("🃏 DeckWizard shell - enter card/deck/game/tournament commands, 'help' for usage, 'exit' to quit")
+        try:
+            while True:
+                try:
+                    line = input('deckwizard> ').strip()
+                except KeyboardInterrupt:
+                    print()
+                    continue
+                except EOFError:
+                    print()
+                    break
+                
+                if not line or line.startswith('#'):
+                    continue
+                if line in ('exit', 'quit'):
+                    break
+                if line == 'help':
+                    parser.print_help()
+                    continue
+                self.execute_line(parser, line)
+        finally:
+            self.close_session()
+    
+    def run_batch(self, path: str, dry_run: bool = False) -> bool:
+        """Run a command file inside a single transaction.
+        
+        Blank lines and '#' comments are skipped. A line that fails to parse
+        aborts the batch and rolls everything back; operations that fail at
+        the storage level are undone individually and reported like on the
+        normal CLI.
+        """
+        parser = self.build_parser()
+        handle = sys.stdin if path == '-' else open(path)
+        session = self.open_session()
+        session.begin()
+        executed = 0
+        try:
+            for line_number, line in enumerate(handle, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                if not self.execute_line(parser, line):
+                    session.rollback()
+                    print(f"❌ Batch aborted at line {line_number}, nothing was committed: {line}")
+                    return False
+                executed += 1
+            
+            if dry_run:
+                session.rollback()
+                print(f"↩️  Dry run: {executed} commands executed and rolled back")
+            else:
+                session.commit()
+                print(f"✅ Batch committed: {executed} commands")
+            return True
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+            self.close_session()
+    
     def handle_card_command(self, args):
         """Handle card-related commands"""
         if args.card_action == 'add':
@@ -605,6 +1555,7 @@ class DeckWizardCLI:
                 print(f"Mana curve: {analysis['mana_curve']}")
                 print(f"Card types: {analysis['card_types']}")
                 print(f"Rarities: {analysis['rarities']}")
+                print(f"Legal in {deck.format}: {'✅' if analysis['legal'] else '❌'}")
                 
                 if analysis['recommendations']:
                     print("\n💡 Recommendations:")
@@ -612,6 +1563,91 @@ class DeckWizardCLI:
                         print(f"  • {rec}")
             else:
                 print(f"❌ Deck not found: {args.id}")
+        
+        elif args.deck_action == 'export':
+            self.run_deck_export(args)
+        
+        elif args.deck_action == 'import':
+            self.run_deck_import(args)
+        
+        elif args.deck_action == 'diff':
+            try:
+                diff = self.deck_manager.diff_decks(args.source, args.target)
+            except (LookupError, ValueError) as e:
+                print(f"❌ {e}")
+                return
+            describe = lambda side: side['deck_id'] + (f"@{side['version']}" if side['version'] else '')
+            print(f"\n🔀 {describe(diff['from'])} ({diff['from']['total_cards']} cards) -> "
+                  f"{describe(diff['to'])} ({diff['to']['total_cards']} cards): "
+                  f"+{diff['added']} / -{diff['removed']}")
+            for change in diff['changes']:
+                print(f"  {change['change']:+3d}  {change['name']:<40} {change['from']} -> {change['to']}")
+            if not diff['changes']:
+                print("  No differences")
+        
+        elif args.deck_action == 'history':
+            history = self.deck_manager.revision_history(args.id)
+            if not history:
+                print(f"❌ No revisions logged for deck: {args.id}")
+                return
+            print(f"\n📜 Revisions of deck {args.id}:")
+            for entry in history:
+                delta = ', '.join(f"{change:+d} {card_id}" for card_id, change in sorted(entry['delta'].items()))
+                record = (f"{entry['win_rate']:6.1%} over {entry['games']:>4} games" if entry['games']
+                          else "      no games")
+                trend = f" ({entry['win_rate_change']:+.1%})" if entry['win_rate_change'] is not None else ''
+                print(f"  v{entry['version']:<4} {entry['created_date'][:16]}  {record}{trend}  "
+                      f"{delta[:60] + ('...' if len(delta) > 60 else '')}")
+    
+    def run_deck_export(self, args):
+        """Stream decks into an archive file"""
+        from deck_io import DeckExporter
+        
+        archive = args.archive or ('ndjson' if args.output.endswith(('.ndjson', '.jsonl')) else 'zip')
+        exporter = DeckExporter(self.db_path)
+        exporter.session = self.session
+        ids = args.ids.split(',') if args.ids else None
+        if args.output == '-':
+            exporter.export(sys.stdout.buffer, archive, args.format, ids, args.deck_format)
+            sys.stdout.flush()
+            return
+        
+        with open(args.output, 'wb') as output:
+            written = exporter.export(output, archive, args.format, ids, args.deck_format)
+        print(f"✅ Exported decks to {args.output} ({written / 1024:.1f} KiB)")
+    
+    def run_deck_import(self, args):
+        """Bulk-create decks from deck list files"""
+        import itertools
+        from deck_io import DeckImporter, read_deck_lists
+        
+        lists = itertools.chain.from_iterable(read_deck_lists(path, args.format) for path in args.paths)
+        if args.name:
+            lists = ({**item, 'name': args.name} for item in lists)
+        importer = DeckImporter(self.db_path)
+        importer.session = self.session
+        start = time.perf_counter()
+        try:
+            reports = importer.import_lists(lists, dry_run=args.dry_run)
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}")
+            return
+        elapsed = time.perf_counter() - start
+        
+        for report in reports:
+            if not report['id']:
+                print(f"❌ {report['name']}: {'; '.join(report['errors'])}")
+                continue
+            if report['unresolved']:
+                print(f"⚠️  {report['name']}: unresolved cards: {', '.join(report['unresolved'])}")
+            for typed, matched in report['corrected'].items():
+                print(f"🔤 {report['name']}: '{typed}' -> '{matched}'")
+        
+        imported = sum(1 for report in reports if report['id'])
+        verb = 'Resolved' if args.dry_run else 'Imported'
+        print(f"✅ {verb} {imported} of {len(reports)} deck lists in {elapsed:.2f}s")
+        if len(reports) == 1 and imported and not args.dry_run:
+            print(f"   Deck ID: {reports[0]['id']}")
     
     def handle_game_command(self, args):
         """Handle game-related commands"""
@@ -635,8 +1671,444 @@ class DeckWizardCLI:
             else:
                 print(f"❌ No statistics found for deck: {args.deck_id}")
     
+    def handle_tournament_command(self, args):
+        """Handle tournament-related commands"""
+        try:
+            if args.tournament_action == 'create':
+                participants = [p.strip() for p in args.participants.split(',') if p.strip()]
+                tournament = self.tournament_manager.create_tournament(
+                    args.name, args.type, participants, rounds=args.rounds)
+                print(f"✅ Created tournament: {tournament['name']} (ID: {tournament['id']})")
+            
+            elif args.tournament_action == 'pair':
+                matches = self.tournament_manager.pair_next_round(args.id)
+                print(f"🎲 Round {matches[0]['round'] if matches else '?'} pairings:")
+                for match in matches:
+                    print(f"  {match['code']}: {match['player1']} vs {match['player2'] or 'BYE'}")
+            
+            elif args.tournament_action == 'report':
+                match = self.tournament_manager.report_result(args.id, args.match, args.result, args.length)
+                print(f"✅ {match['code']}: {match['winner'] or 'draw'}")
+                tournament = self.tournament_manager.get_tournament(args.id)
+                if tournament['status'] == 'complete':
+                    print(f"🏆 Tournament complete: {tournament['name']}")
+            
+            elif args.tournament_action == 'standings':
+                print("🏆 Standings:")
+                for row in self.tournament_manager.standings(args.id):
+                    print(f"  {row['rank']:>3}. {row['player']:<30} {row['points']:>3} pts  "
+                          f"{row['wins']}-{row['losses']}-{row['draws']}  "
+                          f"OMW {row['omw']:.2%}  OOMW {row['oomw']:.2%}")
+            
+            elif args.tournament_action == 'simulate':
+                self.run_tournament_simulation(args)
+        except ValueError as e:
+            print(f"❌ {e}")
+    
+    def run_tournament_simulation(self, args):
+        """Monte Carlo projection of a bracket from recorded matchups"""
+        from tournament_sim import TournamentSimulator
+        
+        participants = [p.strip() for p in args.participants.split(',') if p.strip()]
+        top_n = [int(size) for size in args.top.split(',') if size.strip()]
+        try:
+            result = TournamentSimulator(self.db_path).simulate(
+                args.type, participants, runs=args.runs, top_n=top_n, rounds=args.rounds,
+                tolerance=args.tolerance, workers=args.workers, seed=args.seed,
+                include_simulated=args.include_simulated)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return
+        
+        status = 'converged' if result['converged'] else 'run limit reached'
+        print(f"🎲 {result['runs']} simulated events in {result['elapsed_s']}s "
+              f"({status}, ±{result['max_ci_half_width']:.2%})")
+        for row in result['participants']:
+            cuts = '  '.join(f"top {size}: {row[f'top_{size}']:6.2%}" for size in top_n)
+            print(f"  {row['seed']:>3}. {row['player']:<30} win: {row['win_probability']:6.2%}  {cuts}")
+    
+    def handle_simulate_command(self, args):
+        """Handle game simulator commands"""
+        from game_sim import GameSimulator
+        
+        simulator = GameSimulator(self.db_path, deck_manager=self.deck_manager, game_tracker=self.game_tracker)
+        opponents = [o.strip() for o in (getattr(args, 'opponents', None) or '').split(',') if o.strip()]
+        try:
+            if args.simulate_action in ('matchup', 'gauntlet'):
+                if args.simulate_action == 'matchup':
+                    opponents = [args.opponent]
+                result = simulator.gauntlet(args.deck_id, opponents, args.games, workers=args.workers,
+                                            seed=args.seed, record=not args.no_record)
+                print(f"🤖 {result['games']} simulated games in {result['elapsed_s']}s "
+                      f"({result['games_per_minute']} games/min)")
+                for row in result['opponents']:
+                    print(f"  vs {row['opponent_id']:<30} {row['wins']}-{row['losses']}-{row['draws']} "
+                          f"({row['win_rate']:.1%}, {row['average_length']:.1f} rounds)")
+                print(f"📊 Overall win rate: {result['win_rate']:.1%}"
+                      + (f", {result['recorded']} games recorded" if result['recorded'] else ''))
+            
+            elif args.simulate_action == 'optimize':
+                result = simulator.evaluate_swaps(args.deck_id, opponents, args.games,
+                                                  workers=args.workers, seed=args.seed)
+                print(f"🤖 Baseline simulated win rate {result['baseline_win_rate']:.1%} "
+                      f"over {result['games_per_variant']} games ({result['elapsed_s']}s)")
+                for swap in result['swaps']:
+                    marker = '✅' if swap['significant'] else '  '
+                    print(f"{marker} -{swap['remove_name']:<28} +{swap['add_name']:<28} "
+                          f"{swap['win_rate']:.1%} ({swap['win_rate_change']:+.1%})")
+            
+            else:
+                print("❌ Choose a simulate action: matchup, gauntlet or optimize")
+        except (LookupError, ValueError) as e:
+            print(f"❌ {e}")
+    
+    def handle_format_command(self, args):
+        """Handle format rules commands"""
+        registry = self.deck_manager.format_registry
+        try:
+            if args.format_action == 'list':
+                for rules in registry.list_formats():
+                    size = (f"{rules.min_deck_size}" if rules.max_deck_size == rules.min_deck_size
+                            else f"{rules.min_deck_size}-{rules.max_deck_size or '∞'}")
+                    sets = ', '.join(rules.legal_sets) if rules.legal_sets is not None else 'all sets'
+                    print(f"  {rules.name:<15} {size:>8} cards  {rules.max_copies} copies  "
+                          f"{len(rules.banned)} banned  {len(rules.restricted)} restricted  ({sets})")
+            
+            elif args.format_action == 'show':
+                rules = registry.get_rules(args.name)
+                print(f"📜 {rules.name} (revision {rules.revision})")
+                print(f"Deck size: {rules.min_deck_size}-{rules.max_deck_size or 'no limit'}, "
+                      f"up to {rules.max_copies} copies of a card")
+                print(f"Legal sets: {', '.join(rules.legal_sets) if rules.legal_sets is not None else 'all'}")
+                names = self.card_db.get_card_names(rules.banned | rules.restricted | rules.unlimited)
+                for status in ('banned', 'restricted', 'unlimited'):
+                    card_ids = sorted(getattr(rules, status))
+                    if card_ids:
+                        print(f"{status.capitalize()}: {', '.join(names.get(c, c) for c in card_ids)}")
+            
+            elif args.format_action == 'set':
+                legal_sets = [s.strip() for s in args.sets.split(',') if s.strip()] if args.sets else None
+                result = registry.update_rules(args.name, min_deck_size=args.min_size, max_deck_size=args.max_size,
+                                               max_copies=args.max_copies, legal_sets=legal_sets,
+                                               all_sets=args.all_sets, no_max_size=args.no_max_size)
+                print(f"✅ Updated {args.name} rules")
+                self._print_revalidation(result)
+            
+            elif args.format_action in ('ban', 'restrict', 'unlimit', 'unban'):
+                status = {'ban': 'banned', 'restrict': 'restricted', 'unlimit': 'unlimited'}.get(args.format_action)
+                result = registry.set_card_status(args.name, args.cards, status)
+                print(f"✅ {args.format_action.capitalize()}: {len(args.cards)} cards in {args.name}")
+                self._print_revalidation(result)
+            
+            elif args.format_action == 'check':
+                if args.deck_id:
+                    deck = self.deck_manager.load_deck(args.deck_id)
+                    if not deck:
+                        print(f"❌ Deck not found: {args.deck_id}")
+                        return
+                    result = registry.validate(deck)
+                    print(f"{'✅' if result['legal'] else '❌'} {deck.name} is "
+                          f"{'legal' if result['legal'] else 'not legal'} in {deck.format}")
+                    for problem in result['problems']:
+                        print(f"  • {problem['message']}")
+                    return
+                self._print_revalidation(registry.revalidate(args.format))
+                for deck in registry.illegal_decks(args.format, limit=args.limit):
+                    print(f"  ❌ {deck['deck_id']} {deck['name']} ({deck['format']}): "
+                          f"{', '.join(sorted({p['code'] for p in deck['problems']}))}")
+            
+            else:
+                print("❌ Choose a format action: list, show, set, ban, restrict, unlimit, unban or check")
+        except ValueError as e:
+            print(f"❌ {e}")
+    
+    @staticmethod
+    def _print_revalidation(result: Dict):
+        print(f"🔎 Checked {result['checked']} decks in {result['elapsed_s']}s: "
+              f"{result['legal']} legal, {result['illegal']} not legal"
+              + (f", {len(result['newly_illegal'])} newly illegal" if result['newly_illegal'] else '')
+              + (f", {len(result['newly_legal'])} newly legal" if result['newly_legal'] else ''))
+    
+    def handle_maintenance_command(self, args):
+        """Handle database maintenance commands"""
+        from maintenance import Maintenance
+        
+        maintenance = Maintenance(self.db_path)
+        try:
+            if args.maintenance_action == 'status':
+                status = maintenance.status()
+                print(f"🗄️  {status['path']}: {status['size_bytes'] / 1048576:.1f} MiB, "
+                      f"schema version {status['schema_version']}, "
+                      f"{status['free_pages']} free pages ({status['free_ratio']:.1%}), "
+                      f"auto_vacuum {status['auto_vacuum']}, journal {status['journal_mode']}")
+                print(f"🎮 {status['games']} game results"
+                      + (f" since {status['oldest_game'][:10]}" if status['oldest_game'] else ''))
+                for table, size in status['largest_tables'].items():
+                    print(f"  {table:<36} {size / 1048576:8.1f} MiB")
+                for task, run in sorted(status['last_runs'].items()):
+                    print(f"  {'✅' if run['ok'] else '❌'} {task:<16} last run {run['started'][:19]} "
+                          f"({run['duration_s']}s)")
+                if status['due']:
+                    print(f"⏰ Due: {', '.join(status['due'])}")
+            
+            elif args.maintenance_action == 'backup':
+                result = maintenance.backup(args.destination, pages_per_step=args.pages)
+                print(f"✅ Backed up to {result['destination']} ({result['size_bytes'] / 1048576:.1f} MiB)")
+                if result['mode'] == 'single step':
+                    print(f"⚠️  Writers restarted the copy {result['restarts']} times; finished in one step. "
+                          "'maintenance wal' avoids this")
+            
+            elif args.maintenance_action == 'wal':
+                print(f"✅ Journal mode is now {maintenance.enable_wal()}")
+            
+            elif args.maintenance_action == 'vacuum':
+                result = maintenance.vacuum(max_pages=args.pages, full=args.full)
+                if result.get('error'):
+                    print(f"❌ {result['error']}")
+                else:
+                    print(f"✅ Freed {result['freed_pages']} pages ({result['freed_bytes'] / 1048576:.1f} MiB)")
+            
+            elif args.maintenance_action == 'analyze':
+                result = maintenance.analyze(full=args.full)
+                print(f"✅ Planner statistics updated ({result['tables_analyzed']} tables analyzed)")
+            
+            elif args.maintenance_action == 'check':
+                result = maintenance.integrity_check(quick=args.quick)
+                print(f"{'✅ Database is intact' if result['ok'] else '❌ Database is damaged'}")
+                for error in result['errors']:
+                    print(f"  • {error}")
+                if result['foreign_key_violations']:
+                    print(f"⚠️  {len(result['foreign_key_violations'])} rows reference missing parents")
+            
+            elif args.maintenance_action == 'archive':
+                before = args.before or (datetime.now() - timedelta(days=args.keep_days)).date().isoformat()
+                result = maintenance.archive_games(args.archive, before)
+                print(f"📦 Archived {result['moved']} games played before {before} to {result['archive']} "
+                      f"({result['remaining']} remain)")
+            
+            elif args.maintenance_action == 'run':
+                try:
+                    while True:
+                        results = maintenance.run_due(backup_dir=args.backup_dir, archive_path=args.archive,
+                                                      keep_days=args.keep_days, force=args.force)
+                        for task, result in results.items():
+                            print(f"{'✅' if result.get('ok', True) else '❌'} {task} ({result['elapsed_s']}s)"
+                                  + (f": {result['error']}" if result.get('error') else ''))
+                        if not args.every:
+                            if not results:
+                                print("✅ Nothing due")
+                            break
+                        time.sleep(args.every)
+                except KeyboardInterrupt:
+                    pass
+            
+            else:
+                print("❌ Choose a maintenance action: status, backup, wal, vacuum, analyze, check, archive or run")
+        except (ValueError, RuntimeError, sqlite3.Error) as e:
+            print(f"❌ {e}")
+    
+    def handle_migrate_command(self, args):
+        """Handle schema migration commands"""
+        try:
+            self._migrate_file(self.db_path, args)
+            if args.workspaces:
+                # The router opens the catalog, so it goes first
+                router = self.tenant_router()
+                try:
+                    for name in router.list_workspaces():
+                        self._migrate_file(router.workspace_path(name), args)
+                finally:
+                    router.close()
+        except (ValueError, RuntimeError, OSError, sqlite3.Error) as e:
+            print(f"❌ {e}")
+    
+    def _migrate_file(self, path: str, args):
+        from migrations import SCHEMA_VERSION, migrate, migration_status
+        
+        if args.status:
+            status = migration_status(path)
+            print(f"🗄️  {path}: schema version {status['version']} of {SCHEMA_VERSION}")
+            for migration in status['pending']:
+                print(f"  ⏳ {migration['version']}: {migration['description']}")
+            for backfill in status['backfills']:
+                print(f"  🔄 Backfill for version {backfill['version']} on {backfill['table']}: "
+                      f"{backfill['rows_updated']} rows, up to rowid {backfill['last_rowid']}")
+            return
+        
+        if args.backup and migration_status(path)['pending']:
+            from maintenance import Maintenance
+            backup = Maintenance(path).backup(args.backup)
+            print(f"💾 Backed up {path} to {backup['destination']}")
+        
+        def progress(version, rows, rowid):
+            print(f"  🔄 Version {version} backfill: {rows} rows, up to rowid {rowid}", end='\r')
+        
+        # Schema changes first, then the backfills that can run alongside the app
+        applied = migrate(path, target=args.to, backfill=False)['applied']
+        for migration in applied:
+            print(f"✅ {path}: {migration['version']} {migration['description']} ({migration['elapsed_s']}s)")
+        result = migrate(path, target=args.to, chunk_rows=args.chunk, backfill=not args.no_backfill,
+                         progress=progress)
+        for version, rows in result['backfilled'].items():
+            print(f"✅ {path}: backfilled {rows} rows for version {version}".ljust(60))
+        if result['pending_backfills']:
+            print(f"⏳ {path}: backfills still pending for versions "
+                  f"{', '.join(map(str, result['pending_backfills']))}")
+        if not applied and not result['backfilled']:
+            print(f"✅ {path} is at schema version {result['version']}")
+    
+    def handle_meta_command(self, args):
+        """Handle meta-game rollup commands"""
+        from metagame import MetaRollup
+        
+        rollup = MetaRollup(self.db_path, card_db=self.card_db)
+        rollup.session = self.session
+        if args.meta_action == 'refresh':
+            formats = [args.format] if args.format else None
+            try:
+                while True:
+                    result = rollup.refresh(full=args.full, formats=formats)
+                    print(f"📈 Refreshed {len(result['formats'])} formats in {result['elapsed_s']}s: "
+                          f"{result['decks_changed']} decks changed, {result['decks_removed']} removed, "
+                          f"{result['games_added']} new games"
+                          + (f", re-clustered {', '.join(result['reclustered'])}" if result['reclustered'] else ''))
+                    if not args.every:
+                        break
+                    time.sleep(args.every)
+            except KeyboardInterrupt:
+                pass
+        
+        elif args.meta_action == 'show':
+            if not args.format:
+                formats = rollup.formats()
+                if not formats:
+                    print("❌ No meta rollups yet, run 'meta refresh' first")
+                for row in formats:
+                    print(f"  {row['format']:<15} {row['decks']:>6} decks  {row['archetypes']} archetypes  "
+                          f"(updated {row['computed_at'][:19]})")
+                return
+            report = rollup.format_report(args.format, top=args.top)
+            if report is None:
+                print(f"❌ No meta rollup for format {args.format}, run 'meta refresh' first")
+                return
+            print(f"📈 {report['format']} meta: {report['decks']} decks (updated {report['computed_at'][:19]})")
+            for archetype in report['archetypes']:
+                win_rate = f"{archetype['win_rate']:.1%}" if archetype['win_rate'] is not None else 'n/a'
+                print(f"  {archetype['name']:<40} {archetype['share']:6.1%} of decks  "
+                      f"{archetype['games']:>7} games  win rate {win_rate}")
+            print("🃏 Most included cards:")
+            for card in report['cards']:
+                print(f"  {card['name']:<30} {card['inclusion_rate']:6.1%}  avg {card['average_copies']:.1f} copies")
+        
+        else:
+            print("❌ Choose a meta action: refresh or show")
+    
+    def handle_snapshot_command(self, args):
+        """Handle columnar snapshot commands"""
+        from snapshot import Snapshot, SnapshotWriter, snapshot_size
+        
+        start = time.perf_counter()
+        try:
+            if args.snapshot_action == 'create':
+                manifest = SnapshotWriter(self.db_path).create(args.path, args.format)
+                rows = ', '.join(f"{described['rows']} {table}" for table, described in manifest['tables'].items())
+                print(f"✅ Wrote {args.format} snapshot to {args.path}: {rows} "
+                      f"({snapshot_size(args.path) / 1024 / 1024:.1f} MiB, {time.perf_counter() - start:.2f}s)")
+            
+            elif args.snapshot_action == 'append':
+                added = SnapshotWriter(self.db_path).append(args.path)
+                print(f"✅ Appended {added} new games to {args.path} ({time.perf_counter() - start:.2f}s)")
+            
+            elif args.snapshot_action == 'stats':
+                snapshot = Snapshot(args.path)
+                if args.deck_id:
+                    matchups = snapshot.matchups(args.deck_id)
+                    print(f"\n⚔️  Matchups for deck {args.deck_id} ({len(matchups)} opponents):")
+                    for opponent, record in sorted(matchups.items(), key=lambda item: -item[1]['games']):
+                        print(f"  {opponent:<40} {record['wins']}-{record['losses']}-{record['draws']} "
+                              f"({record['win_rate']:.1%})")
+                else:
+                    records = snapshot.deck_records()
+                    summary = snapshot.summary()
+                    print(f"\n📊 {summary['rows']['games']} games across {len(records)} decks "
+                          f"(snapshot updated {summary['updated']})")
+                    ranked = sorted(records.items(), key=lambda item: -item[1]['win_rate'])
+                    for deck_id, record in ranked[:args.top]:
+                        print(f"  {deck_id:<40} {record['win_rate']:6.1%} over {record['games']} games")
+            
+            else:
+                print("❌ Choose a snapshot action: create, append or stats")
+        except (OSError, RuntimeError, ValueError) as e:
+            print(f"❌ {e}")
+    
+    def handle_workspace_command(self, args):
+        """Handle workspace administration commands"""
+        router = self.tenant_router()
+        try:
+            if args.workspace_action == 'list':
+                names = router.list_workspaces()
+                print(f"\n🗂️  {len(names)} workspaces in {router.root}:")
+                for name in names:
+                    print(f"  {name}")
+            
+            elif args.workspace_action == 'create':
+                path = router.create(args.name)
+                print(f"✅ Created workspace {args.name} ({path})")
+            
+            elif args.workspace_action == 'stats':
+                start = time.perf_counter()
+                results, errors = router.fan_out(lambda workspace: workspace.summary(), max_workers=args.jobs)
+                print(f"\n📊 {len(results)} workspaces ({time.perf_counter() - start:.2f}s):")
+                for name, summary in sorted(results.items()):
+                    print(f"  {name:<24} {summary['decks']:>6} decks {summary['games']:>8} games "
+                          f"{summary['collection']:>6} owned  last game {summary['last_played'] or '-'}")
+                totals = {key: sum(summary[key] for summary in results.values())
+                          for key in ('decks', 'games', 'collection')}
+                print(f"  {'total':<24} {totals['decks']:>6} decks {totals['games']:>8} games "
+                      f"{totals['collection']:>6} owned")
+                for name, error in sorted(errors.items()):
+                    print(f"❌ {name}: {error}")
+            
+            else:
+                print("❌ Choose a workspace action: list, create or stats")
+        except (OSError, sqlite3.Error, ValueError) as e:
+            print(f"❌ {e}")
+        finally:
+            router.close()
+    
+    def run_generate(self, args):
+        """Bulk-generate synthetic cards, decks and games"""
+        from datagen import SyntheticDataGenerator
+        
+        print(f"🏭 Generating {args.cards} cards, {args.decks} decks and {args.games} games into {self.db_path}...")
+        try:
+            summary = SyntheticDataGenerator(self.db_path, seed=args.seed).generate(
+                args.cards, args.decks, args.games)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+        
+        for name in ('cards', 'decks', 'games'):
+            print(f"✅ {summary[name]} {name} in {summary[name + '_s']}s")
+    
+    def run_bench(self, args):
+        """Run the benchmark suite"""
+        from benchmark import run_benchmarks
+        
+        try:
+            run_benchmarks(
+                cards=args.cards, decks=args.decks, games=args.games, seed=args.seed,
+                iterations=args.iterations,
+                only=args.only.split(',') if args.only else None,
+                output=args.output, compare=args.compare, threshold=args.threshold
+            )
+        except ValueError as e:
+            print(f"❌ {e}")
+    
     def run_demo(self):
         """Run a demonstration with sample data"""
+        import random
+        
         print("🎮 Running DeckWizard Demo...")
         
         # Add sample cards
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+DeckWizard Event Stream
+In-process publish/subscribe for live dashboards: recorded games, deck
+statistic deltas and tournament bracket updates, delivered to clients as
+server-sent events through bounded per-client buffers
+"""
+
+import itertools
+import json
+import threading
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from deckwizard import logger
+
+# Events queued per client before the oldest are dropped
+SUBSCRIBER_BUFFER_SIZE = 256
+
+# Recent events kept for clients reconnecting with Last-Event-ID
+REPLAY_BUFFER_SIZE = 1024
+
+# Idle seconds between keep-alive comments on an open stream
+HEARTBEAT_SECONDS = 15.0
+
+# Client reconnect delay sent at the start of every stream
+RETRY_MS = 3000
+
+# (event id, topics, encoded SSE frame)
+Event = Tuple[int, frozenset, bytes]
+
+
+def encode_event(event_id: Optional[int], event_type: str, data: Dict) -> bytes:
+    """One server-sent event frame"""
+    lines = [] if event_id is None else [f"id: {event_id}"]
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return ('\n'.join(lines) + '\n\n').encode('utf-8')
+
+
+class Subscription:
+    """One client's view of the broker.
+
+    Events wait in a bounded buffer; when a slow client lets it fill up
+    the oldest events are dropped and counted, and the stream tells the
+    client to resync instead of letting the server queue grow.
+    """
+
+    __slots__ = ('topics', 'buffer', 'dropped', 'closed', '_condition')
+
+    def __init__(self, topics: Optional[Set[str]], buffer_size: int):
+        self.topics = frozenset(topics) if topics else None
+        self.buffer: deque = deque(maxlen=buffer_size)
+        self.dropped = 0
+        self.closed = False
+        self._condition = threading.Condition()
+
+    def wants(self, topics: frozenset) -> bool:
+        return self.topics is None or not self.topics.isdisjoint(topics)
+
+    def push(self, event: Event):
+        with self._condition:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.buffer.append(event)
+            self._condition.notify()
+
+    def next_batch(self, timeout: float) -> Tuple[List[Event], int]:
+        """Wait up to ``timeout`` seconds, then take every buffered event.
+
+        Returns the events and how many were dropped since the last batch.
+        """
+        with self._condition:
+            if not self.buffer and not self.closed:
+                self._condition.wait(timeout)
+            events = list(self.buffer)
+            self.buffer.clear()
+            dropped, self.dropped = self.dropped, 0
+        return events, dropped
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify()
+
+
+class EventBroker:
+    """Fans published events out to subscribed clients.
+
+    Each event is serialized once and shared by every buffer it lands in,
+    so publishing costs one JSON encode plus an append per interested
+    client. Topics such as ``deck:<id>`` and ``tournament:<id>`` let
+    clients receive only what they watch. The broker lives in one
+    process: events published by other processes (the CLI, other web
+    workers) are not seen.
+    """
+
+    def __init__(self, buffer_size: int = SUBSCRIBER_BUFFER_SIZE, replay_size: int = REPLAY_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self._lock = threading.Lock()
+        self._subscribers: Set[Subscription] = set()
+        self._history: deque = deque(maxlen=replay_size)
+        self._ids = itertools.count(1)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event_type: str, data: Dict, topics: Iterable[str] = ()) -> int:
+        """Send an event to every interested subscriber; returns its id"""
+        topics = frozenset(topics)
+        # Ids are assigned and delivered under one lock so every client sees them in order
+        with self._lock:
+            event_id = next(self._ids)
+            event = (event_id, topics, encode_event(event_id, event_type, data))
+            self._history.append(event)
+            for subscription in self._subscribers:
+                if subscription.wants(topics):
+                    subscription.push(event)
+        return event_id
+
+    def subscribe(self, topics: Optional[Set[str]] = None,
+                  last_event_id: Optional[int] = None) -> Subscription:
+        """Register a client, replaying events after ``last_event_id`` when given"""
+        subscription = Subscription(topics, self.buffer_size)
+        with self._lock:
+            if last_event_id is not None:
+                if self._history and self._history[0][0] > last_event_id + 1:
+                    # Part of what the client missed has left the replay buffer
+                    subscription.dropped += 1
+                for event in self._history:
+                    if event[0] > last_event_id and subscription.wants(event[1]):
+                        subscription.push(event)
+            self._subscribers.add(subscription)
+        logger.debug("Event stream subscribed (%d clients)", len(self._subscribers))
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscription.close()
+        with self._lock:
+            self._subscribers.discard(subscription)
+        logger.debug("Event stream closed (%d clients)", len(self._subscribers))
+
+    def stream(self, subscription: Subscription, heartbeat: float = HEARTBEAT_SECONDS) -> Iterator[bytes]:
+        """SSE byte stream for one subscription, unsubscribing when the client goes away"""
+        try:
+            yield f"retry: {RETRY_MS}\n\n".encode('ascii')
+            while not subscription.closed:
+                events, dropped = subscription.next_batch(heartbeat)
+                if dropped:
+                    yield encode_event(None, 'resync', {'dropped': dropped})
+                if events:
+                    yield b''.join(event[2] for event in events)
+                elif not dropped:
+                    yield b': keep-alive\n\n'
+        finally:
+            self.unsubscribe(subscription)
+
+
+def game_events(broker: EventBroker, game, deck_totals: Optional[Dict]):
+    """Publish a recorded game and the change it made to its deck's statistics"""
+    topics = [f"deck:{game.deck_id}"]
+    broker.publish('game', {
+        'id': game.id, 'deck_id': game.deck_id, 'opponent_deck': game.opponent_deck,
+        'result': game.result, 'game_length': game.game_length, 'date_played': game.date_played
+    }, topics)
+    if deck_totals is not None:
+        broker.publish('deck_stats', {
+            'deck_id': game.deck_id,
+            'delta': {'games': 1, 'wins': int(game.result == 'win'), 'losses': int(game.result == 'loss'),
+                      'draws': int(game.result == 'draw'), 'game_length': game.game_length},
+            **deck_totals
+        }, topics)
+
+
+def bracket_event(broker: EventBroker, tournament_id: str, action: str, matches: List[Dict]):
+    """Publish new or updated tournament matches"""
+    broker.publish('bracket', {'tournament_id': tournament_id, 'action': action, 'matches': matches},
+                   [f"tournament:{tournament_id}"])
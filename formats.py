@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+DeckWizard Format Rules
+Per-format legal sets, ban and restricted lists, copy limits and deck size
+bounds, with deck validation against indexes precomputed over the catalog
+"""
+
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from deckwizard import CardDatabase, Deck, SQLiteStore, logger
+
+# Card list statuses: banned cards can't be played, restricted cards are
+# limited to one copy and unlimited cards (basic lands) ignore copy limits
+CARD_STATUSES = ('banned', 'restricted', 'unlimited')
+
+# Seconds between full catalog size checks; the cheap highest-id check runs on every use
+CATALOG_RECHECK_S = 60
+
+# Card ids matched per SQL statement when looking for decks that contain them
+MATCH_CHUNK = 200
+
+
+@dataclass
+class FormatRules:
+    """Deck construction rules of one format"""
+    name: str
+    min_deck_size: int = 60
+    max_deck_size: Optional[int] = None
+    max_copies: int = 4
+    legal_sets: Optional[List[str]] = None  # None: every set is legal
+    banned: Set[str] = field(default_factory=set)
+    restricted: Set[str] = field(default_factory=set)
+    unlimited: Set[str] = field(default_factory=set)
+    revision: int = 0  # 0 until the rules are stored
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name, 'min_deck_size': self.min_deck_size, 'max_deck_size': self.max_deck_size,
+            'max_copies': self.max_copies, 'legal_sets': self.legal_sets,
+            'banned': sorted(self.banned), 'restricted': sorted(self.restricted),
+            'unlimited': sorted(self.unlimited), 'revision': self.revision
+        }
+
+
+DEFAULT_FORMATS = {
+    'Standard': FormatRules('Standard'),
+    'Modern': FormatRules('Modern'),
+    'Legacy': FormatRules('Legacy'),
+    'Vintage': FormatRules('Vintage'),
+    'Commander': FormatRules('Commander', min_deck_size=100, max_deck_size=100, max_copies=1),
+}
+
+
+def default_rules(name: str) -> FormatRules:
+    """Built-in rules of a format; unknown formats get the 30-60 card bounds"""
+    base = DEFAULT_FORMATS.get(name) or FormatRules(name, min_deck_size=30, max_deck_size=60)
+    return FormatRules(name, base.min_deck_size, base.max_deck_size, base.max_copies,
+                       list(base.legal_sets) if base.legal_sets is not None else None)
+
+
+class FormatIndex:
+    """A format's rules resolved against one catalog load.
+
+    ``legal`` holds the ids of every card printed in a legal set (the
+    catalog itself when all sets are legal), so checking a deck is a few
+    set operations on its card ids however large the catalog is.
+    """
+
+    __slots__ = ('rules', 'catalog', 'legal', 'banned', 'restricted', 'unlimited')
+
+    def __init__(self, rules: FormatRules, catalog: FrozenSet[str], legal: FrozenSet[str]):
+        self.rules = rules
+        self.catalog = catalog
+        self.legal = legal
+        self.banned = frozenset(rules.banned)
+        self.restricted = frozenset(rules.restricted)
+        self.unlimited = frozenset(rules.unlimited)
+
+    def check(self, cards: Dict[str, int]) -> List[Dict]:
+        """Rule violations of a card list (empty when the deck is legal)"""
+        rules = self.rules
+        problems = []
+        total = sum(cards.values())
+        if total < rules.min_deck_size:
+            problems.append({'code': 'too_few_cards', 'count': total, 'limit': rules.min_deck_size})
+        if rules.max_deck_size is not None and total > rules.max_deck_size:
+            problems.append({'code': 'too_many_cards', 'count': total, 'limit': rules.max_deck_size})
+
+        card_ids = cards.keys()
+        unknown = card_ids - self.catalog
+        banned = card_ids & self.banned
+        not_legal = (card_ids - self.legal) - unknown - banned
+        playable_copies = {card_id for card_id, quantity in cards.items() if quantity > 1} - banned - not_legal
+        restricted = playable_copies & self.restricted
+        over_limit = ({card_id for card_id, quantity in cards.items() if quantity > rules.max_copies}
+                      - self.unlimited - self.restricted - banned - not_legal - unknown)
+
+        for code, found, limit in (('unknown_card', unknown, None), ('banned', banned, 0),
+                                   ('not_legal', not_legal, 0), ('restricted', restricted, 1),
+                                   ('too_many_copies', over_limit, rules.max_copies)):
+            for card_id in sorted(found):
+                problem = {'code': code, 'card_id': card_id, 'count': cards[card_id]}
+                if limit is not None:
+                    problem['limit'] = limit
+                problems.append(problem)
+        return problems
+
+
+def describe_problem(problem: Dict, format_name: str, names: Optional[Dict[str, str]] = None) -> str:
+    """Readable message for a problem returned by FormatIndex.check"""
+    card = (names or {}).get(problem.get('card_id'), problem.get('card_id'))
+    code = problem['code']
+    if code == 'too_few_cards':
+        return f"Deck has {problem['count']} cards, {format_name} needs at least {problem['limit']}"
+    if code == 'too_many_cards':
+        return f"Deck has {problem['count']} cards, {format_name} allows at most {problem['limit']}"
+    if code == 'unknown_card':
+        return f"{card} is not in the card database"
+    if code == 'banned':
+        return f"{card} is banned in {format_name}"
+    if code == 'not_legal':
+        return f"{card} is not from a set legal in {format_name}"
+    if code == 'restricted':
+        return f"{card} is restricted in {format_name}: {problem['count']} copies, at most 1"
+    return f"{card}: {problem['count']} copies, {format_name} allows {problem['limit']}"
+
+
+class FormatRegistry(SQLiteStore):
+    """Stored format rules, their catalog indexes and deck legality.
+
+    Rules come from the format_rules and format_cards tables, falling back
+    to DEFAULT_FORMATS. Indexes are built once per rules revision and
+    catalog state: ids grouped by set are loaded once and a format's legal
+    ids are the union of its sets. Every rules change re-checks the stored
+    decks it can affect and records the outcome in deck_legality; after a
+    ban list change that is only the decks holding the changed cards.
+    """
+
+    def __init__(self, db_path: str = "deckwizard.db", card_db: Optional[CardDatabase] = None):
+        self.db_path = db_path
+        self.card_db = card_db or CardDatabase(db_path)
+        self._require_schema()
+        self._lock = threading.Lock()
+        self._catalog_key: Optional[Tuple] = None
+        self._catalog_checked = 0.0
+        self._catalog: FrozenSet[str] = frozenset()
+        self._sets: Dict[str, FrozenSet[str]] = {}
+        self._indexes: Dict[str, FormatIndex] = {}
+
+    # -- rules -----------------------------------------------------------
+
+    def get_rules(self, name: str) -> FormatRules:
+        with self._connection() as conn:
+            return self._load_rules(conn, name)
+
+    def _load_rules(self, conn, name: str) -> FormatRules:
+        row = conn.execute('''
+            SELECT min_deck_size, max_deck_size, max_copies, legal_sets, revision
+            FROM format_rules WHERE format = ?
+        ''', (name,)).fetchone()
+        if row is None:
+            rules = default_rules(name)
+        else:
+            rules = FormatRules(name, row[0], row[1], row[2], json.loads(row[3]) if row[3] else None,
+                                revision=row[4])
+        for card_id, status in conn.execute('SELECT card_id, status FROM format_cards WHERE format = ?', (name,)):
+            getattr(rules, status).add(card_id)
+        return rules
+
+    def list_formats(self) -> List[FormatRules]:
+        """Built-in formats, stored formats and formats decks are saved under"""
+        with self._connection() as conn:
+            names = set(DEFAULT_FORMATS)
+            names.update(row[0] for row in conn.execute('SELECT format FROM format_rules'))
+            names.update(row[0] for row in conn.execute('SELECT DISTINCT format FROM decks'))
+            return [self._load_rules(conn, name) for name in sorted(names)]
+
+    def _store_rules(self, conn, rules: FormatRules) -> int:
+        """Write the rules row with a new revision and return it"""
+        conn.execute('''
+            INSERT INTO format_rules (format, min_deck_size, max_deck_size, max_copies, legal_sets, revision, updated)
+            VALUES (?, ?, ?, ?, ?, 1, ?)
+            ON CONFLICT (format) DO UPDATE SET
+                min_deck_size = excluded.min_deck_size, max_deck_size = excluded.max_deck_size,
+                max_copies = excluded.max_copies, legal_sets = excluded.legal_sets,
+                revision = revision + 1, updated = excluded.updated
+        ''', (rules.name, rules.min_deck_size, rules.max_deck_size, rules.max_copies,
+              json.dumps(rules.legal_sets) if rules.legal_sets is not None else None,
+              datetime.now().isoformat()))
+        return conn.execute('SELECT revision FROM format_rules WHERE format = ?', (rules.name,)).fetchone()[0]
+
+    def update_rules(self, name: str, min_deck_size: Optional[int] = None, max_deck_size: Optional[int] = None,
+                     max_copies: Optional[int] = None, legal_sets: Optional[List[str]] = None,
+                     all_sets: bool = False, no_max_size: bool = False) -> Dict:
+        """Change size bounds, copy limit or legal sets and re-check the format's decks.
+
+        Arguments left as None keep their current value; ``all_sets`` makes
+        every set legal and ``no_max_size`` removes the upper size bound.
+        """
+        with self._connection() as conn:
+            rules = self._load_rules(conn, name)
+            if min_deck_size is not None:
+                rules.min_deck_size = min_deck_size
+            if max_deck_size is not None:
+                rules.max_deck_size = max_deck_size
+            if no_max_size:
+                rules.max_deck_size = None
+            if max_copies is not None:
+                rules.max_copies = max_copies
+            if legal_sets is not None:
+                rules.legal_sets = sorted(set(legal_sets))
+            if all_sets:
+                rules.legal_sets = None
+            if rules.min_deck_size < 0 or rules.max_copies < 1:
+                raise ValueError("Deck size must not be negative and copy limits must be at least 1")
+            if rules.max_deck_size is not None and rules.max_deck_size < rules.min_deck_size:
+                raise ValueError("Maximum deck size is below the minimum")
+            self._store_rules(conn, rules)
+        logger.info("Updated %s rules", name, extra={'event': 'format_rules_updated'})
+        return self.revalidate(name)
+
+    def set_card_status(self, name: str, cards: Iterable[str], status: Optional[str]) -> Dict:
+        """Put cards on a format's banned/restricted/unlimited list (None removes them).
+
+        Cards may be given by id or by exact name; a name covers every
+        printing. Only decks containing the cards are re-checked.
+        """
+        if status is not None and status not in CARD_STATUSES:
+            raise ValueError(f"Unknown card status {status!r}: use {', '.join(CARD_STATUSES)}")
+        with self._connection() as conn:
+            card_ids = self._resolve_cards(conn, cards)
+            rules = self._load_rules(conn, name)
+            self._store_rules(conn, rules)
+            conn.executemany('DELETE FROM format_cards WHERE format = ? AND card_id = ?',
+                             [(name, card_id) for card_id in card_ids])
+            if status is not None:
+                conn.executemany('INSERT INTO format_cards (format, card_id, status) VALUES (?, ?, ?)',
+                                 [(name, card_id, status) for card_id in card_ids])
+        logger.info("Set %d cards to %s in %s", len(card_ids), status or 'default', name,
+                    extra={'event': 'format_cards_updated'})
+        return self.revalidate(name, changed_cards=card_ids)
+
+    @staticmethod
+    def _resolve_cards(conn, cards: Iterable[str]) -> List[str]:
+        cards = [card for card in dict.fromkeys(cards) if card]
+        if not cards:
+            raise ValueError("No cards given")
+        found: Dict[str, Set[str]] = {}
+        for start in range(0, len(cards), 400):
+            chunk = cards[start:start + 400]
+            marks = ','.join('?' * len(chunk))
+            for card_id, name in conn.execute(
+                    f"SELECT id, name FROM cards WHERE id IN ({marks}) OR name IN ({marks})", chunk + chunk):
+                found.setdefault(card_id, set()).add(card_id)
+                found.setdefault(name, set()).add(card_id)
+        missing = [card for card in cards if card not in found]
+        if missing:
+            raise ValueError(f"Unknown cards: {', '.join(missing[:10])}")
+        return sorted({card_id for card in cards for card_id in found[card]})
+
+    # -- indexes ---------------------------------------------------------
+
+    def _load_catalog(self, conn):
+        """Reload card ids grouped by set when the catalog changed.
+
+        Counting a large catalog costs milliseconds, so only its highest
+        id is compared on each use and the count every CATALOG_RECHECK_S.
+        """
+        now = time.monotonic()
+        if self._catalog_key is None or now - self._catalog_checked >= CATALOG_RECHECK_S:
+            key = conn.execute('SELECT COUNT(*), MAX(id) FROM cards').fetchone()
+            self._catalog_checked = now
+        else:
+            key = (self._catalog_key[0], conn.execute('SELECT MAX(id) FROM cards').fetchone()[0])
+        if key == self._catalog_key:
+            return
+        by_set: Dict[str, List[str]] = {}
+        for card_id, set_name in conn.execute('SELECT id, set_name FROM cards'):
+            by_set.setdefault(set_name, []).append(card_id)
+        self._sets = {set_name: frozenset(ids) for set_name, ids in by_set.items()}
+        self._catalog = frozenset().union(*self._sets.values())
+        self._indexes = {}
+        self._catalog_key = key
+
+    def _index(self, conn, name: str) -> FormatIndex:
+        with self._lock:
+            self._load_catalog(conn)
+            revision = conn.execute('SELECT revision FROM format_rules WHERE format = ?', (name,)).fetchone()
+            index = self._indexes.get(name)
+            if index is not None and index.rules.revision == (revision[0] if revision else 0):
+                return index
+            rules = self._load_rules(conn, name)
+            if rules.legal_sets is None:
+                legal = self._catalog
+            else:
+                legal = frozenset().union(*(self._sets.get(set_name, frozenset()) for set_name in rules.legal_sets))
+            index = self._indexes[name] = FormatIndex(rules, self._catalog, legal)
+            return index
+
+    def index(self, name: str) -> FormatIndex:
+        with self._connection() as conn:
+            return self._index(conn, name)
+
+    # -- validation ------------------------------------------------------
+
+    def validate(self, deck: Deck, with_messages: bool = True) -> Dict:
+        """Check a deck against its format's rules"""
+        index = self.index(deck.format)
+        problems = index.check(deck.cards)
+        result = {'deck_id': deck.id, 'format': deck.format, 'legal': not problems, 'problems': problems,
+                  'revision': index.rules.revision}
+        if with_messages:
+            names = self.card_db.get_card_names({p['card_id'] for p in problems if 'card_id' in p})
+            for problem in problems:
+                problem['message'] = describe_problem(problem, deck.format, names)
+        return result
+
+    def revalidate(self, name: Optional[str] = None, changed_cards: Optional[Iterable[str]] = None) -> Dict:
+        """Re-check stored decks of one format (every format if None) and store the outcomes.
+
+        Decks without a stored outcome, saved since their last check or
+        moved from another format are always checked. With
+        ``changed_cards`` only those plus decks holding any of the cards
+        are; otherwise every deck of the format is.
+        """
+        start = datetime.now()
+        with self._connection() as conn:
+            if name is None:
+                formats = [row[0] for row in conn.execute('SELECT DISTINCT format FROM decks')]
+            else:
+                formats = [name]
+            changed_cards = sorted(set(changed_cards or ()))
+            summary = {'formats': formats, 'checked': 0, 'legal': 0, 'illegal': 0,
+                       'newly_illegal': [], 'newly_legal': []}
+            checked_at = datetime.now().isoformat()
+
+            for deck_format in formats:
+                index = self._index(conn, deck_format)
+                stale = ('l.deck_id IS NULL OR l.deck_version IS NOT d.version OR l.format != d.format')
+                if changed_cards:
+                    rows = {}
+                    for offset in range(0, len(changed_cards), MATCH_CHUNK):
+                        chunk = changed_cards[offset:offset + MATCH_CHUNK]
+                        # Card ids appear quoted as JSON object keys
+                        contains = ' OR '.join(['instr(d.cards, ?) > 0'] * len(chunk))
+                        for row in conn.execute(f'''
+                            SELECT d.id, d.version, d.cards, l.legal FROM decks d
+                            LEFT JOIN deck_legality l ON l.deck_id = d.id
+                            WHERE d.format = ? AND ({stale} OR {contains})
+                        ''', [deck_format] + [json.dumps(card_id) for card_id in chunk]):
+                            rows[row[0]] = row
+                    rows = list(rows.values())
+                else:
+                    rows = conn.execute('''
+                        SELECT d.id, d.version, d.cards, l.legal FROM decks d
+                        LEFT JOIN deck_legality l ON l.deck_id = d.id
+                        WHERE d.format = ?
+                    ''', (deck_format,)).fetchall()
+
+                outcomes = []
+                for deck_id, version, cards, was_legal in rows:
+                    problems = index.check(json.loads(cards) if cards else {})
+                    legal = not problems
+                    if was_legal is not None and bool(was_legal) != legal:
+                        summary['newly_legal' if legal else 'newly_illegal'].append(deck_id)
+                    outcomes.append((deck_id, deck_format, version, index.rules.revision, int(legal),
+                                     json.dumps(problems, separators=(',', ':')), checked_at))
+                conn.executemany('''
+                    INSERT OR REPLACE INTO deck_legality
+                    (deck_id, format, deck_version, revision, legal, problems, checked_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', outcomes)
+                conn.execute('UPDATE deck_legality SET revision = ? WHERE format = ?',
+                             (index.rules.revision, deck_format))
+                summary['checked'] += len(outcomes)
+
+            conn.execute('DELETE FROM deck_legality WHERE deck_id NOT IN (SELECT id FROM decks)')
+            placeholders = ','.join('?' * len(formats))
+            for legal, count in conn.execute(f'''
+                SELECT legal, COUNT(*) FROM deck_legality WHERE format IN ({placeholders}) GROUP BY legal
+            ''', formats):
+                summary['legal' if legal else 'illegal'] += count
+
+        summary['elapsed_s'] = round((datetime.now() - start).total_seconds(), 3)
+        logger.info("Revalidated %d decks in %s", summary['checked'], ', '.join(formats) or 'no formats',
+                    extra={'event': 'decks_revalidated'})
+        return summary
+
+    def illegal_decks(self, name: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """Stored decks whose last check failed, with their problems"""
+        query = '''
+            SELECT l.deck_id, d.name, l.format, l.problems, l.checked_at
+            FROM deck_legality l JOIN decks d ON d.id = l.deck_id
+            WHERE l.legal = 0
+        '''
+        params: List = []
+        if name is not None:
+            query += ' AND l.format = ?'
+            params.append(name)
+        query += ' ORDER BY l.format, l.deck_id LIMIT ?'
+        params.append(limit)
+        with self._connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [{'deck_id': deck_id, 'name': deck_name, 'format': deck_format,
+                 'problems': json.loads(problems), 'checked_at': checked_at}
+                for deck_id, deck_name, deck_format, problems, checked_at in rows]
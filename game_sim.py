@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+DeckWizard Game Simulator
+Headless AI-vs-AI games between stored decks with a small rules engine and
+greedy agents, spread over worker processes, for matchup and deck-tuning
+samples far larger than hand-recorded history
+"""
+
+import os
+import random
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from deckwizard import Card, Deck, DeckManager, GameResult, GameTracker, SQLiteStore, logger, new_record_id
+
+STARTING_LIFE = 20
+MAX_MANA = 10
+OPENING_HAND = 4
+HAND_LIMIT = 10
+BOARD_LIMIT = 7
+
+# Rounds after which an unfinished game is a draw
+MAX_ROUNDS = 30
+
+# Games played per worker job
+GAMES_PER_JOB = 500
+
+# Opponents used when no gauntlet is given
+GAUNTLET_SIZE = 8
+
+# Compiled card layout: (cost, kind, attack, health, keyword flags, spell damage)
+COST, KIND, ATTACK, HEALTH, FLAGS, DAMAGE = range(6)
+CREATURE, SPELL, LAND, OTHER = range(4)
+KINDS = {'Creature': CREATURE, 'Spell': SPELL, 'Land': LAND}
+
+FLYING, HASTE, TAUNT, LIFESTEAL, DEATHTOUCH, TRAMPLE, WARD = (1 << bit for bit in range(7))
+KEYWORD_FLAGS = {'Flying': FLYING, 'Haste': HASTE, 'Taunt': TAUNT, 'Lifesteal': LIFESTEAL,
+                 'Deathtouch': DEATHTOUCH, 'Trample': TRAMPLE, 'Ward': WARD}
+
+SPELL_DAMAGE = re.compile(r'deal (\d+) damage', re.IGNORECASE)
+
+RESULTS = ('loss', 'win', 'draw')
+
+
+def compile_card(card: Card) -> Tuple[int, int, int, int, int, int]:
+    """The fields of a card the rules engine reads, as a flat tuple.
+
+    Creatures fight with attack and health. Spells deal the damage in their
+    "Deal N damage" text (their cost otherwise) to a creature or the enemy
+    player. Lands add a mana. Artifacts and enchantments carry no rules
+    text the engine understands and are never played.
+    """
+    flags = 0
+    for ability in card.abilities or ():
+        flags |= KEYWORD_FLAGS.get(ability.strip().title(), 0)
+    match = SPELL_DAMAGE.search(card.description or '')
+    damage = int(match.group(1)) if match else max(1, card.cost)
+    return (card.cost, KINDS.get(card.card_type, OTHER), card.attack or 0,
+            max(1, card.health or 1), flags, damage)
+
+
+class _Player:
+    __slots__ = ('life', 'library', 'hand', 'board', 'lands', 'fatigue')
+
+    def __init__(self, deck: Sequence[tuple], rng: random.Random):
+        self.life = STARTING_LIFE
+        self.library = list(deck)
+        rng.shuffle(self.library)
+        self.hand: List[tuple] = []
+        # Creatures in play: [attack, health, flags, ready]
+        self.board: List[list] = []
+        self.lands = 0
+        self.fatigue = 0
+
+    def draw(self):
+        if self.library:
+            card = self.library.pop()
+            if len(self.hand) < HAND_LIMIT:
+                self.hand.append(card)
+        else:
+            self.fatigue += 1
+            self.life -= self.fatigue
+
+
+def _heal(player: _Player, amount: int):
+    player.life = min(STARTING_LIFE, player.life + amount)
+
+
+def _cast_spell(card: tuple, me: _Player, foe: _Player):
+    """Go face for lethal, else kill the biggest threat the spell can, else go face"""
+    damage = card[DAMAGE]
+    if foe.life > damage:
+        target = None
+        for minion in foe.board:
+            if minion[1] <= damage and not minion[2] & WARD and (target is None or minion[0] > target[0]):
+                target = minion
+        if target is not None:
+            foe.board.remove(target)
+            if card[FLAGS] & LIFESTEAL:
+                _heal(me, damage)
+            return
+    foe.life -= damage
+    if card[FLAGS] & LIFESTEAL:
+        _heal(me, damage)
+
+
+def _fight(attacker: list, defender: list, me: _Player, foe: _Player):
+    attack, defense = attacker[0], defender[0]
+    if attacker[2] & LIFESTEAL:
+        _heal(me, attack)
+    if defender[2] & LIFESTEAL and defense:
+        _heal(foe, defense)
+    if attacker[2] & TRAMPLE and attack > defender[1]:
+        foe.life -= attack - defender[1]
+    defender[1] -= attack
+    if defender[1] <= 0 or (attack and attacker[2] & DEATHTOUCH):
+        foe.board.remove(defender)
+    attacker[1] -= defense
+    if attacker[1] <= 0 or (defense and defender[2] & DEATHTOUCH):
+        me.board.remove(attacker)
+
+
+def _kills(attacker: list, defender: list) -> bool:
+    return attacker[0] >= defender[1] or bool(attacker[0] and attacker[2] & DEATHTOUCH)
+
+
+def _attack(me: _Player, foe: _Player):
+    """Attack with every ready creature, biggest first.
+
+    Taunt creatures must be attacked first (fliers may ignore taunts
+    without Flying). Otherwise a creature goes face when the team has
+    lethal, takes a trade it survives, or goes face.
+    """
+    attackers = sorted((m for m in me.board if m[3] and m[0] > 0), key=lambda m: -m[0])
+    remaining = sum(m[0] for m in attackers)
+    for attacker in attackers:
+        if foe.life <= 0:
+            return
+        attacker[3] = False
+        remaining -= attacker[0]
+        taunts = [m for m in foe.board if m[2] & TAUNT
+                  and not (attacker[2] & FLYING and not m[2] & FLYING)]
+        if taunts:
+            killable = [m for m in taunts if _kills(attacker, m)]
+            target = max(killable, key=lambda m: m[0]) if killable else min(taunts, key=lambda m: m[1])
+            _fight(attacker, target, me, foe)
+            continue
+        if attacker[0] + remaining < foe.life:
+            trades = [m for m in foe.board if _kills(attacker, m)
+                      and m[0] < attacker[1] and not (m[0] and m[2] & DEATHTOUCH)]
+            if trades:
+                _fight(attacker, max(trades, key=lambda m: m[0]), me, foe)
+                continue
+        foe.life -= attacker[0]
+        if attacker[2] & LIFESTEAL:
+            _heal(me, attacker[0])
+
+
+def _take_turn(me: _Player, foe: _Player, round_number: int):
+    me.draw()
+    for minion in me.board:
+        minion[3] = True
+
+    hand = me.hand
+    for i, card in enumerate(hand):
+        if card[KIND] == LAND:
+            del hand[i]
+            me.lands += 1
+            break
+    mana = min(MAX_MANA, round_number + me.lands)
+
+    # Spend as much mana as possible, most expensive cards first
+    hand.sort(key=lambda card: -card[COST])
+    i = 0
+    while i < len(hand):
+        card = hand[i]
+        kind = card[KIND]
+        if card[COST] > mana or kind in (LAND, OTHER) or (kind == CREATURE and len(me.board) >= BOARD_LIMIT):
+            i += 1
+            continue
+        del hand[i]
+        mana -= card[COST]
+        if kind == CREATURE:
+            me.board.append([card[ATTACK], card[HEALTH], card[FLAGS], bool(card[FLAGS] & HASTE)])
+        else:
+            _cast_spell(card, me, foe)
+            if foe.life <= 0:
+                return
+
+    _attack(me, foe)
+
+
+def play_game(deck: Sequence[tuple], opponent: Sequence[tuple], rng: random.Random) -> Tuple[int, int]:
+    """Play one game between compiled decks.
+
+    Returns the result code from ``deck``'s side (index into RESULTS) and
+    the number of rounds played. The player going first is chosen at
+    random; the other starts with one extra card.
+    """
+    players = (_Player(deck, rng), _Player(opponent, rng))
+    active = 0 if rng.random() < 0.5 else 1
+    for _ in range(OPENING_HAND):
+        players[0].draw()
+        players[1].draw()
+    players[1 - active].draw()
+
+    for ply in range(2 * MAX_ROUNDS):
+        me, foe = players[active], players[1 - active]
+        _take_turn(me, foe, ply // 2 + 1)
+        if foe.life <= 0 or me.life <= 0:
+            winner = active if foe.life <= 0 else 1 - active
+            return (1 if winner == 0 else 0), ply // 2 + 1
+        active = 1 - active
+    return 2, MAX_ROUNDS
+
+
+def _play_batch(job) -> List[Tuple[int, int]]:
+    deck, opponent, games, seed = job
+    rng = random.Random(seed)
+    return [play_game(deck, opponent, rng) for _ in range(games)]
+
+
+class GameSimulator(SQLiteStore):
+    """Plays stored decks against each other and records the games.
+
+    Matchups are split into jobs of GAMES_PER_JOB games run on a process
+    pool (``workers=1`` keeps everything in-process). With a seed, results
+    are reproducible regardless of the number of workers. Recorded games
+    go to game_results flagged as simulated, so analytics that learn from
+    matchups can opt into them without disturbing real win rates.
+    """
+
+    def __init__(self, db_path: str = "deckwizard.db", deck_manager: Optional[DeckManager] = None,
+                 game_tracker: Optional[GameTracker] = None):
+        self.db_path = db_path
+        self.deck_manager = deck_manager or DeckManager(db_path)
+        self.card_db = self.deck_manager.card_db
+        self.game_tracker = game_tracker or GameTracker(db_path)
+
+    def compile_deck(self, deck: Deck) -> List[tuple]:
+        """The deck's cards, one tuple per copy, as the rules engine sees them"""
+        cards = self.card_db.get_cards(deck.cards)
+        compiled = []
+        for card_id, quantity in deck.cards.items():
+            if card_id in cards:
+                compiled.extend([compile_card(cards[card_id])] * quantity)
+        if not compiled:
+            raise ValueError(f"Deck {deck.id} has no known cards to play")
+        return compiled
+
+    def _load(self, deck_id: str) -> Deck:
+        deck = self.deck_manager.load_deck(deck_id)
+        if deck is None:
+            raise LookupError(f"Deck not found: {deck_id}")
+        return deck
+
+    def default_gauntlet(self, deck: Deck, size: int = GAUNTLET_SIZE) -> List[str]:
+        """The most played other decks of the same format"""
+        with self._connection() as conn:
+            rows = conn.execute('''
+                SELECT id FROM decks WHERE format = ? AND id != ?
+                ORDER BY games_played DESC, id LIMIT ?
+            ''', (deck.format, deck.id, size)).fetchall()
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def _run(pairings: List[Tuple[List[tuple], List[tuple], int]], workers: Optional[int],
+             seed: Optional[int], slots: Optional[int] = None) -> List[List[Tuple[int, int]]]:
+        """Play every (deck, opponent, games) pairing; outcomes per pairing.
+
+        Pairing ``index`` takes its job seeds from slot ``index % slots``
+        (every pairing its own slot by default). Laying out variants of a
+        deck in blocks of ``slots`` opponents gives each variant the same
+        shuffles against an opponent as the unchanged deck.
+        """
+        slots = slots or max(1, len(pairings))
+        master = random.Random(seed)
+        job_seeds: List[int] = []
+        jobs, owners = [], []
+        for index, (deck, opponent, games) in enumerate(pairings):
+            for job_number, start in enumerate(range(0, games, GAMES_PER_JOB)):
+                if job_number >= len(job_seeds):
+                    job_seeds.append(master.getrandbits(64))
+                jobs.append((deck, opponent, min(GAMES_PER_JOB, games - start), job_seeds[job_number] + index % slots))
+                owners.append(index)
+
+        workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+        outcomes: List[List[Tuple[int, int]]] = [[] for _ in pairings]
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_play_batch, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+        else:
+            results = [_play_batch(job) for job in jobs]
+        for owner, batch in zip(owners, results):
+            outcomes[owner].extend(batch)
+        return outcomes
+
+    @staticmethod
+    def _summarize(outcomes: List[Tuple[int, int]]) -> Dict:
+        counts = [0, 0, 0]
+        rounds = 0
+        for result, length in outcomes:
+            counts[result] += 1
+            rounds += length
+        games = len(outcomes)
+        return {'games': games, 'wins': counts[1], 'losses': counts[0], 'draws': counts[2],
+                'win_rate': counts[1] / games if games else 0.0,
+                'average_length': rounds / games if games else 0.0}
+
+    def _record(self, deck_id: str, opponent_id: str, outcomes: List[Tuple[int, int]]) -> int:
+        date_played = datetime.now().isoformat()
+        # One random id per batch, numbered per game
+        batch_id = new_record_id('sim')
+        return self.game_tracker.record_simulated_games([
+            GameResult(id=f"{batch_id}_{number:06d}", deck_id=deck_id, opponent_deck=opponent_id,
+                       result=RESULTS[result], game_length=length, date_played=date_played, notes='')
+            for number, (result, length) in enumerate(outcomes)])
+
+    def gauntlet(self, deck_id: str, opponent_ids: Optional[List[str]] = None, games: int = 1000,
+                 workers: Optional[int] = None, seed: Optional[int] = None, record: bool = True) -> Dict:
+        """Play ``games`` games against each opponent (the default gauntlet if none given)"""
+        if games < 1:
+            raise ValueError("Games must be positive")
+        deck = self._load(deck_id)
+        opponent_ids = list(opponent_ids) if opponent_ids else self.default_gauntlet(deck)
+        if not opponent_ids:
+            raise ValueError(f"No opponents for deck {deck_id}")
+        compiled = self.compile_deck(deck)
+        pairings = [(compiled, self.compile_deck(self._load(opponent_id)), games) for opponent_id in opponent_ids]
+
+        start = time.perf_counter()
+        outcomes = self._run(pairings, workers, seed)
+        elapsed = time.perf_counter() - start
+
+        recorded = 0
+        if record:
+            for opponent_id, played in zip(opponent_ids, outcomes):
+                recorded += self._record(deck_id, opponent_id, played)
+        total = sum(len(played) for played in outcomes)
+        logger.info("Simulated %d games for deck %s in %.2fs", total, deck_id, elapsed,
+                    extra={'event': 'gauntlet_simulated', 'deck_id': deck_id})
+
+        result = self._summarize([outcome for played in outcomes for outcome in played])
+        result.update({
+            'deck_id': deck_id,
+            'opponents': [dict(self._summarize(played), opponent_id=opponent_id)
+                          for opponent_id, played in zip(opponent_ids, outcomes)],
+            'recorded': recorded,
+            'elapsed_s': round(elapsed, 3),
+            'games_per_minute': round(total / elapsed * 60) if elapsed else None
+        })
+        return result
+
+    def simulate_matchup(self, deck_id: str, opponent_id: str, games: int = 1000,
+                         workers: Optional[int] = None, seed: Optional[int] = None, record: bool = True) -> Dict:
+        """Play one deck against another ``games`` times"""
+        result = self.gauntlet(deck_id, [opponent_id], games, workers=workers, seed=seed, record=record)
+        result['opponent_id'] = opponent_id
+        del result['opponents']
+        return result
+
+    def _swap_candidates(self, deck: Deck, cuts: int, adds: int) -> Tuple[List[str], List[Card]]:
+        """Weakest cards in the deck by the engine's measure, and replacements to try"""
+        cards = self.card_db.get_cards(deck.cards)
+
+        def value(card: Card) -> float:
+            compiled = compile_card(card)
+            if compiled[KIND] == CREATURE:
+                return (compiled[ATTACK] + compiled[HEALTH] + bin(compiled[FLAGS]).count('1')) / (compiled[COST] + 1)
+            if compiled[KIND] == SPELL:
+                return compiled[DAMAGE] * 1.5 / (compiled[COST] + 1)
+            return 0.0 if compiled[KIND] == OTHER else 1.0
+
+        ranked = sorted(cards.values(), key=value)
+        cut_ids = [card.id for card in ranked[:cuts]]
+        pool = [card for card in self.deck_manager.suggest_cards(deck, count=adds * 20)
+                if card.id not in deck.cards]
+        pool.sort(key=value, reverse=True)
+        return cut_ids, pool[:adds]
+
+    def evaluate_swaps(self, deck_id: str, opponent_ids: Optional[List[str]] = None, games: int = 200,
+                       cuts: int = 3, adds: int = 3, workers: Optional[int] = None,
+                       seed: Optional[int] = None) -> Dict:
+        """Try one-for-one swaps of a copy against the gauntlet and rank them.
+
+        Every variant plays the same number of games per opponent with the
+        same job seeds as the unchanged deck (common random numbers), and a
+        swap is significant when its gain clears two standard errors of the
+        paired per-game differences. Nothing is recorded: the variants are
+        not stored decks.
+        """
+        if games < 1:
+            raise ValueError("Games must be positive")
+        deck = self._load(deck_id)
+        opponent_ids = list(opponent_ids) if opponent_ids else self.default_gauntlet(deck)
+        if not opponent_ids:
+            raise ValueError(f"No opponents for deck {deck_id}")
+        opponents = [self.compile_deck(self._load(opponent_id)) for opponent_id in opponent_ids]
+        cut_ids, candidates = self._swap_candidates(deck, cuts, adds)
+
+        variants = [(None, None, deck.cards)]
+        for cut_id in cut_ids:
+            for card in candidates:
+                cards = dict(deck.cards)
+                cards[cut_id] -= 1
+                if not cards[cut_id]:
+                    del cards[cut_id]
+                cards[card.id] = cards.get(card.id, 0) + 1
+                variants.append((cut_id, card.id, cards))
+
+        pairings = []
+        for _, _, cards in variants:
+            compiled = self.compile_deck(replace(deck, cards=cards))
+            pairings.extend((compiled, opponent, games) for opponent in opponents)
+
+        start = time.perf_counter()
+        per_variant = len(opponents)
+        outcomes = self._run(pairings, workers, seed, slots=per_variant)
+        # Per-game wins (1) and non-wins (0) in seed order, so game i of a
+        # variant is paired with game i of the unchanged deck
+        wins = [[int(result == 1) for batch in outcomes[v * per_variant:(v + 1) * per_variant]
+                 for result, _ in batch] for v in range(len(variants))]
+        games_per_variant = games * per_variant
+        rates = [sum(played) / games_per_variant for played in wins]
+
+        baseline = rates[0]
+        names = self.card_db.get_card_names({card_id for cut_id, add_id, _ in variants[1:]
+                                             for card_id in (cut_id, add_id)})
+        # Significance threshold: two standard errors of the mean paired
+        # difference, which shrinks as common random numbers correlate games
+        thresholds = []
+        for played, rate in zip(wins[1:], rates[1:]):
+            change = rate - baseline
+            variance = sum((w - b - change) ** 2 for w, b in zip(played, wins[0])) / max(1, games_per_variant - 1)
+            thresholds.append(2 * (variance / games_per_variant) ** 0.5)
+        swaps = [{
+            'remove': cut_id, 'remove_name': names.get(cut_id, cut_id),
+            'add': add_id, 'add_name': names.get(add_id, add_id),
+            'win_rate': rate, 'win_rate_change': rate - baseline,
+            'significant': rate - baseline > threshold
+        } for (cut_id, add_id, _), rate, threshold in zip(variants[1:], rates[1:], thresholds)]
+        swaps.sort(key=lambda swap: -swap['win_rate_change'])
+        return {
+            'deck_id': deck_id, 'opponents': opponent_ids, 'games_per_variant': games_per_variant,
+            'baseline_win_rate': baseline, 'swaps': swaps,
+            'elapsed_s': round(time.perf_counter() - start, 3)
+        }
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+DeckWizard Database Maintenance
+Online backups, incremental vacuum, planner statistics, integrity checks
+and archiving of old game results, with a schedule for running them
+"""
+
+import json
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from deckwizard import SQLiteStore, logger
+
+# Pages copied per backup step; other connections can write between steps
+BACKUP_PAGES_PER_STEP = 1024
+
+# Stepped backups restarted by concurrent writes more often than this finish in one step
+BACKUP_MAX_RESTARTS = 3
+
+# Free pages released per incremental vacuum transaction
+VACUUM_PAGES_PER_STEP = 2000
+
+# Game results moved per archive transaction
+ARCHIVE_BATCH_SIZE = 10000
+
+# Rows sampled per index by the default ANALYZE (0 reads everything)
+ANALYSIS_LIMIT = 1000
+
+# Seconds between scheduled runs of each task
+SCHEDULE = {
+    'analyze': 24 * 3600,
+    'vacuum': 3600,
+    'quick_check': 24 * 3600,
+    'integrity_check': 7 * 24 * 3600,
+    'backup': 24 * 3600,
+    'archive': 24 * 3600,
+}
+
+# Backups kept in a backup directory by scheduled runs
+BACKUPS_KEPT = 7
+
+
+class _BackupRestarted(Exception):
+    """Raised from the progress callback to stop a stepped backup that keeps restarting"""
+
+
+GAME_COLUMNS = 'id, deck_id, opponent_deck, result, game_length, date_played, notes, simulated'
+
+
+class Maintenance(SQLiteStore):
+    """Housekeeping for one DeckWizard database.
+
+    Everything except ``vacuum(full=True)`` runs while web workers keep
+    using the database: work is split into short transactions so writers
+    only ever wait for one step. The schema version is not checked, so a
+    file can be backed up before it is migrated; runs are only logged once
+    the maintenance log exists.
+    """
+
+    def __init__(self, db_path: str = "deckwizard.db"):
+        self.db_path = db_path
+
+    @staticmethod
+    def _has_log(conn) -> bool:
+        return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'maintenance_log'"
+                            ).fetchone() is not None
+
+    def _log(self, task: str, started: datetime, ok: bool, details: Dict):
+        with self._connection() as conn:
+            if not self._has_log(conn):
+                return
+            conn.execute('''
+                INSERT INTO maintenance_log (task, started, duration_s, ok, details) VALUES (?, ?, ?, ?, ?)
+            ''', (task, started.isoformat(), round((datetime.now() - started).total_seconds(), 3), int(ok),
+                  json.dumps(details)))
+
+    def _run_logged(self, task: str, fn: Callable[[], Dict]) -> Dict:
+        started = datetime.now()
+        try:
+            details = fn()
+        except Exception as e:
+            self._log(task, started, False, {'error': str(e)})
+            raise
+        self._log(task, started, details.get('ok', True), details)
+        return details
+
+    # -- status ----------------------------------------------------------
+
+    def status(self) -> Dict:
+        """File size, free pages, vacuum mode and the last run of every task"""
+        with self._connection() as conn:
+            page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+            page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+            freelist = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            auto_vacuum = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+            journal_mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+            schema_version = conn.execute('PRAGMA user_version').fetchone()[0]
+            last_runs = {task: {'started': started, 'duration_s': duration, 'ok': bool(ok)}
+                         for task, started, duration, ok in conn.execute('''
+                             SELECT task, started, duration_s, ok FROM maintenance_log m
+                             WHERE started = (SELECT MAX(started) FROM maintenance_log WHERE task = m.task)
+                         ''')} if self._has_log(conn) else {}
+            games = conn.execute('SELECT COUNT(*), MIN(date_played) FROM game_results').fetchone()
+            try:
+                # dbstat is only there when SQLite was built with it
+                tables = dict(conn.execute(
+                    'SELECT name, SUM(pgsize) FROM dbstat GROUP BY name ORDER BY 2 DESC LIMIT 10'))
+            except sqlite3.OperationalError:
+                tables = {}
+        return {
+            'path': self.db_path,
+            'size_bytes': page_size * page_count,
+            'page_size': page_size,
+            'pages': page_count,
+            'free_pages': freelist,
+            'free_ratio': freelist / page_count if page_count else 0.0,
+            'auto_vacuum': {0: 'none', 1: 'full', 2: 'incremental'}.get(auto_vacuum, str(auto_vacuum)),
+            'journal_mode': journal_mode,
+            'schema_version': schema_version,
+            'games': games[0],
+            'oldest_game': games[1],
+            'largest_tables': tables,
+            'last_runs': last_runs,
+            'due': self.due_tasks(last_runs)
+        }
+
+    def due_tasks(self, last_runs: Optional[Dict] = None, now: Optional[datetime] = None) -> List[str]:
+        """Tasks whose SCHEDULE interval has passed since their last run"""
+        if last_runs is None:
+            last_runs = self.status()['last_runs']
+        now = now or datetime.now()
+        due = []
+        for task, interval in SCHEDULE.items():
+            last = last_runs.get(task)
+            if last is None or now - datetime.fromisoformat(last['started']) >= timedelta(seconds=interval):
+                due.append(task)
+        return due
+
+    # -- backup ----------------------------------------------------------
+
+    def backup(self, destination: str, pages_per_step: int = BACKUP_PAGES_PER_STEP, sleep: float = 0.005,
+               progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+        """Copy the database with SQLite's online backup API.
+
+        In WAL mode the copy is read from one snapshot in a single step
+        and writers are never held up. With a rollback journal it is taken
+        in steps of ``pages_per_step`` pages so writers get in between;
+        every write restarts a stepped copy, so after BACKUP_MAX_RESTARTS
+        restarts the rest is copied in one step, pausing writers for that
+        long. The copy is written next to ``destination``, checked with
+        quick_check and then moved into place. ``destination`` may be a
+        directory, in which case a timestamped file name is chosen.
+        """
+        if os.path.isdir(destination):
+            destination = os.path.join(destination, f"{self._backup_stem()}-{datetime.now():%Y%m%d-%H%M%S}.db")
+        if os.path.abspath(destination) == os.path.abspath(self.db_path):
+            raise ValueError("Backup destination is the database itself")
+
+        def run():
+            partial = destination + '.partial'
+            source = sqlite3.connect(self.db_path)
+            target = sqlite3.connect(partial)
+            restarts = 0
+            try:
+                wal = source.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+                report = (lambda status, remaining, total: progress(total - remaining, total)) if progress else None
+                if wal:
+                    source.backup(target, progress=report)
+                    mode = 'snapshot'
+                else:
+                    last_remaining = [None]
+
+                    def stepped(status, remaining, total):
+                        nonlocal restarts
+                        if last_remaining[0] is not None and remaining > last_remaining[0]:
+                            restarts += 1
+                            if restarts > BACKUP_MAX_RESTARTS:
+                                raise _BackupRestarted()
+                        last_remaining[0] = remaining
+                        if report:
+                            report(status, remaining, total)
+
+                    try:
+                        source.backup(target, pages=pages_per_step, progress=stepped, sleep=sleep)
+                        mode = 'stepped'
+                    except _BackupRestarted:
+                        source.backup(target, progress=report)
+                        mode = 'single step'
+                check = target.execute('PRAGMA quick_check').fetchall()
+            finally:
+                target.close()
+                source.close()
+            if check != [('ok',)]:
+                os.remove(partial)
+                raise RuntimeError(f"Backup failed its integrity check: {check[0][0]}")
+            os.replace(partial, destination)
+            return {'destination': destination, 'size_bytes': os.path.getsize(destination),
+                    'mode': mode, 'restarts': restarts}
+
+        result = self._run_logged('backup', run)
+        logger.info("Backed up %s to %s", self.db_path, destination, extra={'event': 'backup'})
+        return result
+
+    def enable_wal(self) -> str:
+        """Switch the file to write-ahead logging so readers and backups never block writers"""
+        with self._connection() as conn:
+            return conn.execute('PRAGMA journal_mode = WAL').fetchone()[0]
+
+    def _backup_stem(self) -> str:
+        return os.path.splitext(os.path.basename(self.db_path))[0]
+
+    def prune_backups(self, directory: str, keep: int = BACKUPS_KEPT) -> List[str]:
+        """Delete all but the ``keep`` newest timestamped backups of this database in a directory"""
+        pattern = re.compile(re.escape(self._backup_stem()) + r'-\d{8}-\d{6}\.db$')
+        backups = sorted(name for name in os.listdir(directory) if pattern.match(name))
+        pruned = [os.path.join(directory, name) for name in backups[:max(0, len(backups) - keep)]]
+        for path in pruned:
+            os.remove(path)
+        return pruned
+
+    # -- compaction and statistics ---------------------------------------
+
+    def vacuum(self, max_pages: Optional[int] = None, full: bool = False) -> Dict:
+        """Return free pages to the file system.
+
+        Incremental vacuum needs ``auto_vacuum = INCREMENTAL``, which an
+        existing file only gets through one full VACUUM. ``full`` runs
+        that VACUUM (it rewrites the file and blocks writers while it
+        runs); afterwards plain calls free pages in short transactions of
+        VACUUM_PAGES_PER_STEP pages, at most ``max_pages`` in total.
+        """
+        def run():
+            conn = sqlite3.connect(self.db_path)
+            try:
+                before = conn.execute('PRAGMA page_count').fetchone()[0]
+                if full:
+                    conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                    conn.execute('VACUUM')
+                elif conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+                    return {'ok': False, 'pages_before': before, 'pages_after': before, 'freed_pages': 0,
+                            'error': "auto_vacuum is not incremental; run a full vacuum once"}
+                else:
+                    remaining = max_pages
+                    while True:
+                        free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+                        step = min(free, VACUUM_PAGES_PER_STEP, remaining if remaining is not None else free)
+                        if step <= 0:
+                            break
+                        conn.execute(f'PRAGMA incremental_vacuum({step})')
+                        conn.commit()
+                        if remaining is not None:
+                            remaining -= step
+                after = conn.execute('PRAGMA page_count').fetchone()[0]
+                page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+            finally:
+                conn.close()
+            return {'full': full, 'pages_before': before, 'pages_after': after,
+                    'freed_pages': before - after, 'freed_bytes': (before - after) * page_size}
+
+        return self._run_logged('vacuum', run)
+
+    def analyze(self, full: bool = False) -> Dict:
+        """Refresh the query planner's statistics.
+
+        By default each index is sampled over ANALYSIS_LIMIT rows, which
+        keeps the run well under a second on multi-million-row tables.
+        ``PRAGMA optimize`` is no substitute here: it only revisits tables
+        queried on the same connection, and DeckWizard's connections are
+        short-lived. ``full`` reads every row.
+        """
+        def run():
+            with self._connection() as conn:
+                conn.execute(f'PRAGMA analysis_limit = {0 if full else ANALYSIS_LIMIT}')
+                conn.execute('ANALYZE')
+                analyzed = conn.execute('SELECT COUNT(DISTINCT tbl) FROM sqlite_stat1').fetchone()[0]
+            return {'full': full, 'tables_analyzed': analyzed}
+
+        return self._run_logged('analyze', run)
+
+    def integrity_check(self, quick: bool = False, max_errors: int = 100) -> Dict:
+        """Run SQLite's integrity (or quick) check plus a foreign key check"""
+        task = 'quick_check' if quick else 'integrity_check'
+
+        def run():
+            with self._connection() as conn:
+                rows = conn.execute(f'PRAGMA {task}({int(max_errors)})').fetchall()
+                errors = [row[0] for row in rows if row[0] != 'ok']
+                orphans = conn.execute('PRAGMA foreign_key_check').fetchall()
+            return {'ok': not errors, 'errors': errors,
+                    'foreign_key_violations': [{'table': table, 'rowid': rowid, 'parent': parent}
+                                               for table, rowid, parent, _ in orphans[:max_errors]]}
+
+        return self._run_logged(task, run)
+
+    # -- archiving -------------------------------------------------------
+
+    def archive_games(self, archive_path: str, before: str, batch_size: int = ARCHIVE_BATCH_SIZE) -> Dict:
+        """Move game results played before ``before`` (ISO date) into an archive database.
+
+        Aggregates outlive the purge: deck totals (games_played, win_rate)
+        are kept on the decks table and the meta-game rollups are brought
+        up to date first, so every archived game is already counted.
+        Queries over game_results (deck statistics, matchups, snapshots)
+        only see the games that remain. Rows are copied and deleted in
+        batches of ``batch_size``. The most recently inserted game always
+        stays, so rowids keep increasing for incremental readers.
+        """
+        if os.path.abspath(archive_path) == os.path.abspath(self.db_path):
+            raise ValueError("Archive database must be a different file")
+        datetime.fromisoformat(before)
+
+        def run():
+            from metagame import MetaRollup
+            MetaRollup(self.db_path).refresh()
+
+            conn = sqlite3.connect(self.db_path)
+            moved = 0
+            try:
+                conn.execute('ATTACH DATABASE ? AS archive', (archive_path,))
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS archive.game_results (
+                        id TEXT PRIMARY KEY,
+                        deck_id TEXT,
+                        opponent_deck TEXT,
+                        result TEXT,
+                        game_length INTEGER,
+                        date_played TEXT,
+                        notes TEXT,
+                        simulated INTEGER NOT NULL DEFAULT 0,
+                        archived_at TEXT
+                    )
+                ''')
+                conn.execute('CREATE INDEX IF NOT EXISTS archive.idx_archive_games_deck_date '
+                             'ON game_results (deck_id, date_played)')
+                conn.commit()
+                newest = conn.execute('SELECT MAX(rowid) FROM main.game_results').fetchone()[0] or 0
+                archived_at = datetime.now().isoformat()
+                last_rowid = 0
+                while True:
+                    rowids = [row[0] for row in conn.execute('''
+                        SELECT rowid FROM main.game_results
+                        WHERE rowid > ? AND rowid < ? AND date_played < ?
+                        ORDER BY rowid LIMIT ?
+                    ''', (last_rowid, newest, before, batch_size))]
+                    if not rowids:
+                        break
+                    marks = ','.join('?' * len(rowids))
+                    conn.execute(f'''
+                        INSERT OR IGNORE INTO archive.game_results ({GAME_COLUMNS}, archived_at)
+                        SELECT {GAME_COLUMNS}, ? FROM main.game_results WHERE rowid IN ({marks})
+                    ''', [archived_at] + rowids)
+                    conn.execute(f'DELETE FROM main.game_results WHERE rowid IN ({marks})', rowids)
+                    conn.commit()
+                    moved += len(rowids)
+                    last_rowid = rowids[-1]
+                remaining = conn.execute('SELECT COUNT(*) FROM main.game_results').fetchone()[0]
+                archived = conn.execute('SELECT COUNT(*) FROM archive.game_results').fetchone()[0]
+            finally:
+                conn.close()
+            return {'archive': archive_path, 'before': before, 'moved': moved,
+                    'remaining': remaining, 'archived_total': archived}
+
+        result = self._run_logged('archive', run)
+        logger.info("Archived %d games played before %s", result['moved'], before, extra={'event': 'games_archived'})
+        return result
+
+    # -- scheduling ------------------------------------------------------
+
+    def run_due(self, backup_dir: Optional[str] = None, archive_path: Optional[str] = None,
+                keep_days: Optional[int] = None, force: bool = False) -> Dict[str, Dict]:
+        """Run every task that is due (all of them with ``force``).
+
+        Backups need ``backup_dir`` and archiving needs ``archive_path``
+        and ``keep_days``; without them those tasks are skipped. A failing
+        task is reported and doesn't stop the others.
+        """
+        due = list(SCHEDULE) if force else self.due_tasks()
+        if 'integrity_check' in due and 'quick_check' in due:
+            # The full check covers the quick one
+            due.remove('quick_check')
+        tasks = {
+            'analyze': self.analyze,
+            'vacuum': lambda: self.vacuum(max_pages=None),
+            'quick_check': lambda: self.integrity_check(quick=True),
+            'integrity_check': self.integrity_check,
+        }
+        if backup_dir:
+            def scheduled_backup():
+                os.makedirs(backup_dir, exist_ok=True)
+                result = self.backup(backup_dir)
+                result['pruned'] = self.prune_backups(backup_dir)
+                return result
+            tasks['backup'] = scheduled_backup
+        if archive_path and keep_days is not None:
+            tasks['archive'] = lambda: self.archive_games(
+                archive_path, (datetime.now() - timedelta(days=keep_days)).date().isoformat())
+
+        results = {}
+        for task in due:
+            if task not in tasks:
+                continue
+            start = time.perf_counter()
+            try:
+                results[task] = tasks[task]()
+            except Exception as e:
+                logger.error(f"Maintenance task {task} failed: {e}")
+                results[task] = {'ok': False, 'error': str(e)}
+            results[task].setdefault('elapsed_s', round(time.perf_counter() - start, 3))
+        return results
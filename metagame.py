@@ -0,0 +1,566 @@
+#!/usr/bin/env python3
+"""
+DeckWizard Meta-Game Rollups
+Clusters the decks of each format into archetypes by card similarity and
+keeps card inclusion rates, archetype share and archetype win rates in
+rollup tables that are refreshed incrementally
+"""
+
+import json
+import math
+import random
+import threading
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from deckwizard import CardDatabase, SQLiteStore, logger
+
+# Share of deck similarity that comes from exact cards; the rest comes from
+# the mana curve and card type profile, which still groups decks that share
+# a plan but few cards
+CARD_WEIGHT = 0.7
+
+# Upper bound on archetypes per format
+MAX_ARCHETYPES = 8
+
+# Archetypes whose centroids are at least this similar are merged
+MERGE_SIMILARITY = 0.9
+
+KMEANS_ITERATIONS = 12
+
+# A format is re-clustered from scratch once this share of its decks changed
+RECLUSTER_FRACTION = 0.25
+
+# Features kept per stored centroid, used to place changed decks between re-clusterings
+CENTROID_FEATURES = 512
+
+# Cards listed as an archetype's signature
+SIGNATURE_CARDS = 5
+
+# Mana costs at or above this share one curve bucket
+CURVE_CAP = 7
+
+RESULT_COLUMNS = {'win': 'wins', 'loss': 'losses', 'draw': 'draws'}
+
+
+def _normalize(vector: Dict[str, float]) -> Dict[str, float]:
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    return {feature: weight / norm for feature, weight in vector.items()} if norm else {}
+
+
+def _dot(small: Dict[str, float], large: Dict[str, float]) -> float:
+    get = large.get
+    return sum(weight * get(feature, 0.0) for feature, weight in small.items())
+
+
+def deck_vector(cards: Dict[str, int], card_info: Dict[str, Tuple[int, str]]) -> Dict[str, float]:
+    """Unit feature vector of a deck: card counts plus its curve and type profile.
+
+    Card features are keyed by card id; profile features are prefixed with
+    '@'. The dot product of two vectors is their cosine similarity.
+    """
+    profile: Dict[str, float] = {}
+    for card_id, quantity in cards.items():
+        info = card_info.get(card_id)
+        if info is not None:
+            cost_key = f"@cost:{min(info[0], CURVE_CAP)}"
+            type_key = f"@type:{info[1]}"
+            profile[cost_key] = profile.get(cost_key, 0) + quantity
+            profile[type_key] = profile.get(type_key, 0) + quantity
+    card_part = _normalize({card_id: float(quantity) for card_id, quantity in cards.items() if quantity > 0})
+    if not profile:
+        return card_part
+    card_scale, profile_scale = math.sqrt(CARD_WEIGHT), math.sqrt(1 - CARD_WEIGHT)
+    vector = {feature: weight * card_scale for feature, weight in card_part.items()}
+    for feature, weight in _normalize(profile).items():
+        vector[feature] = weight * profile_scale
+    return vector
+
+
+def _prune(vector: Dict[str, float], size: int = CENTROID_FEATURES) -> Dict[str, float]:
+    if len(vector) > size:
+        vector = dict(sorted(vector.items(), key=lambda item: -item[1])[:size])
+    return _normalize(vector)
+
+
+def _centroid(members: Iterable[Dict[str, float]]) -> Dict[str, float]:
+    total: Dict[str, float] = {}
+    for vector in members:
+        for feature, weight in vector.items():
+            total[feature] = total.get(feature, 0.0) + weight
+    return _normalize(total)
+
+
+def _nearest(vector: Dict[str, float], centroids: List[Dict[str, float]]) -> Tuple[int, float]:
+    best, best_similarity = 0, -1.0
+    for index, centroid in enumerate(centroids):
+        similarity = _dot(vector, centroid)
+        if similarity > best_similarity:
+            best, best_similarity = index, similarity
+    return best, best_similarity
+
+
+def cluster_decks(vectors: Dict[str, Dict[str, float]], seed: int = 0,
+                  max_clusters: int = MAX_ARCHETYPES) -> Tuple[Dict[str, int], List[Dict[str, float]]]:
+    """Spherical k-means over deck vectors.
+
+    k starts at sqrt(decks / 2) (at most ``max_clusters``) with k-means++
+    seeding; clusters whose centroids end up nearly identical are merged
+    and empty ones dropped. Returns deck -> cluster index (largest cluster
+    first) and the centroids.
+    """
+    ids = sorted(vectors)
+    if not ids:
+        return {}, []
+    rng = random.Random(seed)
+    k = max(1, min(max_clusters, len(ids), round(math.sqrt(len(ids) / 2))))
+
+    centroids = [vectors[rng.choice(ids)]]
+    distance = {deck_id: 1.0 - _dot(vectors[deck_id], centroids[0]) for deck_id in ids}
+    while len(centroids) < k:
+        total = sum(distance.values())
+        if total <= 1e-9:
+            break
+        target = rng.random() * total
+        for deck_id in ids:
+            target -= distance[deck_id]
+            if target <= 0:
+                break
+        centroids.append(vectors[deck_id])
+        for other in ids:
+            distance[other] = min(distance[other], 1.0 - _dot(vectors[other], centroids[-1]))
+
+    assignment: Dict[str, int] = {}
+    for _ in range(KMEANS_ITERATIONS):
+        updated = {deck_id: _nearest(vectors[deck_id], centroids)[0] for deck_id in ids}
+        members: Dict[int, List[Dict[str, float]]] = {}
+        for deck_id, cluster in updated.items():
+            members.setdefault(cluster, []).append(vectors[deck_id])
+        centroids = [_centroid(members[cluster]) for cluster in sorted(members)]
+        if updated == assignment:
+            break
+        assignment = updated
+
+    # Merge near duplicates, most similar pair first
+    while len(centroids) > 1:
+        similarity, i, j = max((_dot(centroids[i], centroids[j]), i, j)
+                               for i in range(len(centroids)) for j in range(i + 1, len(centroids)))
+        if similarity < MERGE_SIMILARITY:
+            break
+        centroids[i] = _normalize({feature: centroids[i].get(feature, 0.0) + centroids[j].get(feature, 0.0)
+                                   for feature in set(centroids[i]) | set(centroids[j])})
+        del centroids[j]
+
+    assignment = {deck_id: _nearest(vectors[deck_id], centroids)[0] for deck_id in ids}
+    sizes: Dict[int, int] = {}
+    for cluster in assignment.values():
+        sizes[cluster] = sizes.get(cluster, 0) + 1
+    order = sorted(sizes, key=lambda cluster: (-sizes[cluster], cluster))
+    renumber = {cluster: index for index, cluster in enumerate(order)}
+    return ({deck_id: renumber[cluster] for deck_id, cluster in assignment.items()},
+            [centroids[cluster] for cluster in order])
+
+
+def curve_label(average_cost: float) -> str:
+    if average_cost <= 2.5:
+        return 'Aggro'
+    if average_cost <= 3.5:
+        return 'Midrange'
+    return 'Control'
+
+
+class MetaRollup(SQLiteStore):
+    """Materialized meta-game statistics per format.
+
+    refresh() compares decks with the copy kept in meta_decks and reads
+    games recorded since its last run. Changed decks move to the nearest
+    stored archetype and card counts are adjusted by their difference.
+    Game results are added to per-deck tallies, so archiving old games
+    leaves the rollups intact. A format is clustered from scratch the
+    first time, when RECLUSTER_FRACTION of its decks changed, or on
+    request. Simulated games are not counted.
+
+    Reads happen before the short write transaction, so the clustering
+    itself never holds SQLite's write lock.
+    """
+
+    def __init__(self, db_path: str = "deckwizard.db", card_db: Optional[CardDatabase] = None):
+        self.db_path = db_path
+        self.card_db = card_db or CardDatabase(db_path)
+        self._require_schema()
+        self._cache: Dict[str, Tuple[int, Dict]] = {}
+        self._cache_lock = threading.Lock()
+
+    # -- refresh ---------------------------------------------------------
+
+    def _card_info(self, conn, card_ids) -> Dict[str, Tuple[int, str]]:
+        card_ids = list(card_ids)
+        info = {}
+        for start in range(0, len(card_ids), 500):
+            chunk = card_ids[start:start + 500]
+            for card_id, cost, card_type in conn.execute(
+                    f"SELECT id, cost, card_type FROM cards WHERE id IN ({','.join('?' * len(chunk))})", chunk):
+                info[card_id] = (cost, card_type)
+        return info
+
+    @staticmethod
+    def _tally(rows) -> Dict[str, List[int]]:
+        """deck_id -> [games, wins, losses, draws] from (deck_id, result, count) rows"""
+        tallies: Dict[str, List[int]] = {}
+        for deck_id, result, count in rows:
+            tally = tallies.setdefault(deck_id, [0, 0, 0, 0])
+            tally[0] += count
+            column = RESULT_COLUMNS.get(result)
+            if column is not None:
+                tally[1 + ('wins', 'losses', 'draws').index(column)] += count
+        return tallies
+
+    def refresh(self, full: bool = False, formats: Optional[List[str]] = None) -> Dict:
+        """Bring the rollups up to date; returns what changed.
+
+        ``full`` re-clusters every format (or those in ``formats``).
+        """
+        start = datetime.now()
+        with self._connection() as conn:
+            watermark = self._state(conn, 'games_rowid')
+            latest_rowid = conn.execute('SELECT COALESCE(MAX(rowid), 0) FROM game_results').fetchone()[0]
+            changed = conn.execute('''
+                SELECT d.id, d.format, d.version, d.last_modified, d.cards,
+                       m.format, m.archetype_id, m.cards
+                FROM decks d LEFT JOIN meta_decks m ON m.deck_id = d.id
+                WHERE m.deck_id IS NULL OR m.format != d.format OR m.version IS NOT d.version
+                      OR m.last_modified IS NOT d.last_modified
+            ''').fetchall()
+            removed = conn.execute('''
+                SELECT deck_id, format, archetype_id, cards FROM meta_decks
+                WHERE deck_id NOT IN (SELECT id FROM decks)
+            ''').fetchall()
+            new_games = self._tally(conn.execute('''
+                SELECT deck_id, result, COUNT(*) FROM game_results
+                WHERE rowid > ? AND rowid <= ? AND simulated = 0
+                GROUP BY deck_id, result
+            ''', (watermark, latest_rowid)))
+            # Decks seen for the first time bring the games they played before
+            added = [row[0] for row in changed if row[5] is None]
+            backfill = []
+            for offset in range(0, len(added), 500):
+                chunk = added[offset:offset + 500]
+                backfill.extend(conn.execute(f'''
+                    SELECT deck_id, result, COUNT(*) FROM game_results
+                    WHERE deck_id IN ({','.join('?' * len(chunk))}) AND rowid <= ? AND simulated = 0
+                    GROUP BY deck_id, result
+                ''', chunk + [watermark]))
+            format_rows = {row[0]: row for row in conn.execute(
+                'SELECT format, decks, changed_since_cluster FROM meta_formats')}
+            archetype_rows = conn.execute('SELECT format, archetype_id, centroid FROM meta_archetypes').fetchall()
+            game_decks = {row[0]: row[1] for row in conn.execute(
+                'SELECT deck_id, format FROM meta_decks WHERE deck_id IN (SELECT value FROM json_each(?))',
+                (json.dumps(list(new_games)),))}
+
+            changes = [(deck_id, deck_format, version, last_modified, json.loads(cards or '{}'),
+                        old_format, old_archetype, json.loads(old_cards) if old_cards else None)
+                       for deck_id, deck_format, version, last_modified, cards,
+                       old_format, old_archetype, old_cards in changed]
+            # Formats whose decks are placed this time; games count for every
+            # format, since the watermark is shared
+            deck_formats = {change[1] for change in changes} | {change[5] for change in changes if change[5]}
+            deck_formats |= {row[1] for row in removed}
+            if full:
+                deck_formats |= set(format_rows)
+            if formats:
+                deck_formats &= set(formats)
+                changes = [change for change in changes if change[1] in deck_formats
+                           and (change[5] is None or change[5] in deck_formats)]
+                removed = [row for row in removed if row[1] in deck_formats]
+            touched = deck_formats | {game_decks[deck_id] for deck_id in new_games if deck_id in game_decks}
+
+            # Formats clustered from scratch this time
+            centroids: Dict[str, List[Tuple[int, Dict[str, float]]]] = {}
+            for deck_format, archetype_id, centroid in archetype_rows:
+                centroids.setdefault(deck_format, []).append((archetype_id, json.loads(centroid)))
+            change_counts: Dict[str, int] = {}
+            for change in changes:
+                change_counts[change[1]] = change_counts.get(change[1], 0) + 1
+            recluster = set()
+            for deck_format in deck_formats:
+                previous = format_rows.get(deck_format)
+                size = max(1, previous[1] if previous else 0)
+                pending = (previous[2] if previous else 0) + change_counts.get(deck_format, 0)
+                if (full or deck_format not in centroids or previous is None
+                        or pending > RECLUSTER_FRACTION * size):
+                    recluster.add(deck_format)
+
+            stored_cards: Dict[str, Dict[str, Dict[str, int]]] = {}
+            for deck_format in recluster:
+                stored_cards[deck_format] = {deck_id: json.loads(cards) for deck_id, cards in conn.execute(
+                    'SELECT deck_id, cards FROM meta_decks WHERE format = ?', (deck_format,))}
+            needed = set()
+            for change in changes:
+                needed.update(change[4])
+            for decks in stored_cards.values():
+                for cards in decks.values():
+                    needed.update(cards)
+            card_info = self._card_info(conn, needed)
+
+        # Cluster and place decks outside any transaction
+        removed_ids = {row[0] for row in removed}
+        for deck_format in recluster:
+            decks = stored_cards[deck_format]
+            for deck_id in removed_ids:
+                decks.pop(deck_id, None)
+            for change in changes:
+                if change[5] == deck_format and change[1] != deck_format:
+                    decks.pop(change[0], None)
+                if change[1] == deck_format:
+                    decks[change[0]] = change[4]
+        clusterings = {}
+        for deck_format in recluster:
+            vectors = {deck_id: deck_vector(cards, card_info) for deck_id, cards in stored_cards[deck_format].items()}
+            assignment, format_centroids = cluster_decks(vectors, seed=zlib.crc32(deck_format.encode()))
+            similarity = {deck_id: _dot(vectors[deck_id], format_centroids[cluster])
+                          for deck_id, cluster in assignment.items()}
+            clusterings[deck_format] = (assignment, format_centroids, similarity)
+
+        placements = {}
+        for change in changes:
+            deck_id, deck_format, cards = change[0], change[1], change[4]
+            if deck_format in recluster:
+                assignment, _, similarity = clusterings[deck_format]
+                placements[deck_id] = (assignment[deck_id] + 1, similarity[deck_id])
+            else:
+                vector = deck_vector(cards, card_info)
+                stored = centroids[deck_format]
+                index, similarity = _nearest(vector, [centroid for _, centroid in stored])
+                placements[deck_id] = (stored[index][0], similarity)
+
+        now = datetime.now().isoformat()
+        with self._connection() as conn:
+            self._write(conn, changes, removed, placements, recluster, clusterings, stored_cards,
+                        card_info, new_games, self._tally(backfill), touched, latest_rowid, now)
+
+        summary = {'formats': sorted(touched), 'reclustered': sorted(recluster), 'decks_changed': len(changes),
+                   'decks_removed': len(removed), 'games_added': sum(t[0] for t in new_games.values()),
+                   'elapsed_s': round((datetime.now() - start).total_seconds(), 3)}
+        logger.info("Meta rollups refreshed: %d formats, %d decks changed, %d re-clustered",
+                    len(touched), len(changes), len(recluster), extra={'event': 'meta_refreshed'})
+        return summary
+
+    def _write(self, conn, changes, removed, placements, recluster, clusterings, stored_cards,
+               card_info, new_games, backfill, touched, latest_rowid, now):
+        count_deltas: Dict[Tuple[str, int, str], List[int]] = {}
+
+        def adjust(deck_format, archetype_id, cards, sign):
+            if deck_format in recluster or archetype_id is None:
+                return
+            for card_id, quantity in cards.items():
+                delta = count_deltas.setdefault((deck_format, archetype_id, card_id), [0, 0])
+                delta[0] += sign
+                delta[1] += sign * quantity
+
+        for deck_id, old_format, old_archetype, old_cards in removed:
+            adjust(old_format, old_archetype, json.loads(old_cards), -1)
+        conn.executemany('DELETE FROM meta_decks WHERE deck_id = ?', [(row[0],) for row in removed])
+
+        for deck_id, deck_format, version, last_modified, cards, old_format, old_archetype, old_cards in changes:
+            archetype_id, similarity = placements[deck_id]
+            if old_cards is not None:
+                adjust(old_format, old_archetype, old_cards, -1)
+            adjust(deck_format, archetype_id, cards, 1)
+            tally = backfill.get(deck_id, [0, 0, 0, 0])
+            conn.execute('''
+                INSERT INTO meta_decks (deck_id, format, version, last_modified, cards, archetype_id, similarity,
+                                        games, wins, losses, draws)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (deck_id) DO UPDATE SET
+                    format = excluded.format, version = excluded.version,
+                    last_modified = excluded.last_modified, cards = excluded.cards,
+                    archetype_id = excluded.archetype_id, similarity = excluded.similarity
+            ''', (deck_id, deck_format, version, last_modified, json.dumps(cards, separators=(',', ':')),
+                  archetype_id, similarity, *tally))
+
+        conn.executemany('''
+            INSERT INTO meta_card_counts (format, archetype_id, card_id, decks, copies) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (format, archetype_id, card_id) DO UPDATE SET
+                decks = decks + excluded.decks, copies = copies + excluded.copies
+        ''', [(*key, *delta) for key, delta in count_deltas.items() if delta[0] or delta[1]])
+        conn.execute('DELETE FROM meta_card_counts WHERE decks <= 0')
+
+        for deck_format in recluster:
+            assignment, centroids, similarity = clusterings[deck_format]
+            conn.executemany('UPDATE meta_decks SET archetype_id = ?, similarity = ? WHERE deck_id = ?',
+                             [(cluster + 1, similarity[deck_id], deck_id) for deck_id, cluster in assignment.items()])
+            conn.execute('DELETE FROM meta_card_counts WHERE format = ?', (deck_format,))
+            counts: Dict[Tuple[int, str], List[int]] = {}
+            costs: Dict[int, List[int]] = {}
+            for deck_id, cards in stored_cards[deck_format].items():
+                archetype_id = assignment[deck_id] + 1
+                for card_id, quantity in cards.items():
+                    count = counts.setdefault((archetype_id, card_id), [0, 0])
+                    count[0] += 1
+                    count[1] += quantity
+                    if card_id in card_info and card_info[card_id][1] != 'Land':
+                        cost = costs.setdefault(archetype_id, [0, 0])
+                        cost[0] += card_info[card_id][0] * quantity
+                        cost[1] += quantity
+            conn.executemany('INSERT INTO meta_card_counts VALUES (?, ?, ?, ?, ?)',
+                             [(deck_format, archetype_id, card_id, *count)
+                              for (archetype_id, card_id), count in counts.items()])
+            conn.execute('DELETE FROM meta_archetypes WHERE format = ?', (deck_format,))
+            for index, centroid in enumerate(centroids):
+                archetype_id = index + 1
+                total_cost, copies = costs.get(archetype_id, (0, 0))
+                conn.execute('''
+                    INSERT INTO meta_archetypes (format, archetype_id, name, centroid) VALUES (?, ?, ?, ?)
+                ''', (deck_format, archetype_id, self._archetype_name(conn, deck_format, archetype_id,
+                                                                     total_cost / copies if copies else 0.0),
+                      json.dumps(_prune(centroid), separators=(',', ':'))))
+            conn.execute('''
+                INSERT INTO meta_formats (format, changed_since_cluster, clustered_at) VALUES (?, 0, ?)
+                ON CONFLICT (format) DO UPDATE SET changed_since_cluster = 0, clustered_at = excluded.clustered_at
+            ''', (deck_format, now))
+
+        conn.executemany('''
+            UPDATE meta_decks SET games = games + ?, wins = wins + ?, losses = losses + ?, draws = draws + ?
+            WHERE deck_id = ?
+        ''', [(*tally, deck_id) for deck_id, tally in new_games.items()])
+
+        change_counts: Dict[str, int] = {}
+        for change in changes:
+            if change[1] not in recluster:
+                change_counts[change[1]] = change_counts.get(change[1], 0) + 1
+        for deck_format in touched:
+            conn.execute('''
+                UPDATE meta_archetypes SET
+                    decks = COALESCE(t.decks, 0), games = COALESCE(t.games, 0), wins = COALESCE(t.wins, 0),
+                    losses = COALESCE(t.losses, 0), draws = COALESCE(t.draws, 0)
+                FROM (SELECT archetype_id, COUNT(*) AS decks, SUM(games) AS games, SUM(wins) AS wins,
+                             SUM(losses) AS losses, SUM(draws) AS draws
+                      FROM meta_decks WHERE format = ? GROUP BY archetype_id) AS t
+                WHERE meta_archetypes.format = ? AND meta_archetypes.archetype_id = t.archetype_id
+            ''', (deck_format, deck_format))
+            conn.execute('''
+                INSERT INTO meta_formats (format, decks, changed_since_cluster, computed_at)
+                VALUES (?, (SELECT COUNT(*) FROM meta_decks WHERE format = ?), ?, ?)
+                ON CONFLICT (format) DO UPDATE SET
+                    decks = excluded.decks, computed_at = excluded.computed_at,
+                    changed_since_cluster = changed_since_cluster + excluded.changed_since_cluster
+            ''', (deck_format, deck_format, change_counts.get(deck_format, 0), now))
+        conn.execute("DELETE FROM meta_formats WHERE decks = 0")
+        conn.execute("DELETE FROM meta_archetypes WHERE format NOT IN (SELECT format FROM meta_formats)")
+
+        self._set_state(conn, 'games_rowid', latest_rowid)
+        self._set_state(conn, 'generation', self._state(conn, 'generation') + 1)
+
+    def _archetype_name(self, conn, deck_format: str, archetype_id: int, average_cost: float) -> str:
+        """Curve label plus the archetype's most played card"""
+        row = conn.execute('''
+            SELECT card_id FROM meta_card_counts WHERE format = ? AND archetype_id = ?
+            ORDER BY decks DESC, copies DESC, card_id LIMIT 1
+        ''', (deck_format, archetype_id)).fetchone()
+        label = curve_label(average_cost)
+        if row is None:
+            return label
+        name = conn.execute('SELECT name FROM cards WHERE id = ?', (row[0],)).fetchone()
+        return f"{label} ({name[0] if name else row[0]})"
+
+    @staticmethod
+    def _state(conn, key: str) -> int:
+        row = conn.execute('SELECT value FROM meta_state WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else 0
+
+    @staticmethod
+    def _set_state(conn, key: str, value: int):
+        conn.execute('INSERT OR REPLACE INTO meta_state (key, value) VALUES (?, ?)', (key, value))
+
+    def start_scheduler(self, interval: float) -> threading.Event:
+        """Refresh every ``interval`` seconds on a daemon thread; set the returned event to stop"""
+        stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.error(f"Meta refresh failed: {e}")
+
+        threading.Thread(target=loop, name='meta-refresh', daemon=True).start()
+        return stop
+
+    # -- reports ---------------------------------------------------------
+
+    def formats(self) -> List[Dict]:
+        with self._connection() as conn:
+            rows = conn.execute('''
+                SELECT f.format, f.decks, f.computed_at, f.clustered_at, COUNT(a.archetype_id)
+                FROM meta_formats f LEFT JOIN meta_archetypes a ON a.format = f.format
+                GROUP BY f.format ORDER BY f.decks DESC
+            ''').fetchall()
+        return [{'format': deck_format, 'decks': decks, 'archetypes': archetypes,
+                 'computed_at': computed_at, 'clustered_at': clustered_at}
+                for deck_format, decks, computed_at, clustered_at, archetypes in rows]
+
+    def format_report(self, deck_format: str, top: int = 20) -> Optional[Dict]:
+        """Archetypes and most included cards of a format, or None if it has no decks.
+
+        Reports are cached per format until the next refresh changes the
+        rollups, so repeated dashboard loads cost one small query.
+        """
+        with self._connection() as conn:
+            generation = self._state(conn, 'generation')
+            cache_key = f"{deck_format}\x00{top}"
+            with self._cache_lock:
+                cached = self._cache.get(cache_key)
+            if cached is not None and cached[0] == generation:
+                return cached[1]
+
+            format_row = conn.execute('SELECT decks, computed_at, clustered_at FROM meta_formats WHERE format = ?',
+                                      (deck_format,)).fetchone()
+            if format_row is None:
+                return None
+            total_decks, computed_at, clustered_at = format_row
+            archetypes = conn.execute('''
+                SELECT archetype_id, name, decks, games, wins, losses, draws FROM meta_archetypes
+                WHERE format = ? ORDER BY decks DESC, archetype_id
+            ''', (deck_format,)).fetchall()
+            signatures: Dict[int, List[Tuple[str, int]]] = {}
+            for archetype_id, card_id, decks in conn.execute('''
+                SELECT archetype_id, card_id, decks FROM (
+                    SELECT archetype_id, card_id, decks,
+                           ROW_NUMBER() OVER (PARTITION BY archetype_id ORDER BY decks DESC, card_id) AS position
+                    FROM meta_card_counts WHERE format = ?
+                ) WHERE position <= ?
+            ''', (deck_format, SIGNATURE_CARDS)):
+                signatures.setdefault(archetype_id, []).append((card_id, decks))
+            cards = conn.execute('''
+                SELECT card_id, SUM(decks), SUM(copies) FROM meta_card_counts WHERE format = ?
+                GROUP BY card_id ORDER BY SUM(decks) DESC, card_id LIMIT ?
+            ''', (deck_format, top)).fetchall()
+
+        names = self.card_db.get_card_names({card_id for card_id, _, _ in cards} |
+                                            {card_id for entries in signatures.values() for card_id, _ in entries})
+        report = {
+            'format': deck_format,
+            'decks': total_decks,
+            'computed_at': computed_at,
+            'clustered_at': clustered_at,
+            'archetypes': [{
+                'archetype_id': archetype_id,
+                'name': name,
+                'decks': decks,
+                'share': decks / total_decks if total_decks else 0.0,
+                'games': games, 'wins': wins, 'losses': losses, 'draws': draws,
+                'win_rate': wins / games if games else None,
+                'signature': [{'card_id': card_id, 'name': names.get(card_id, card_id),
+                               'inclusion_rate': count / decks if decks else 0.0}
+                              for card_id, count in signatures.get(archetype_id, [])]
+            } for archetype_id, name, decks, games, wins, losses, draws in archetypes],
+            'cards': [{
+                'card_id': card_id, 'name': names.get(card_id, card_id), 'decks': decks,
+                'inclusion_rate': decks / total_decks if total_decks else 0.0,
+                'average_copies': copies / decks if decks else 0.0
+            } for card_id, decks, copies in cards]
+        }
+        with self._cache_lock:
+            self._cache[cache_key] = (generation, report)
+        return report
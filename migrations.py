@@ -0,0 +1,520 @@
+#!/usr/bin/env python3
+"""
+DeckWizard Schema Migrations
+Versioned schema changes tracked in PRAGMA user_version, applied once per
+deploy by the ``migrate`` command, with backfills of existing rows done in
+short chunks so the web app keeps serving during an upgrade
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+# The CLI runs deckwizard.py as __main__, so importing it from here would
+# execute the whole module a second time on every command's startup
+logger = logging.getLogger('deckwizard')
+
+# Rows updated per backfill transaction
+BACKFILL_CHUNK_ROWS = 5000
+
+# Pause between backfill chunks so web workers get the write lock in between
+BACKFILL_PAUSE_S = 0.01
+
+# After a migration holds the write lock longer than this (an index build on
+# a large table), pause as long so writers in their busy handler get a turn
+MIGRATION_PAUSE_S = 0.1
+
+# Progress of backfills that outlive the migration that started them
+BACKFILL_TABLE = '''
+    CREATE TABLE IF NOT EXISTS schema_backfills (
+        version INTEGER PRIMARY KEY,
+        table_name TEXT NOT NULL,
+        last_rowid INTEGER NOT NULL DEFAULT 0,
+        rows_updated INTEGER NOT NULL DEFAULT 0,
+        started TEXT NOT NULL,
+        finished TEXT
+    )
+'''
+
+
+class SchemaOutdatedError(RuntimeError):
+    """The database file has migrations that have not been applied yet"""
+
+
+@dataclass
+class Backfill:
+    """A data change made to existing rows after a migration's DDL.
+
+    ``update`` runs once per chunk with the chunk's exclusive lower and
+    inclusive upper rowid as parameters. It must only touch rows that still
+    need it, so a chunk interrupted half way can simply be run again.
+    """
+    table: str
+    update: str
+
+
+@dataclass
+class Migration:
+    """One schema version: DDL applied in a single transaction, then an optional backfill"""
+    version: int
+    description: str
+    statements: List[str] = field(default_factory=list)
+    upgrade: Optional[Callable[[sqlite3.Connection], None]] = None
+    backfill: Optional[Backfill] = None
+
+
+def add_column(table: str, column: str, definition: str) -> Callable[[sqlite3.Connection], None]:
+    """Upgrade step adding a column, unless an older build already added it"""
+    def upgrade(conn: sqlite3.Connection):
+        if column not in {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+    return upgrade
+
+
+# Never edit a migration that has shipped; append a new one instead
+MIGRATIONS = [
+    Migration(1, 'Cards, collection, decks and game results', [
+        '''
+        CREATE TABLE IF NOT EXISTS cards (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            cost INTEGER NOT NULL,
+            card_type TEXT NOT NULL,
+            rarity TEXT NOT NULL,
+            set_name TEXT NOT NULL,
+            description TEXT,
+            attack INTEGER,
+            health INTEGER,
+            abilities TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS collection (
+            card_id TEXT,
+            quantity INTEGER DEFAULT 1,
+            condition TEXT DEFAULT 'mint',
+            acquired_date TEXT,
+            FOREIGN KEY (card_id) REFERENCES cards (id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS decks (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            format TEXT NOT NULL,
+            cards TEXT,  -- JSON string
+            created_date TEXT,
+            last_modified TEXT,
+            win_rate REAL DEFAULT 0.0,
+            games_played INTEGER DEFAULT 0
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS game_results (
+            id TEXT PRIMARY KEY,
+            deck_id TEXT,
+            opponent_deck TEXT,
+            result TEXT,
+            game_length INTEGER,
+            date_played TEXT,
+            notes TEXT,
+            FOREIGN KEY (deck_id) REFERENCES decks (id)
+        )
+        ''',
+    ]),
+    Migration(2, 'Deck version for optimistic concurrency',
+              upgrade=add_column('decks', 'version', 'INTEGER NOT NULL DEFAULT 1')),
+    Migration(3, 'Deck revision log and per-deck game history index', [
+        '''
+        CREATE TABLE IF NOT EXISTS deck_revisions (
+            deck_id TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            created_date TEXT NOT NULL,
+            delta TEXT NOT NULL,  -- JSON card_id -> quantity change
+            snapshot TEXT,  -- full JSON card list on the first and every checkpoint revision
+            PRIMARY KEY (deck_id, version)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_game_results_deck_date
+        ON game_results (deck_id, date_played)
+        ''',
+    ]),
+    Migration(4, 'Flag for games played by the simulator',
+              upgrade=add_column('game_results', 'simulated', 'INTEGER NOT NULL DEFAULT 0')),
+    Migration(5, 'Tournaments, players and matches', [
+        '''
+        CREATE TABLE IF NOT EXISTS tournaments (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            type TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'active',
+            rounds_total INTEGER,
+            current_round INTEGER DEFAULT 0,
+            created_date TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS tournament_players (
+            tournament_id TEXT NOT NULL,
+            player TEXT NOT NULL,
+            seed INTEGER NOT NULL,
+            PRIMARY KEY (tournament_id, player),
+            FOREIGN KEY (tournament_id) REFERENCES tournaments (id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS tournament_matches (
+            tournament_id TEXT NOT NULL,
+            code TEXT NOT NULL,
+            bracket TEXT NOT NULL,
+            round INTEGER NOT NULL,
+            player1 TEXT,
+            player2 TEXT,
+            sources TEXT,  -- JSON list of slot sources for elimination matches
+            winner_to TEXT,
+            loser_to TEXT,
+            result TEXT,  -- 'player1', 'player2', 'draw' or 'skipped'
+            winner TEXT,
+            loser TEXT,
+            player1_game_id TEXT,
+            player2_game_id TEXT,
+            reported_date TEXT,
+            PRIMARY KEY (tournament_id, code),
+            FOREIGN KEY (tournament_id) REFERENCES tournaments (id)
+        )
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_tournament_matches_round
+        ON tournament_matches (tournament_id, round)
+        ''',
+    ]),
+    Migration(6, 'Matchup index for tournament projections', [
+        '''
+        CREATE INDEX IF NOT EXISTS idx_game_results_matchup
+        ON game_results (deck_id, opponent_deck)
+        ''',
+    ]),
+    Migration(7, 'Meta-game rollups', [
+        '''
+        CREATE TABLE IF NOT EXISTS meta_decks (
+            deck_id TEXT PRIMARY KEY,
+            format TEXT NOT NULL,
+            version INTEGER,
+            last_modified TEXT,
+            cards TEXT NOT NULL,  -- JSON card list as of the last refresh
+            archetype_id INTEGER,
+            similarity REAL,
+            games INTEGER NOT NULL DEFAULT 0,
+            wins INTEGER NOT NULL DEFAULT 0,
+            losses INTEGER NOT NULL DEFAULT 0,
+            draws INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_meta_decks_format
+        ON meta_decks (format, archetype_id)
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS meta_archetypes (
+            format TEXT NOT NULL,
+            archetype_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            centroid TEXT NOT NULL,  -- JSON feature -> weight
+            decks INTEGER NOT NULL DEFAULT 0,
+            games INTEGER NOT NULL DEFAULT 0,
+            wins INTEGER NOT NULL DEFAULT 0,
+            losses INTEGER NOT NULL DEFAULT 0,
+            draws INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (format, archetype_id)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS meta_card_counts (
+            format TEXT NOT NULL,
+            archetype_id INTEGER NOT NULL,
+            card_id TEXT NOT NULL,
+            decks INTEGER NOT NULL,
+            copies INTEGER NOT NULL,
+            PRIMARY KEY (format, archetype_id, card_id)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS meta_formats (
+            format TEXT PRIMARY KEY,
+            decks INTEGER NOT NULL DEFAULT 0,
+            changed_since_cluster INTEGER NOT NULL DEFAULT 0,
+            clustered_at TEXT,
+            computed_at TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS meta_state (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+        ''',
+    ]),
+    Migration(8, 'Format rules and deck legality', [
+        '''
+        CREATE TABLE IF NOT EXISTS format_rules (
+            format TEXT PRIMARY KEY,
+            min_deck_size INTEGER NOT NULL,
+            max_deck_size INTEGER,
+            max_copies INTEGER NOT NULL,
+            legal_sets TEXT,  -- JSON list of set names, NULL for every set
+            revision INTEGER NOT NULL DEFAULT 1,
+            updated TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS format_cards (
+            format TEXT NOT NULL,
+            card_id TEXT NOT NULL,
+            status TEXT NOT NULL,  -- banned, restricted or unlimited
+            PRIMARY KEY (format, card_id)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS deck_legality (
+            deck_id TEXT PRIMARY KEY,
+            format TEXT NOT NULL,
+            deck_version INTEGER,
+            revision INTEGER NOT NULL,
+            legal INTEGER NOT NULL,
+            problems TEXT NOT NULL,  -- JSON list of problem dicts
+            checked_at TEXT NOT NULL
+        )
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_deck_legality_format
+        ON deck_legality (format, legal)
+        ''',
+    ]),
+    Migration(9, 'Maintenance run log', [
+        '''
+        CREATE TABLE IF NOT EXISTS maintenance_log (
+            task TEXT NOT NULL,
+            started TEXT NOT NULL,
+            duration_s REAL NOT NULL,
+            ok INTEGER NOT NULL,
+            details TEXT  -- JSON outcome
+        )
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_maintenance_log_task
+        ON maintenance_log (task, started)
+        ''',
+    ]),
+    # NULL until backfilled; GameTracker derives it from win_rate when it meets one
+    Migration(10, 'Exact win counts per deck',
+              upgrade=add_column('decks', 'wins', 'INTEGER'),
+              backfill=Backfill('decks', '''
+                  UPDATE decks SET wins = CAST(ROUND(win_rate * games_played) AS INTEGER)
+                  WHERE rowid > ? AND rowid <= ? AND wins IS NULL
+              ''')),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+# Database files this process has found up to date
+_checked = set()
+_checked_lock = threading.Lock()
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    # Autocommit, so every BEGIN IMMEDIATE below is the whole transaction
+    return sqlite3.connect(db_path, isolation_level=None)
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def _has_table(conn: sqlite3.Connection, name: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone() is not None
+
+
+def _pending_backfills(conn: sqlite3.Connection) -> List[Dict]:
+    if not _has_table(conn, 'schema_backfills'):
+        return []
+    return [{'version': row[0], 'table': row[1], 'last_rowid': row[2], 'rows_updated': row[3], 'started': row[4]}
+            for row in conn.execute('''
+                SELECT version, table_name, last_rowid, rows_updated, started
+                FROM schema_backfills WHERE finished IS NULL ORDER BY version
+            ''')]
+
+
+def migration_status(db_path: str) -> Dict:
+    """Schema version of a file, the migrations it still needs and unfinished backfills"""
+    conn = _connect(db_path)
+    try:
+        version = schema_version(conn)
+        return {
+            'path': db_path,
+            'version': version,
+            'latest': SCHEMA_VERSION,
+            'pending': [{'version': m.version, 'description': m.description}
+                        for m in MIGRATIONS if m.version > version],
+            'backfills': _pending_backfills(conn),
+        }
+    finally:
+        conn.close()
+
+
+def _apply(conn: sqlite3.Connection, migration: Migration) -> bool:
+    """Run one migration's DDL and version bump in one transaction; False if already applied"""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        # Another process may have migrated while we waited for the lock
+        if schema_version(conn) >= migration.version:
+            conn.execute('ROLLBACK')
+            return False
+        for statement in migration.statements:
+            conn.execute(statement)
+        if migration.upgrade:
+            migration.upgrade(conn)
+        if migration.backfill:
+            conn.execute(BACKFILL_TABLE)
+            conn.execute('''
+                INSERT OR REPLACE INTO schema_backfills (version, table_name, started) VALUES (?, ?, ?)
+            ''', (migration.version, migration.backfill.table, datetime.now().isoformat()))
+        conn.execute(f'PRAGMA user_version = {migration.version}')
+        conn.execute('COMMIT')
+        return True
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+
+
+def run_backfill(conn: sqlite3.Connection, version: int, chunk_rows: int = BACKFILL_CHUNK_ROWS,
+                 pause: float = BACKFILL_PAUSE_S,
+                 progress: Optional[Callable[[int, int], None]] = None) -> int:
+    """Continue the backfill of migration ``version`` from its saved position.
+
+    Each chunk of ``chunk_rows`` rowids is updated and recorded in its own
+    short transaction, so writers wait for one chunk at most and an
+    interrupted backfill resumes where it stopped. Rows added while it runs
+    are picked up as long as they land past the current position. Returns
+    the rows updated by this call; ``progress(rows_updated, last_rowid)`` is
+    called after each chunk.
+    """
+    backfill = next(m.backfill for m in MIGRATIONS if m.version == version)
+    updated = 0
+    while True:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT last_rowid, rows_updated, finished FROM schema_backfills WHERE version = ?',
+                               (version,)).fetchone()
+            if row is None or row[2] is not None:
+                conn.execute('COMMIT')
+                return updated
+            low, total = row[0], row[1]
+            high = conn.execute(f'''
+                SELECT MAX(rowid) FROM (SELECT rowid FROM {backfill.table} WHERE rowid > ? ORDER BY rowid LIMIT ?)
+            ''', (low, chunk_rows)).fetchone()[0]
+            if high is None:
+                conn.execute('UPDATE schema_backfills SET finished = ? WHERE version = ?',
+                             (datetime.now().isoformat(), version))
+                conn.execute('COMMIT')
+                logger.info("Backfill for schema version %d finished (%d rows)", version, total,
+                            extra={'event': 'backfill_finished'})
+                return updated
+            changed = conn.execute(backfill.update, (low, high)).rowcount
+            conn.execute('UPDATE schema_backfills SET last_rowid = ?, rows_updated = rows_updated + ? WHERE version = ?',
+                         (high, changed, version))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        updated += changed
+        if progress:
+            progress(total + changed, high)
+        if pause:
+            time.sleep(pause)
+
+
+def migrate(db_path: str, target: Optional[int] = None, chunk_rows: int = BACKFILL_CHUNK_ROWS,
+            pause: float = BACKFILL_PAUSE_S, backfill: bool = True,
+            progress: Optional[Callable[[int, int, int], None]] = None) -> Dict:
+    """Bring a database file up to ``target`` (the latest version by default).
+
+    Every migration's DDL and version bump commit together, so a failure
+    leaves the file at the last complete version. Backfills run afterwards
+    in chunks while the application keeps using the new schema; with
+    ``backfill=False`` they are only registered, for a later run to finish.
+    ``progress(version, rows_updated, last_rowid)`` reports backfill chunks.
+    """
+    target = SCHEMA_VERSION if target is None else target
+    if not 0 <= target <= SCHEMA_VERSION:
+        raise ValueError(f"Unknown schema version {target} (latest is {SCHEMA_VERSION})")
+
+    conn = _connect(db_path)
+    try:
+        start_version = schema_version(conn)
+        if start_version > SCHEMA_VERSION:
+            raise RuntimeError(f"{db_path} is at schema version {start_version}, newer than this "
+                               f"DeckWizard ({SCHEMA_VERSION})")
+        applied = []
+        for migration in MIGRATIONS:
+            if start_version < migration.version <= target:
+                started = time.perf_counter()
+                if _apply(conn, migration):
+                    elapsed = time.perf_counter() - started
+                    applied.append({'version': migration.version, 'description': migration.description,
+                                    'elapsed_s': round(elapsed, 3)})
+                    logger.info("Migrated %s to schema version %d: %s", db_path, migration.version,
+                                migration.description, extra={'event': 'schema_migrated'})
+                    if elapsed > MIGRATION_PAUSE_S:
+                        time.sleep(MIGRATION_PAUSE_S)
+
+        backfilled = {}
+        if backfill:
+            for pending in _pending_backfills(conn):
+                version = pending['version']
+                report = (lambda rows, rowid, version=version: progress(version, rows, rowid)) if progress else None
+                backfilled[version] = run_backfill(conn, version, chunk_rows, pause, report)
+
+        return {'path': db_path, 'from_version': start_version, 'version': schema_version(conn),
+                'applied': applied, 'backfilled': backfilled,
+                'pending_backfills': [b['version'] for b in _pending_backfills(conn)]}
+    finally:
+        conn.close()
+
+
+def require_current(db_path: str):
+    """Check that a file is migrated before a store uses it; checked once per process.
+
+    A new, empty file is given the full schema on the spot. Files behind
+    SCHEMA_VERSION raise SchemaOutdatedError: existing databases are only
+    upgraded by the ``migrate`` command, run once per deploy, never as a
+    side effect of constructing a store. Files migrated by a newer build
+    are accepted, since migrations only add to the schema.
+    """
+    key = os.path.abspath(db_path)
+    if key in _checked:
+        return
+    with _checked_lock:
+        if key in _checked:
+            return
+        conn = _connect(db_path)
+        try:
+            version = schema_version(conn)
+            empty = version == 0 and conn.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()[0] == 0
+        finally:
+            conn.close()
+        if empty:
+            migrate(db_path)
+            logger.info("Database initialized successfully")
+        elif version < SCHEMA_VERSION:
+            raise SchemaOutdatedError(f"{db_path} is at schema version {version} but this DeckWizard needs "
+                                      f"{SCHEMA_VERSION}; run 'python deckwizard.py migrate'")
+        elif version > SCHEMA_VERSION:
+            logger.warning("%s is at schema version %d, newer than this DeckWizard (%d)",
+                           db_path, version, SCHEMA_VERSION)
+        _checked.add(key)
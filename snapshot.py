@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+DeckWizard Columnar Snapshots
+Writes cards, decks, deck contents and game history to a directory of
+memory-mappable column files, appends new games incrementally and runs
+win rate and matchup queries straight on the mapped columns
+"""
+
+import json
+import mmap
+import os
+import sqlite3
+import struct
+import sys
+from array import array
+from datetime import datetime
+from typing import Dict, List
+
+from columnar import LOAD_FETCH_SIZE, MISSING, CardTable, DictionaryColumn, GameTable, np
+from deckwizard import logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet snapshots are optional; .npy columns need nothing extra
+    pa = pq = None
+
+SNAPSHOT_FORMATS = ('npy', 'parquet')
+SNAPSHOT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+
+# Fixed .npy header size, so appends can rewrite the row count in place
+NPY_HEADER_SIZE = 128
+NPY_MAGIC = b'\x93NUMPY\x01\x00'
+NPY_DTYPES = {'b': '|i1', 'h': '<i2', 'i': '<i4', 'q': '<i8', 'd': '<f8'}
+NPY_TYPECODES = {descr: typecode for typecode, descr in NPY_DTYPES.items()}
+
+# Column layout of every table: (column, typecode, dictionary encoded)
+SNAPSHOT_TABLES = {
+    'cards': (('id', 'i', True), ('name', 'i', True), ('cost', 'h', False),
+              ('card_type', 'i', True), ('rarity', 'i', True), ('set_name', 'i', True),
+              ('attack', 'h', False), ('health', 'h', False)),
+    'decks': (('id', 'i', True), ('name', 'i', True), ('format', 'i', True),
+              ('win_rate', 'd', False), ('games_played', 'i', False)),
+    # deck and card are row positions in the decks and cards tables (MISSING for unknown cards)
+    'deck_cards': (('deck', 'i', False), ('card', 'i', False), ('quantity', 'h', False)),
+    'games': (('deck', 'i', True), ('opponent', 'i', True), ('result', 'b', False),
+              ('game_length', 'i', False), ('day', 'i', True)),
+}
+
+
+def _npy_header(typecode: str, rows: int) -> bytes:
+    header = "{'descr': '%s', 'fortran_order': False, 'shape': (%d,), }" % (NPY_DTYPES[typecode], rows)
+    header = header.ljust(NPY_HEADER_SIZE - len(NPY_MAGIC) - 3) + '\n'
+    return NPY_MAGIC + struct.pack('<H', len(header)) + header.encode('latin1')
+
+
+def _column_bytes(values: array) -> bytes:
+    if sys.byteorder == 'big' and values.itemsize > 1:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_npy(path: str, values: array):
+    """Write a 1-D array.array as a .npy file (no NumPy required)"""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as handle:
+        handle.write(_npy_header(values.typecode, len(values)))
+        handle.write(_column_bytes(values))
+    os.replace(temp_path, path)
+
+
+def append_npy(path: str, values: array, rows: int):
+    """Append to a .npy file written by write_npy() holding ``rows`` rows.
+
+    Anything past ``rows`` (left by an interrupted append) is discarded
+    first, so the manifest row count stays authoritative.
+    """
+    with open(path, 'r+b') as handle:
+        handle.truncate(NPY_HEADER_SIZE + rows * values.itemsize)
+        handle.seek(0, os.SEEK_END)
+        handle.write(_column_bytes(values))
+        handle.seek(0)
+        handle.write(_npy_header(values.typecode, rows + len(values)))
+
+
+def map_npy(path: str, rows: int):
+    """Read-only memory map of the first ``rows`` values of a .npy column.
+
+    Returns a NumPy memmap when NumPy is available, otherwise a typed
+    memoryview over an mmap of the file.
+    """
+    with open(path, 'rb') as handle:
+        prefix = handle.read(10)
+        if prefix[:6] != NPY_MAGIC[:6]:
+            raise ValueError(f"Not a .npy file: {path}")
+        header_size = 10 + struct.unpack('<H', prefix[8:10])[0]
+        header = handle.read(header_size - 10).decode('latin1')
+        descr = header.split("'descr': '", 1)[1].split("'", 1)[0]
+        typecode = NPY_TYPECODES.get(descr)
+        if typecode is None:
+            raise ValueError(f"Unsupported column type {descr} in {path}")
+
+        if np is not None:
+            if not rows:
+                return np.empty(0, dtype=descr)
+            return np.memmap(path, dtype=descr, mode='r', offset=header_size, shape=(rows,))
+        if not rows:
+            return memoryview(array(typecode))
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        itemsize = array(typecode).itemsize
+        return memoryview(mapped)[header_size:header_size + rows * itemsize].cast(typecode)
+
+
+def _arrow_array(values: array):
+    """Zero-copy Arrow array over an array.array column"""
+    arrow_type = {'b': pa.int8(), 'h': pa.int16(), 'i': pa.int32(), 'q': pa.int64(), 'd': pa.float64()}
+    return pa.Array.from_buffers(arrow_type[values.typecode], len(values),
+                                 [None, pa.py_buffer(_column_bytes(values))])
+
+
+def _identity(values: List[str]) -> DictionaryColumn:
+    """Dictionary column for a unique key (codes are the row positions)"""
+    return DictionaryColumn(values, array('i', range(len(values))))
+
+
+def _read_catalog(db_path: str):
+    """Columns of the cards, decks and deck_cards tables"""
+    cards = CardTable.from_db(db_path)
+    positions = {card_id: i for i, card_id in enumerate(cards.ids)}
+    names = DictionaryColumn()
+    for name in cards.names:
+        names.append(name)
+    decks = {name: DictionaryColumn() for name in ('id', 'name', 'format')}
+    win_rate, games_played = array('d'), array('i')
+    deck_cards = {'deck': array('i'), 'card': array('i'), 'quantity': array('h')}
+
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.execute('SELECT id, name, format, cards, win_rate, games_played FROM decks ORDER BY rowid')
+        while True:
+            rows = cursor.fetchmany(LOAD_FETCH_SIZE)
+            if not rows:
+                break
+            for deck_id, name, deck_format, contents, rate, played in rows:
+                position = len(win_rate)
+                decks['id'].append(deck_id)
+                decks['name'].append(name)
+                decks['format'].append(deck_format)
+                win_rate.append(rate or 0.0)
+                games_played.append(played or 0)
+                for card_id, quantity in (json.loads(contents) if contents else {}).items():
+                    deck_cards['deck'].append(position)
+                    deck_cards['card'].append(positions.get(card_id, MISSING))
+                    deck_cards['quantity'].append(quantity)
+    finally:
+        conn.close()
+
+    return {
+        'cards': {
+            'id': _identity(cards.ids), 'name': names,
+            'cost': cards.cost, 'card_type': cards.card_type, 'rarity': cards.rarity,
+            'set_name': cards.set_name, 'attack': cards.attack, 'health': cards.health,
+        },
+        'decks': {**decks, 'win_rate': win_rate, 'games_played': games_played},
+        'deck_cards': deck_cards,
+    }
+
+
+def _game_columns(games: GameTable) -> Dict:
+    return {'deck': games.deck, 'opponent': games.opponent, 'result': games.result,
+            'game_length': games.game_length, 'day': games.day}
+
+
+class SnapshotWriter:
+    """Creates and incrementally extends snapshot directories.
+
+    A snapshot holds one file per column plus ``manifest.json`` with row
+    counts, dictionaries of string columns and the highest game_results
+    rowid included. The default ``npy`` format stores ``<table>.<column>.npy``
+    files (dictionary-encoded strings as int32 codes, values listed in the
+    manifest) that NumPy, or the stdlib, can memory-map. The ``parquet``
+    format writes one Parquet file per table (and per appended batch of
+    games) for Arrow-based tools, and needs pyarrow.
+    """
+
+    def __init__(self, db_path: str = "deckwizard.db"):
+        self.db_path = db_path
+
+    def create(self, path: str, snapshot_format: str = 'npy') -> Dict:
+        """Write a full snapshot of the database to ``path``"""
+        if snapshot_format not in SNAPSHOT_FORMATS:
+            raise ValueError(f"Unknown snapshot format: {snapshot_format}")
+        if snapshot_format == 'parquet' and pq is None:
+            raise RuntimeError("Parquet snapshots need pyarrow (pip install pyarrow)")
+        os.makedirs(path, exist_ok=True)
+
+        games = GameTable.from_db(self.db_path)
+        tables = {**_read_catalog(self.db_path), 'games': _game_columns(games)}
+        now = datetime.now().isoformat()
+        manifest = {
+            'version': SNAPSHOT_VERSION, 'format': snapshot_format, 'source': os.path.abspath(self.db_path),
+            'created': now, 'updated': now, 'games_last_rowid': games.last_rowid,
+            'tables': {}
+        }
+        for table, columns in tables.items():
+            if snapshot_format == 'npy':
+                manifest['tables'][table] = self._write_npy_table(path, table, columns)
+            else:
+                manifest['tables'][table] = self._write_parquet_table(path, table, columns, f'{table}.parquet')
+
+        self._save_manifest(path, manifest)
+        logger.info("Wrote %s snapshot to %s (%d games)", snapshot_format, path, len(games),
+                    extra={'event': 'snapshot_created'})
+        return manifest
+
+    def append(self, path: str) -> int:
+        """Add games recorded since the snapshot was taken; returns how many.
+
+        Game columns are extended in place (their dictionaries only grow, so
+        existing codes stay valid); cards, decks and deck contents are small
+        and are rewritten.
+        """
+        manifest = load_manifest(path)
+        snapshot_format = manifest['format']
+        if snapshot_format == 'parquet' and pq is None:
+            raise RuntimeError("Parquet snapshots need pyarrow (pip install pyarrow)")
+
+        games = GameTable()
+        games.last_rowid = manifest['games_last_rowid']
+        games_manifest = manifest['tables']['games']
+        if snapshot_format == 'npy':
+            for name in ('deck', 'opponent', 'day'):
+                setattr(games, name, DictionaryColumn(games_manifest['columns'][name]['dictionary']))
+        added = games.append_from_db(self.db_path)
+
+        catalog = _read_catalog(self.db_path)
+        for table, columns in catalog.items():
+            if snapshot_format == 'npy':
+                manifest['tables'][table] = self._write_npy_table(path, table, columns)
+            else:
+                manifest['tables'][table] = self._write_parquet_table(path, table, columns, f'{table}.parquet')
+
+        if added:
+            columns = _game_columns(games)
+            if snapshot_format == 'npy':
+                rows = games_manifest['rows']
+                for name, typecode, encoded in SNAPSHOT_TABLES['games']:
+                    column = columns[name]
+                    append_npy(os.path.join(path, f'games.{name}.npy'),
+                               column.codes if encoded else column, rows)
+                    if encoded:
+                        games_manifest['columns'][name]['dictionary'] = column.values
+                games_manifest['rows'] = rows + added
+            else:
+                part = f"games.{len(games_manifest['files']):05d}.parquet"
+                written = self._write_parquet_table(path, 'games', columns, part)
+                games_manifest['files'].extend(written['files'])
+                games_manifest['rows'] += added
+            manifest['games_last_rowid'] = games.last_rowid
+
+        manifest['updated'] = datetime.now().isoformat()
+        self._save_manifest(path, manifest)
+        logger.info("Appended %d games to snapshot %s", added, path, extra={'event': 'snapshot_appended'})
+        return added
+
+    def _write_npy_table(self, path: str, table: str, columns: Dict) -> Dict:
+        described = {}
+        rows = 0
+        for name, typecode, encoded in SNAPSHOT_TABLES[table]:
+            column = columns[name]
+            values = column.codes if encoded else column
+            write_npy(os.path.join(path, f'{table}.{name}.npy'), values)
+            described[name] = {'dtype': NPY_DTYPES[typecode]}
+            if encoded:
+                described[name]['dictionary'] = column.values
+            rows = len(values)
+        return {'rows': rows, 'columns': described}
+
+    def _write_parquet_table(self, path: str, table: str, columns: Dict, filename: str) -> Dict:
+        arrays, names = [], []
+        rows = 0
+        for name, typecode, encoded in SNAPSHOT_TABLES[table]:
+            column = columns[name]
+            if encoded:
+                arrays.append(pa.DictionaryArray.from_arrays(_arrow_array(column.codes),
+                                                             pa.array(column.values, type=pa.string())))
+                rows = len(column.codes)
+            else:
+                arrays.append(_arrow_array(column))
+                rows = len(column)
+            names.append(name)
+        pq.write_table(pa.Table.from_arrays(arrays, names=names), os.path.join(path, filename))
+        return {'rows': rows, 'files': [filename]}
+
+    def _save_manifest(self, path: str, manifest: Dict):
+        temp_path = os.path.join(path, MANIFEST_NAME + '.tmp')
+        with open(temp_path, 'w') as handle:
+            json.dump(manifest, handle)
+        os.replace(temp_path, os.path.join(path, MANIFEST_NAME))
+
+
+def load_manifest(path: str) -> Dict:
+    manifest_path = os.path.join(path, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        raise ValueError(f"No snapshot found at {path}")
+    with open(manifest_path) as handle:
+        manifest = json.load(handle)
+    if manifest.get('version') != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version: {manifest.get('version')}")
+    return manifest
+
+
+class Snapshot:
+    """Read-only view of an ``npy`` snapshot with memory-mapped columns.
+
+    games() and cards() wrap the mapped columns in GameTable and CardTable,
+    so their win rate, matchup and filter methods run directly on the
+    files without loading them into memory.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.manifest = load_manifest(path)
+        if self.manifest['format'] != 'npy':
+            raise ValueError("Only npy snapshots can be memory-mapped; read Parquet snapshots with pyarrow")
+
+    def rows(self, table: str) -> int:
+        return self.manifest['tables'][table]['rows']
+
+    def column(self, table: str, name: str):
+        """Mapped column (dictionary codes for string columns)"""
+        return map_npy(os.path.join(self.path, f'{table}.{name}.npy'), self.rows(table))
+
+    def dictionary(self, table: str, name: str) -> List[str]:
+        return self.manifest['tables'][table]['columns'][name]['dictionary']
+
+    def encoded(self, table: str, name: str) -> DictionaryColumn:
+        return DictionaryColumn(self.dictionary(table, name), self.column(table, name))
+
+    def games(self) -> GameTable:
+        games = GameTable()
+        for name in ('deck', 'opponent', 'day'):
+            setattr(games, name, self.encoded('games', name))
+        games.result = self.column('games', 'result')
+        games.game_length = self.column('games', 'game_length')
+        games.last_rowid = self.manifest['games_last_rowid']
+        return games
+
+    def cards(self) -> CardTable:
+        cards = CardTable()
+        cards.ids = self.dictionary('cards', 'id')
+        cards.names = self.encoded('cards', 'name')
+        for name in ('cost', 'attack', 'health'):
+            setattr(cards, name, self.column('cards', name))
+        for name in ('card_type', 'rarity', 'set_name'):
+            setattr(cards, name, self.encoded('cards', name))
+        return cards
+
+    def deck_ids(self) -> List[str]:
+        return self.dictionary('decks', 'id')
+
+    def deck_cards(self, deck_id: str) -> Dict[str, int]:
+        """Card id -> quantity for one deck, read from the mapped contents"""
+        deck_ids = self.deck_ids()
+        try:
+            position = deck_ids.index(deck_id)
+        except ValueError:
+            return {}
+        decks, cards = self.column('deck_cards', 'deck'), self.column('deck_cards', 'card')
+        quantities = self.column('deck_cards', 'quantity')
+        card_ids = self.dictionary('cards', 'id')
+        if np is not None:
+            rows = np.flatnonzero(decks == position).tolist()
+        else:
+            rows = [i for i, deck in enumerate(decks) if deck == position]
+        return {card_ids[cards[i]]: int(quantities[i]) for i in rows if cards[i] != MISSING}
+
+    def deck_records(self) -> Dict[str, Dict]:
+        return self.games().deck_records()
+
+    def matchups(self, deck_id: str) -> Dict[str, Dict]:
+        return self.games().matchups(deck_id)
+
+    def summary(self) -> Dict:
+        return {
+            'path': self.path, 'format': self.manifest['format'], 'source': self.manifest['source'],
+            'updated': self.manifest['updated'], 'games_last_rowid': self.manifest['games_last_rowid'],
+            'rows': {table: described['rows'] for table, described in self.manifest['tables'].items()},
+        }
+
+
+def snapshot_size(path: str) -> int:
+    """Total bytes of the files in a snapshot directory"""
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
@@ -1,22 +1,249 @@
 // DeckWizard Web Interface JavaScript
+
+// Client data layer: GET requests share in-flight promises and are cached by
+// URL with their ETag, so repeated loads revalidate with If-None-Match and a
+// 304 reuses the cached body instead of downloading and parsing it again
+class ApiClient {
+    constructor(baseUrl, options = {}) {
+        this.baseUrl = baseUrl;
+        this.maxEntries = options.maxEntries || 100;
+        this.freshMs = options.freshMs ?? 2000;
+        this.cache = new Map();
+        this.inFlight = new Map();
+    }
+
+    url(endpoint, params = null) {
+        let url = this.baseUrl + endpoint;
+        if (params) {
+            const searchParams = new URLSearchParams(
+                Object.entries(params).filter(([, value]) => value !== '' && value !== null && value !== undefined)
+            );
+            const query = searchParams.toString();
+            if (query) {
+                url += '?' + query;
+            }
+        }
+        return url;
+    }
+
+    get(endpoint, params = null) {
+        const url = this.url(endpoint, params);
+        const cached = this.cache.get(url);
+        if (cached && Date.now() - cached.checkedAt < this.freshMs) {
+            return Promise.resolve(cached.data);
+        }
+
+        // Concurrent callers of the same URL wait on one request
+        if (this.inFlight.has(url)) {
+            return this.inFlight.get(url);
+        }
+        const request = this.revalidate(url, cached).finally(() => this.inFlight.delete(url));
+        this.inFlight.set(url, request);
+        return request;
+    }
+
+    async revalidate(url, cached) {
+        const headers = { 'Accept': 'application/json' };
+        if (cached && cached.etag) {
+            headers['If-None-Match'] = cached.etag;
+        }
+
+        // no-store keeps the browser cache from answering the conditional request itself
+        const response = await fetch(url, { headers: headers, cache: 'no-store' });
+        if (response.status === 304 && cached) {
+            cached.checkedAt = Date.now();
+            this.remember(url, cached);
+            return cached.data;
+        }
+        if (!response.ok) {
+            throw new Error(`API call failed: ${response.statusText}`);
+        }
+
+        const data = await response.json();
+        this.remember(url, { data: data, etag: response.headers.get('ETag'), checkedAt: Date.now() });
+        return data;
+    }
+
+    remember(url, entry) {
+        // Map keeps insertion order, so re-inserting makes this the most recent entry
+        this.cache.delete(url);
+        this.cache.set(url, entry);
+        while (this.cache.size > this.maxEntries) {
+            this.cache.delete(this.cache.keys().next().value);
+        }
+    }
+
+    // Force revalidation of cached responses whose endpoint starts with prefix
+    invalidate(prefix = '') {
+        const start = this.baseUrl + prefix;
+        this.cache.forEach((entry, url) => {
+            if (url.startsWith(start)) {
+                entry.checkedAt = 0;
+            }
+        });
+    }
+
+    async send(endpoint, method, data = null) {
+        const options = {
+            method: method,
+            headers: {
+                'Content-Type': 'application/json'
+            }
+        };
+        if (data) {
+            options.body = JSON.stringify(data);
+        }
+
+        const response = await fetch(this.url(endpoint), options);
+        // Writes make every cached response suspect: keep the ETags but revalidate on next use
+        this.invalidate();
+        if (!response.ok) {
+            throw new Error(`API call failed: ${response.statusText}`);
+        }
+        return await response.json();
+    }
+}
+
+// Postpone calls to fn until wait ms have passed without another call
+function debounce(fn, wait) {
+    let timer = null;
+    return (...args) => {
+        clearTimeout(timer);
+        timer = setTimeout(() => fn(...args), wait);
+    };
+}
+
+// Renders only the rows of a large grid that are in (or near) the viewport.
+// Items get a fixed row height; the spacer keeps the scrollbar true to the
+// full list and the visible slice is translated into place
+class VirtualGrid {
+    constructor(container, renderItem, options = {}) {
+        this.container = container;
+        this.renderItem = renderItem;
+        this.rowHeight = options.rowHeight || 220;
+        this.gap = options.gap || 24;
+        this.overscan = options.overscan ?? 2;
+        this.items = [];
+        this.range = null;
+        this.frame = null;
+
+        this.spacer = document.createElement('div');
+        this.spacer.style.position = 'relative';
+        this.viewport = document.createElement('div');
+        this.viewport.style.cssText = `position: absolute; top: 0; left: 0; right: 0; display: grid; gap: ${this.gap}px;`;
+        this.spacer.appendChild(this.viewport);
+
+        this.container.addEventListener('scroll', () => this.schedule(), { passive: true });
+        window.addEventListener('resize', () => this.schedule(true));
+    }
+
+    // Same breakpoints as the grid-cols classes of the other grids
+    columns() {
+        const width = window.innerWidth;
+        return width >= 1280 ? 4 : width >= 1024 ? 3 : width >= 768 ? 2 : 1;
+    }
+
+    setItems(items, emptyHtml = '') {
+        this.items = items;
+        this.range = null;
+        this.container.scrollTop = 0;
+        if (items.length === 0) {
+            this.container.innerHTML = emptyHtml;
+            return;
+        }
+        if (this.spacer.parentNode !== this.container) {
+            this.container.replaceChildren(this.spacer);
+        }
+        this.render();
+    }
+
+    schedule(force = false) {
+        if (force) {
+            this.range = null;
+        }
+        if (this.frame === null) {
+            this.frame = requestAnimationFrame(() => {
+                this.frame = null;
+                this.render();
+            });
+        }
+    }
+
+    render() {
+        if (this.items.length === 0) {
+            return;
+        }
+        const columns = this.columns();
+        const rowSpan = this.rowHeight + this.gap;
+        const totalRows = Math.ceil(this.items.length / columns);
+        const top = this.container.scrollTop;
+        const first = Math.max(0, Math.floor(top / rowSpan) - this.overscan);
+        const last = Math.min(totalRows, Math.ceil((top + this.container.clientHeight) / rowSpan) + this.overscan);
+
+        const range = `${columns}:${first}:${last}`;
+        if (range === this.range) {
+            return;
+        }
+        this.range = range;
+
+        this.spacer.style.height = `${totalRows * rowSpan - this.gap}px`;
+        this.viewport.style.gridTemplateColumns = `repeat(${columns}, minmax(0, 1fr))`;
+        this.viewport.style.gridAutoRows = `${this.rowHeight}px`;
+        this.viewport.style.transform = `translateY(${first * rowSpan}px)`;
+        this.viewport.replaceChildren(
+            ...this.items.slice(first * columns, last * columns).map(item => this.renderItem(item))
+        );
+    }
+}
+
 class DeckWizardApp {
     constructor() {
         this.apiBase = '/api';
+        this.api = new ApiClient(this.apiBase);
         this.cards = [];
         this.decks = [];
         this.currentDeck = null;
+        this.cardsGrid = null;
+        this.searchSequence = 0;
         
         this.init();
     }
 
     async init() {
+        this.cardsGrid = new VirtualGrid(document.getElementById('cards-grid'), card => this.createCardElement(card));
         this.setupEventListeners();
-        await this.loadDashboardData();
-        await this.loadCards();
-        await this.loadDecks();
+        this.setupEventStream();
+        // Dashboard counts reuse the card and deck requests instead of fetching twice
+        await Promise.all([this.loadCards(), this.loadDecks(), this.loadDashboardData()]);
         this.setupCharts();
     }
 
+    // Live updates pushed by the server instead of polling deck statistics
+    setupEventStream() {
+        if (!window.EventSource) {
+            return;
+        }
+        const events = new EventSource(this.apiBase + '/events');
+
+        events.addEventListener('game', () => {
+            const totalGames = document.getElementById('total-games');
+            totalGames.textContent = (parseInt(totalGames.textContent) || 0) + 1;
+        });
+        events.addEventListener('deck_stats', (e) => {
+            const update = JSON.parse(e.data);
+            this.api.invalidate(`/decks/${update.deck_id}`);
+        });
+        events.addEventListener('bracket', (e) => {
+            const update = JSON.parse(e.data);
+            this.api.invalidate(`/tournaments/${update.tournament_id}`);
+        });
+        // Events were dropped while this tab was slow: anything cached may be stale
+        events.addEventListener('resync', () => {
+            this.api.invalidate();
+            this.loadDashboardData();
+        });
+    }
+
     setupEventListeners() {
         // Navigation
         document.querySelectorAll('.nav-link').forEach(link => {
@@ -69,6 +296,12 @@ class DeckWizardApp {
             this.filterCards();
         });
 
+        // Type-ahead search waits for a pause in typing
+        const debouncedFilter = debounce(() => this.filterCards(), 250);
+        document.getElementById('card-name-filter').addEventListener('input', debouncedFilter);
+        document.getElementById('card-type-filter').addEventListener('change', () => this.filterCards());
+        document.getElementById('card-rarity-filter').addEventListener('change', () => this.filterCards());
+
         // Tournament
         document.getElementById('generate-bracket-btn').addEventListener('click', () => {
             this.generateTournamentBracket();
@@ -131,28 +364,17 @@ class DeckWizardApp {
     }
 
     renderCards(cards) {
-        const grid = document.getElementById('cards-grid');
-        grid.innerHTML = '';
-
-        if (cards.length === 0) {
-            grid.innerHTML = `
-                <div class="col-span-full text-center py-12">
-                    <i class="fas fa-cards-blank text-gray-400 text-6xl mb-4"></i>
-                    <p class="text-gray-600 text-lg">No cards found. Add some cards to get started!</p>
-                </div>
-            `;
-            return;
-        }
-
-        cards.forEach(card => {
-            const cardElement = this.createCardElement(card);
-            grid.appendChild(cardElement);
-        });
+        this.cardsGrid.setItems(cards, `
+            <div class="text-center py-12">
+                <i class="fas fa-cards-blank text-gray-400 text-6xl mb-4"></i>
+                <p class="text-gray-600 text-lg">No cards found. Add some cards to get started!</p>
+            </div>
+        `);
     }
 
     createCardElement(card) {
         const div = document.createElement('div');
-        div.className = 'bg-white rounded-lg shadow-md p-4 hover:shadow-lg transition-shadow';
+        div.className = 'bg-white rounded-lg shadow-md p-4 hover:shadow-lg transition-shadow flex flex-col overflow-hidden';
         
         const rarityColors = {
             'Common': 'bg-gray-500',
@@ -178,7 +400,7 @@ class DeckWizardApp {
                 </div>
             </div>
             
-            ${card.description ? `<p class="text-sm text-gray-700 mb-3">${card.description}</p>` : ''}
+            ${card.description ? `<p class="text-sm text-gray-700 mb-3 overflow-hidden" style="max-height: 2.5rem;" title="${card.description}">${card.description}</p>` : ''}
             
             ${card.attack !== null || card.health !== null ? `
                 <div class="flex items-center justify-between text-sm">
@@ -190,7 +412,7 @@ class DeckWizardApp {
                 </div>
             ` : `<p class="text-sm text-gray-600">${card.set_name}</p>`}
             
-            <div class="mt-3 flex space-x-2">
+            <div class="mt-auto pt-3 flex space-x-2">
                 <button onclick="deckWizard.addCardToDeck('${card.id}')" 
                         class="flex-1 bg-blue-500 hover:bg-blue-600 text-white px-3 py-1 rounded text-sm transition-colors">
                     Add to Deck
@@ -317,9 +539,13 @@ class DeckWizardApp {
             rarity: document.getElementById('card-rarity-filter').value
         };
 
+        // Only the latest search may render, whichever response arrives last
+        const sequence = ++this.searchSequence;
         try {
             const filteredCards = await this.apiCall('/cards', 'GET', null, filters);
-            this.renderCards(filteredCards);
+            if (sequence === this.searchSequence) {
+                this.renderCards(filteredCards);
+            }
         } catch (error) {
             console.error('Error filtering cards:', error);
             this.showNotification('Error filtering cards', 'error');
@@ -356,20 +582,24 @@ class DeckWizardApp {
 
         if (bracket.type === 'single_elimination') {
             this.renderSingleEliminationBracket(bracket, container);
-        } else if (bracket.type === 'round_robin') {
+        } else if (bracket.type === 'double_elimination') {
+            this.renderSingleEliminationBracket(bracket.winners_bracket, container, 'Winners Round');
+            this.renderSingleEliminationBracket(bracket.losers_bracket, container, 'Losers Round');
+            this.renderSingleEliminationBracket({rounds: [bracket.grand_final]}, container, 'Grand Final');
+        } else if (bracket.type === 'round_robin' || bracket.type === 'swiss') {
             this.renderRoundRobinBracket(bracket, container);
         }
     }
 
-    renderSingleEliminationBracket(bracket, container) {
+    renderSingleEliminationBracket(bracket, container, label = 'Round') {
         const div = document.createElement('div');
-        div.className = 'space-y-6';
+        div.className = 'space-y-6 mb-6';
 
         bracket.rounds.forEach((round, roundIndex) => {
             const roundDiv = document.createElement('div');
             roundDiv.className = 'bg-gray-50 rounded-lg p-4';
             roundDiv.innerHTML = `
-                <h4 class="font-semibold text-lg mb-4">Round ${roundIndex + 1}</h4>
+                <h4 class="font-semibold text-lg mb-4">${label}${bracket.rounds.length > 1 ? ` ${roundIndex + 1}` : ''}</h4>
                 <div class="grid grid-cols-1 md:grid-cols-2 gap-4">
                     ${round.map((match, matchIndex) => `
                         <div class="bg-white rounded border p-3">
@@ -394,14 +624,14 @@ class DeckWizardApp {
         div.className = 'bg-gray-50 rounded-lg p-4';
         
         div.innerHTML = `
-            <h4 class="font-semibold text-lg mb-4">Round Robin Matches</h4>
+            <h4 class="font-semibold text-lg mb-4">${bracket.type === 'swiss' ? 'Swiss' : 'Round Robin'} Round ${bracket.round} of ${bracket.total_rounds}</h4>
             <div class="grid grid-cols-1 md:grid-cols-2 gap-4">
                 ${bracket.matches.map(match => `
                     <div class="bg-white rounded border p-3">
                         <div class="flex justify-between items-center">
                             <span class="font-medium">${match.player1}</span>
                             <span class="text-gray-400">vs</span>
-                            <span class="font-medium">${match.player2}</span>
+                            <span class="font-medium">${match.player2 || 'BYE'}</span>
                         </div>
                     </div>
                 `).join('')}
@@ -460,31 +690,10 @@ class DeckWizardApp {
     }
 
     async apiCall(endpoint, method = 'GET', data = null, params = null) {
-        let url = this.apiBase + endpoint;
-        
-        if (params) {
-            const searchParams = new URLSearchParams(params);
-            url += '?' + searchParams.toString();
+        if (method === 'GET') {
+            return await this.api.get(endpoint, params);
         }
-
-        const options = {
-            method: method,
-            headers: {
-                'Content-Type': 'application/json'
-            }
-        };
-
-        if (data) {
-            options.body = JSON.stringify(data);
-        }
-
-        const response = await fetch(url, options);
-        
-        if (!response.ok) {
-            throw new Error(`API call failed: ${response.statusText}`);
-        }
-
-        return await response.json();
+        return await this.api.send(endpoint, method, data);
     }
 
     showNotification(message, type = 'info') {
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+DeckWizard Workspaces
+Routes each workspace (a user or team) to its own database file for decks,
+collection, games and tournaments, with the shared card catalog attached
+read-only, through a bounded pool of open connections
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+from urllib.request import pathname2url
+
+from deckwizard import CardDatabase, DatabaseSession, DeckManager, GameTracker, logger
+
+# Open workspace databases kept before the least recently used is closed
+DEFAULT_MAX_OPEN = 64
+
+# Schema name the shared catalog is attached under
+CATALOG_SCHEMA = 'catalog'
+
+WORKSPACE_SUFFIX = '.db'
+
+# Workspace names become file names, so keep them to a safe alphabet
+WORKSPACE_NAME = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$')
+
+T = TypeVar('T')
+
+
+def _sqlite_uri(path: str, mode: Optional[str] = None) -> str:
+    uri = 'file:' + pathname2url(os.path.abspath(path))
+    return f"{uri}?mode={mode}" if mode else uri
+
+
+class WorkspaceSession(DatabaseSession):
+    """A session on one workspace database with the card catalog attached.
+
+    The catalog is attached read-only and exposed through a temporary
+    ``cards`` view, which SQLite resolves before the workspace's own
+    (empty) cards table. Every store query keeps working unchanged, joins
+    between workspace decks and catalog cards included, while writes to
+    the catalog from a workspace fail.
+    """
+
+    def __init__(self, db_path: str, catalog_path: str):
+        self.db_path = db_path
+        self.catalog_path = catalog_path
+        # Pooled sessions are handed between request threads, one at a time
+        self.conn = sqlite3.connect(_sqlite_uri(db_path), uri=True, check_same_thread=False)
+        self.conn.execute(f"ATTACH DATABASE ? AS {CATALOG_SCHEMA}", (_sqlite_uri(catalog_path, 'ro'),))
+        self.conn.execute(f"CREATE TEMP VIEW cards AS SELECT * FROM {CATALOG_SCHEMA}.cards")
+        self.in_transaction = False
+        self.card_cache = {}
+
+
+class Workspace:
+    """The stores of one workspace, all bound to its pooled session"""
+
+    def __init__(self, name: str, session: WorkspaceSession):
+        self.name = name
+        self.session = session
+        self._stores: Dict[object, object] = {}
+
+    @property
+    def db_path(self) -> str:
+        return self.session.db_path
+
+    def store(self, factory: Callable[[str], T], key: Optional[str] = None) -> T:
+        """The workspace's instance of a store class taking a db_path, built on first use"""
+        key = key or factory
+        if key not in self._stores:
+            store = factory(self.db_path)
+            store.session = self.session
+            self._stores[key] = store
+        return self._stores[key]
+
+    @property
+    def card_db(self) -> CardDatabase:
+        return self.store(CardDatabase)
+
+    @property
+    def deck_manager(self) -> DeckManager:
+        return self.store(lambda path: DeckManager(path, card_db=self.card_db), 'deck_manager')
+
+    @property
+    def game_tracker(self) -> GameTracker:
+        return self.store(GameTracker)
+
+    @property
+    def tournament_manager(self):
+        from tournament import TournamentManager
+        return self.store(lambda path: TournamentManager(path, game_tracker=self.game_tracker),
+                          'tournament_manager')
+
+    def summary(self) -> Dict:
+        """Record counts and last activity, for admin overviews"""
+        conn = self.session.conn
+        decks, = conn.execute('SELECT COUNT(*) FROM decks').fetchone()
+        games, last_played = conn.execute('SELECT COUNT(*), MAX(date_played) FROM game_results').fetchone()
+        owned, = conn.execute('SELECT COALESCE(SUM(quantity), 0) FROM collection').fetchone()
+        return {'decks': decks, 'games': games, 'collection': owned, 'last_played': last_played}
+
+
+class _Handle:
+    """A pool slot: one workspace's session, its stores and a checkout lock"""
+
+    __slots__ = ('name', 'path', 'workspace', 'lock', 'users')
+
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+        self.workspace: Optional[Workspace] = None
+        self.lock = threading.Lock()
+        # Threads holding or waiting for the handle; only idle handles are evicted
+        self.users = 0
+
+    def close(self):
+        if self.workspace is not None:
+            self.workspace.session.close()
+            self.workspace = None
+
+
+class TenantRouter:
+    """Maps workspace names to database files and pools their connections.
+
+    Each workspace lives in ``<root>/<name>.db`` so writers in different
+    workspaces never wait on the same SQLite lock. At most ``max_open``
+    idle connections are kept; the least recently used one is closed when
+    another workspace needs a slot. A workspace is used by one thread at a
+    time, matching SQLite's single writer per file. ``on_open`` is called
+    with every newly opened workspace, e.g. to register game listeners.
+    """
+
+    def __init__(self, root: str, catalog_path: str, max_open: int = DEFAULT_MAX_OPEN,
+                 on_open: Optional[Callable[[Workspace], None]] = None):
+        if max_open < 1:
+            raise ValueError("max_open must be at least 1")
+        self.root = root
+        self.catalog_path = catalog_path
+        self.max_open = max_open
+        self.on_open = on_open
+        self.opened = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+        self._handles: 'OrderedDict[str, _Handle]' = OrderedDict()
+        os.makedirs(root, exist_ok=True)
+        # The read-only attach needs the catalog tables to exist
+        CardDatabase(catalog_path)
+
+    def workspace_path(self, name: str) -> str:
+        if not WORKSPACE_NAME.match(name or ''):
+            raise ValueError(f"Invalid workspace name {name!r}: use letters, digits, '-' and '_'")
+        return os.path.join(self.root, name + WORKSPACE_SUFFIX)
+
+    def exists(self, name: str) -> bool:
+        return os.path.exists(self.workspace_path(name))
+
+    def list_workspaces(self) -> List[str]:
+        catalog = os.path.abspath(self.catalog_path)
+        names = []
+        for entry in os.listdir(self.root):
+            name = entry[:-len(WORKSPACE_SUFFIX)]
+            if (entry.endswith(WORKSPACE_SUFFIX) and WORKSPACE_NAME.match(name)
+                    and os.path.abspath(os.path.join(self.root, entry)) != catalog):
+                names.append(name)
+        return sorted(names)
+
+    def create(self, name: str) -> str:
+        """Create a workspace database; returns its path"""
+        path = self.workspace_path(name)
+        if os.path.exists(path):
+            raise ValueError(f"Workspace already exists: {name}")
+        # Building the stores creates every table in the new file
+        with self.workspace(name, create=True) as workspace:
+            workspace.deck_manager
+            workspace.tournament_manager
+        logger.info("Created workspace %s", name)
+        return path
+
+    @property
+    def open_count(self) -> int:
+        return sum(1 for handle in self._handles.values() if handle.workspace is not None)
+
+    @contextmanager
+    def workspace(self, name: str, create: bool = False) -> Iterator[Workspace]:
+        """Check out a workspace's stores for the duration of the block.
+
+        Raises LookupError for an unknown workspace unless ``create`` is set.
+        """
+        path = self.workspace_path(name)
+        if not create and not os.path.exists(path):
+            raise LookupError(f"Workspace not found: {name}")
+
+        handle = self._checkout(name, path)
+        try:
+            with handle.lock:
+                if handle.workspace is None:
+                    self._open(handle)
+                yield handle.workspace
+        finally:
+            with self._lock:
+                handle.users -= 1
+                self._evict()
+
+    def _checkout(self, name: str, path: str) -> _Handle:
+        with self._lock:
+            handle = self._handles.get(name)
+            if handle is None:
+                handle = self._handles[name] = _Handle(name, path)
+            self._handles.move_to_end(name)
+            handle.users += 1
+            return handle
+
+    def _open(self, handle: _Handle):
+        # Plain construction runs the schema checks on their own connection first
+        CardDatabase(handle.path)
+        handle.workspace = Workspace(handle.name, WorkspaceSession(handle.path, self.catalog_path))
+        self.opened += 1
+        logger.debug("Opened workspace %s (%d open)", handle.name, self.open_count)
+        if self.on_open is not None:
+            self.on_open(handle.workspace)
+
+    def _evict(self):
+        """Close least recently used idle handles beyond max_open (router lock held)"""
+        excess = len(self._handles) - self.max_open
+        if excess <= 0:
+            return
+        for name in list(self._handles):
+            handle = self._handles[name]
+            if handle.users == 0:
+                del self._handles[name]
+                handle.close()
+                self.evicted += 1
+                excess -= 1
+                if excess == 0:
+                    break
+
+    def close(self):
+        with self._lock:
+            for handle in self._handles.values():
+                handle.close()
+            self._handles.clear()
+
+    def fan_out(self, task: Callable[[Workspace], T], workspaces: Optional[Iterable[str]] = None,
+                max_workers: Optional[int] = None) -> Tuple[Dict[str, T], Dict[str, str]]:
+        """Run ``task`` on many workspaces in parallel (all of them by default).
+
+        sqlite3 releases the GIL while a query runs, so threads overlap on
+        separate files. Returns per-workspace results and, separately, the
+        errors of workspaces whose task failed, so one damaged database
+        doesn't hide every other answer.
+        """
+        names = list(workspaces) if workspaces is not None else self.list_workspaces()
+        results: Dict[str, T] = {}
+        errors: Dict[str, str] = {}
+        if not names:
+            return results, errors
+
+        def run(name):
+            with self.workspace(name) as workspace:
+                return task(workspace)
+
+        # More workers than pool slots would only churn connections
+        workers = max_workers or min(len(names), self.max_open, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {name: pool.submit(run, name) for name in names}
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    logger.error("Workspace %s failed: %s", name, e)
+                    errors[name] = str(e)
+        return results, errors
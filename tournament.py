@@ -0,0 +1,670 @@
+#!/usr/bin/env python3
+"""
+DeckWizard Tournament Engine
+Swiss pairing, single/double elimination graphs and lazily generated round
+robins, persisted in SQLite and linked to recorded games
+"""
+
+import json
+import math
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from deckwizard import GameTracker, SQLiteStore, logger, new_record_id
+
+TOURNAMENT_TYPES = ('swiss', 'single_elimination', 'double_elimination', 'round_robin')
+
+# Slot value for an empty bracket position; None means "not decided yet"
+BYE = ''
+
+MATCH_POINTS = {'win': 3, 'draw': 1, 'loss': 0}
+
+# Candidates examined per player before falling back to a rematch + repair
+SWISS_SCAN_WINDOW = 64
+
+
+# ---------------------------------------------------------------------------
+# Swiss pairing
+# ---------------------------------------------------------------------------
+
+def swiss_pairings(players: List[str], points: Dict[str, float],
+                   opponents: Dict[str, Set[str]], had_bye: Set[str],
+                   tiebreak: Optional[Dict[str, float]] = None) -> Tuple[List[Tuple[str, str]], Optional[str]]:
+    """Pair one Swiss round, avoiding rematches where possible.
+
+    Players are ranked by points, then ``tiebreak``, then their position in
+    ``players`` (the seed). With an odd count the lowest-ranked player that
+    has not had a bye gets one. Each player is paired with the closest-ranked
+    unpaired player they have not met, scanning at most SWISS_SCAN_WINDOW
+    candidates; leftovers are paired anyway and then repaired by swapping
+    partners with nearby pairs. Runs in roughly O(n log n).
+
+    Returns ``(pairs, bye_player)``.
+    """
+    tiebreak = tiebreak or {}
+    seed = {player: index for index, player in enumerate(players)}
+    order = sorted(players, key=lambda p: (-points.get(p, 0), -tiebreak.get(p, 0), seed[p]))
+
+    bye = None
+    if len(order) % 2:
+        bye = next((p for p in reversed(order) if p not in had_bye), order[-1])
+        order.remove(bye)
+
+    n = len(order)
+    # "Next unpaired index" with path compression, so scans skip paired players
+    next_free = list(range(n + 1))
+
+    def find(i: int) -> int:
+        root = i
+        while next_free[root] != root:
+            root = next_free[root]
+        while next_free[i] != root:
+            next_free[i], i = root, next_free[i]
+        return root
+
+    empty: Set[str] = set()
+    pairs: List[Tuple[str, str]] = []
+    i = find(0)
+    while i < n:
+        next_free[i] = i + 1
+        player = order[i]
+        met = opponents.get(player, empty)
+
+        partner = None
+        j = find(i + 1)
+        scanned = 0
+        while j < n and scanned < SWISS_SCAN_WINDOW:
+            if order[j] not in met:
+                partner = j
+                break
+            scanned += 1
+            j = find(j + 1)
+        if partner is None:
+            partner = find(i + 1)  # forced rematch, repaired below
+
+        next_free[partner] = partner + 1
+        pairs.append((player, order[partner]))
+        i = find(i + 1)
+
+    _repair_rematches(pairs, opponents)
+    return pairs, bye
+
+
+def _repair_rematches(pairs: List[Tuple[str, str]], opponents: Dict[str, Set[str]]):
+    """Swap partners between a rematch pair and the nearest pair that allows it"""
+    empty: Set[str] = set()
+
+    def legal(a: str, b: str) -> bool:
+        return b not in opponents.get(a, empty)
+
+    for index, (a, b) in enumerate(pairs):
+        if legal(a, b):
+            continue
+        for distance in range(1, len(pairs)):
+            swapped = False
+            for other in (index - distance, index + distance):
+                if not 0 <= other < len(pairs):
+                    continue
+                c, d = pairs[other]
+                if legal(a, c) and legal(b, d):
+                    pairs[index], pairs[other] = (a, c), (b, d)
+                    swapped = True
+                elif legal(a, d) and legal(b, c):
+                    pairs[index], pairs[other] = (a, d), (b, c)
+                    swapped = True
+                if swapped:
+                    break
+            if swapped:
+                break
+
+
+def swiss_standings(players: List[str], matches: Iterable[Tuple[str, str, Optional[str]]]) -> List[Dict]:
+    """Standings with match points, OMW% and OOMW% tiebreakers.
+
+    ``matches`` yields ``(player1, player2, result)`` with result 'player1',
+    'player2' or 'draw'; ``player2`` is BYE for byes, which count as wins but
+    are left out of the opponent tiebreakers.
+    """
+    record = {p: {'wins': 0, 'losses': 0, 'draws': 0, 'byes': 0} for p in players}
+    opponents: Dict[str, List[str]] = {p: [] for p in players}
+    for player1, player2, result in matches:
+        if not result or result == 'skipped':
+            continue
+        if player2 == BYE:
+            record[player1]['wins'] += 1
+            record[player1]['byes'] += 1
+            continue
+        opponents[player1].append(player2)
+        opponents[player2].append(player1)
+        if result == 'draw':
+            record[player1]['draws'] += 1
+            record[player2]['draws'] += 1
+        else:
+            winner, loser = (player1, player2) if result == 'player1' else (player2, player1)
+            record[winner]['wins'] += 1
+            record[loser]['losses'] += 1
+
+    def points(p: str) -> int:
+        r = record[p]
+        return r['wins'] * MATCH_POINTS['win'] + r['draws'] * MATCH_POINTS['draw']
+
+    def match_win_pct(p: str) -> float:
+        r = record[p]
+        played = r['wins'] + r['losses'] + r['draws']
+        return max(1 / 3, points(p) / (3 * played)) if played else 1 / 3
+
+    mwp = {p: match_win_pct(p) for p in players}
+    omw = {p: sum(mwp[o] for o in opponents[p]) / len(opponents[p]) if opponents[p] else 0.0
+           for p in players}
+    oomw = {p: sum(omw[o] for o in opponents[p]) / len(opponents[p]) if opponents[p] else 0.0
+            for p in players}
+
+    seed = {player: index for index, player in enumerate(players)}
+    ranked = sorted(players, key=lambda p: (-points(p), -omw[p], -oomw[p], seed[p]))
+    return [{
+        'rank': rank,
+        'player': p,
+        'points': points(p),
+        **record[p],
+        'omw': round(omw[p], 4),
+        'oomw': round(oomw[p], 4)
+    } for rank, p in enumerate(ranked, 1)]
+
+
+# ---------------------------------------------------------------------------
+# Round robin (circle method)
+# ---------------------------------------------------------------------------
+
+def round_robin_total_rounds(player_count: int) -> int:
+    return player_count - 1 if player_count % 2 == 0 else player_count
+
+
+def round_robin_round(participants: List[str], round_number: int) -> List[Tuple[str, str]]:
+    """Pairings for one round of a round robin, in O(n) without building the schedule.
+
+    Uses the circle method: the first player stays fixed and the others
+    rotate one position per round. With an odd count one player per round
+    is paired with BYE.
+    """
+    players = list(participants)
+    if len(players) % 2:
+        players.append(BYE)
+    n = len(players)
+    total = n - 1
+    if not 1 <= round_number <= total:
+        raise ValueError(f"Round must be between 1 and {total}")
+
+    shift = (round_number - 1) % total
+    rotating = players[1:]
+    rotating = rotating[total - shift:] + rotating[:total - shift]
+    arrangement = [players[0]] + rotating
+
+    pairs = []
+    for i in range(n // 2):
+        a, b = arrangement[i], arrangement[n - 1 - i]
+        # Alternate sides for the fixed player so nobody is always player1
+        if i == 0 and round_number % 2 == 0:
+            a, b = b, a
+        if a == BYE:
+            a, b = b, a
+        pairs.append((a, b))
+    return pairs
+
+
+# ---------------------------------------------------------------------------
+# Elimination brackets
+# ---------------------------------------------------------------------------
+
+def seed_order(size: int) -> List[int]:
+    """Standard bracket slot order for 0-based seeds (1v8, 4v5, 2v7, 3v6...)"""
+    order = [0]
+    while len(order) < size:
+        count = len(order) * 2
+        order = [slot for seed in order for slot in (seed, count - 1 - seed)]
+    return order
+
+
+def build_elimination_graph(player_count: int, double: bool = False) -> List[Dict]:
+    """Build every match of a single or double elimination bracket.
+
+    Matches are returned in an order where each one comes after the matches
+    feeding it. Each has a ``code`` (``W2-1``, ``L3-2``, ``GF``...), its
+    ``bracket`` and ``round``, and two ``sources`` of the form
+    ``{'seed': i}``, ``{'winner_of': code}`` or ``{'loser_of': code}``.
+    ``winner_to``/``loser_to`` give the ``code:slot`` each result feeds.
+
+    The losers bracket takes WB round 1 losers first, then alternates
+    between rounds where WB losers drop in and rounds played internally;
+    drop-in order is reversed every other round to delay rematches. The
+    grand final is followed by an ``if_needed`` reset match.
+    """
+    if player_count < 2:
+        raise ValueError("An elimination bracket needs at least two players")
+
+    rounds = max(1, math.ceil(math.log2(player_count)))
+    size = 1 << rounds
+    order = seed_order(size)
+    matches: List[Dict] = []
+
+    def add(code, bracket, round_number, sources, **extra):
+        matches.append({'code': code, 'bracket': bracket, 'round': round_number,
+                        'sources': sources, 'winner_to': None, 'loser_to': None, **extra})
+
+    for m in range(size // 2):
+        add(f"W1-{m + 1}", 'winners', 1, [{'seed': order[2 * m]}, {'seed': order[2 * m + 1]}])
+    for r in range(2, rounds + 1):
+        for m in range(size >> r):
+            add(f"W{r}-{m + 1}", 'winners', r,
+                [{'winner_of': f"W{r - 1}-{2 * m + 1}"}, {'winner_of': f"W{r - 1}-{2 * m + 2}"}])
+
+    if double:
+        if rounds == 1:
+            losers_final = {'loser_of': 'W1-1'}
+        else:
+            for m in range(size // 4):
+                add(f"L1-{m + 1}", 'losers', 1,
+                    [{'loser_of': f"W1-{2 * m + 1}"}, {'loser_of': f"W1-{2 * m + 2}"}])
+            lb_round = 1
+            for wb_round in range(2, rounds + 1):
+                count = size >> wb_round
+                drop_ins = [f"W{wb_round}-{m + 1}" for m in range(count)]
+                if wb_round % 2 == 0:
+                    drop_ins.reverse()
+                previous = lb_round
+                lb_round += 1
+                for m in range(count):
+                    add(f"L{lb_round}-{m + 1}", 'losers', lb_round,
+                        [{'loser_of': drop_ins[m]}, {'winner_of': f"L{previous}-{m + 1}"}])
+                if wb_round < rounds:
+                    previous = lb_round
+                    lb_round += 1
+                    for m in range(count // 2):
+                        add(f"L{lb_round}-{m + 1}", 'losers', lb_round,
+                            [{'winner_of': f"L{previous}-{2 * m + 1}"},
+                             {'winner_of': f"L{previous}-{2 * m + 2}"}])
+            losers_final = {'winner_of': f"L{lb_round}-1"}
+
+        add('GF', 'grand_final', 1, [{'winner_of': f"W{rounds}-1"}, losers_final])
+        add('GF2', 'grand_final', 2, [{'winner_of': 'GF'}, {'loser_of': 'GF'}], if_needed=True)
+
+    by_code = {match['code']: match for match in matches}
+    for match in matches:
+        for slot, source in enumerate(match['sources']):
+            if 'winner_of' in source:
+                by_code[source['winner_of']]['winner_to'] = f"{match['code']}:{slot}"
+            elif 'loser_of' in source:
+                by_code[source['loser_of']]['loser_to'] = f"{match['code']}:{slot}"
+    return matches
+
+
+class EliminationBracket:
+    """Tracks results through an elimination graph.
+
+    ``matches`` maps code -> match dict (as built by build_elimination_graph
+    plus ``player1``/``player2``/``result``/``winner``/``loser``). Byes are
+    advanced automatically. ``changed`` collects the codes touched since it
+    was last cleared, so persistent callers only write those rows back.
+    """
+
+    def __init__(self, matches: Dict[str, Dict]):
+        self.matches = matches
+        self.changed: Set[str] = set()
+
+    @classmethod
+    def create(cls, participants: List[str], double: bool = False) -> 'EliminationBracket':
+        graph = build_elimination_graph(len(participants), double=double)
+        bracket = cls({m['code']: dict(m, player1=None, player2=None, result=None,
+                                       winner=None, loser=None) for m in graph})
+        for match in graph:
+            for slot, source in enumerate(match['sources']):
+                if 'seed' in source:
+                    seed = source['seed']
+                    bracket._fill(match['code'], slot, participants[seed] if seed < len(participants) else BYE)
+        return bracket
+
+    def _fill(self, code: str, slot: int, player: str):
+        match = self.matches[code]
+        match['player1' if slot == 0 else 'player2'] = player
+        self.changed.add(code)
+        self._auto_resolve(code)
+
+    def _auto_resolve(self, code: str):
+        match = self.matches[code]
+        if match['result'] is not None or match['player1'] is None or match['player2'] is None:
+            return
+        if match['player2'] == BYE:
+            self._resolve(code, 'player1')
+        elif match['player1'] == BYE:
+            self._resolve(code, 'player2')
+        elif match.get('if_needed'):
+            # Grand final reset only happens if the losers-bracket player won GF
+            feeder = self.matches[match['sources'][0]['winner_of']]
+            if feeder['result'] == 'player1':
+                self._resolve(code, 'player1', skipped=True)
+
+    def _resolve(self, code: str, result: str, skipped: bool = False):
+        match = self.matches[code]
+        winner, loser = ((match['player1'], match['player2']) if result == 'player1'
+                         else (match['player2'], match['player1']))
+        match['result'] = 'skipped' if skipped else result
+        match['winner'] = winner
+        match['loser'] = loser
+        self.changed.add(code)
+        for target, player in ((match['winner_to'], winner), (match['loser_to'], loser)):
+            if target:
+                target_code, slot = target.split(':')
+                self._fill(target_code, int(slot), player)
+
+    def report(self, code: str, result: str):
+        """Record 'player1' or 'player2' as the winner of a match"""
+        match = self.matches.get(code)
+        if match is None:
+            raise ValueError(f"Unknown match: {code}")
+        if result not in ('player1', 'player2'):
+            raise ValueError("Elimination matches need a winner ('player1' or 'player2')")
+        if match['player1'] is None or match['player2'] is None:
+            raise ValueError(f"Match {code} is still waiting for its players")
+        if match['result'] is not None:
+            raise ValueError(f"Match {code} already has a result")
+        self._resolve(code, result)
+
+    def champion(self) -> Optional[str]:
+        """Winner of the terminal match (the one feeding nothing), once decided"""
+        return next((m['winner'] for m in self.matches.values()
+                     if m['winner_to'] is None and m['result']), None)
+
+    def rounds(self, bracket: str) -> List[List[Dict]]:
+        """Matches of one bracket grouped by round"""
+        grouped: Dict[int, List[Dict]] = {}
+        for match in self.matches.values():
+            if match['bracket'] == bracket:
+                grouped.setdefault(match['round'], []).append(match)
+        return [grouped[r] for r in sorted(grouped)]
+
+
+# ---------------------------------------------------------------------------
+# Persistence
+# ---------------------------------------------------------------------------
+
+class TournamentManager(SQLiteStore):
+    """Creates, pairs and scores tournaments stored in SQLite.
+
+    Players are deck ids or free-form names. When both players of a
+    reported match are stored decks, the result is also recorded through
+    GameTracker.record_game and the game ids are kept on the match.
+    """
+
+    def __init__(self, db_path: str = "deckwizard.db", game_tracker: Optional[GameTracker] = None):
+        self.db_path = db_path
+        self.game_tracker = game_tracker or GameTracker(db_path)
+        self._require_schema()
+
+    def create_tournament(self, name: str, tournament_type: str, participants: List[str],
+                          rounds: Optional[int] = None) -> Dict:
+        """Create a tournament; elimination brackets are materialized immediately"""
+        if tournament_type not in TOURNAMENT_TYPES:
+            raise ValueError(f"Unknown tournament type: {tournament_type}")
+        participants = [str(p).strip() for p in participants]
+        if len(participants) < 2:
+            raise ValueError("A tournament needs at least two participants")
+        if any(p == BYE for p in participants) or len(set(participants)) != len(participants):
+            raise ValueError("Participants must be unique, non-empty names")
+
+        if tournament_type == 'swiss':
+            rounds_total = rounds or max(1, math.ceil(math.log2(len(participants))))
+        elif tournament_type == 'round_robin':
+            rounds_total = round_robin_total_rounds(len(participants))
+        else:
+            rounds_total = None
+
+        tournament_id = new_record_id('tournament')
+        with self._connection() as conn:
+            conn.execute('''
+                INSERT INTO tournaments (id, name, type, status, rounds_total, current_round, created_date)
+                VALUES (?, ?, ?, 'active', ?, 0, ?)
+            ''', (tournament_id, name, tournament_type, rounds_total, datetime.now().isoformat()))
+            conn.executemany('''
+                INSERT INTO tournament_players (tournament_id, player, seed) VALUES (?, ?, ?)
+            ''', [(tournament_id, player, seed) for seed, player in enumerate(participants, 1)])
+
+            if tournament_type in ('single_elimination', 'double_elimination'):
+                bracket = EliminationBracket.create(
+                    participants, double=tournament_type == 'double_elimination')
+                self._write_matches(conn, tournament_id, bracket.matches.values())
+
+        logger.info("Created tournament: %s", name,
+                    extra={'event': 'tournament_created', 'tournament_id': tournament_id})
+        return self.get_tournament(tournament_id)
+
+    def get_tournament(self, tournament_id: str) -> Optional[Dict]:
+        with self._connection() as conn:
+            row = conn.execute('''
+                SELECT id, name, type, status, rounds_total, current_round, created_date
+                FROM tournaments WHERE id = ?
+            ''', (tournament_id,)).fetchone()
+            if not row:
+                return None
+            players = [r[0] for r in conn.execute(
+                'SELECT player FROM tournament_players WHERE tournament_id = ? ORDER BY seed',
+                (tournament_id,))]
+        return {
+            'id': row[0], 'name': row[1], 'type': row[2], 'status': row[3],
+            'rounds_total': row[4], 'current_round': row[5], 'created_date': row[6],
+            'participants': players
+        }
+
+    def _require(self, tournament_id: str) -> Dict:
+        tournament = self.get_tournament(tournament_id)
+        if tournament is None:
+            raise ValueError(f"Tournament not found: {tournament_id}")
+        return tournament
+
+    @staticmethod
+    def _write_matches(conn, tournament_id: str, matches: Iterable[Dict]):
+        conn.executemany('''
+            INSERT OR REPLACE INTO tournament_matches
+            (tournament_id, code, bracket, round, player1, player2, sources, winner_to, loser_to,
+             result, winner, loser, player1_game_id, player2_game_id, reported_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [(
+            tournament_id, m['code'], m['bracket'], m['round'], m['player1'], m['player2'],
+            json.dumps(m.get('sources')) if m.get('sources') else None,
+            m.get('winner_to'), m.get('loser_to'), m.get('result'), m.get('winner'), m.get('loser'),
+            m.get('player1_game_id'), m.get('player2_game_id'), m.get('reported_date')
+        ) for m in matches])
+
+    @staticmethod
+    def _row_to_match(row) -> Dict:
+        match = {
+            'code': row[0], 'bracket': row[1], 'round': row[2], 'player1': row[3], 'player2': row[4],
+            'sources': json.loads(row[5]) if row[5] else None, 'winner_to': row[6], 'loser_to': row[7],
+            'result': row[8], 'winner': row[9], 'loser': row[10],
+            'player1_game_id': row[11], 'player2_game_id': row[12], 'reported_date': row[13]
+        }
+        if match['code'] == 'GF2':
+            match['if_needed'] = True
+        return match
+
+    _MATCH_COLUMNS = '''code, bracket, round, player1, player2, sources, winner_to, loser_to,
+                        result, winner, loser, player1_game_id, player2_game_id, reported_date'''
+
+    def get_matches(self, tournament_id: str, round_number: Optional[int] = None) -> List[Dict]:
+        """Stored matches, optionally only one round"""
+        query = f'SELECT {self._MATCH_COLUMNS} FROM tournament_matches WHERE tournament_id = ?'
+        params: list = [tournament_id]
+        if round_number is not None:
+            query += ' AND round = ?'
+            params.append(round_number)
+        query += ' ORDER BY bracket DESC, round, rowid'
+        with self._connection() as conn:
+            return [self._row_to_match(row) for row in conn.execute(query, params)]
+
+    def pair_next_round(self, tournament_id: str) -> List[Dict]:
+        """Generate and store the next Swiss or round-robin round"""
+        tournament = self._require(tournament_id)
+        if tournament['type'] not in ('swiss', 'round_robin'):
+            raise ValueError("Elimination brackets are generated when the tournament is created")
+        if tournament['status'] != 'active':
+            raise ValueError("Tournament is already complete")
+
+        round_number = tournament['current_round'] + 1
+        if round_number > tournament['rounds_total']:
+            raise ValueError("All rounds have already been paired")
+
+        with self._connection() as conn:
+            pending = conn.execute('''
+                SELECT COUNT(*) FROM tournament_matches
+                WHERE tournament_id = ? AND round = ? AND result IS NULL
+            ''', (tournament_id, tournament['current_round'])).fetchone()[0]
+            if pending:
+                raise ValueError(f"Round {tournament['current_round']} still has {pending} unreported matches")
+
+            players = tournament['participants']
+            if tournament['type'] == 'round_robin':
+                pairs = round_robin_round(players, round_number)
+            else:
+                history = conn.execute('''
+                    SELECT player1, player2, result FROM tournament_matches WHERE tournament_id = ?
+                ''', (tournament_id,)).fetchall()
+                standings = swiss_standings(players, history)
+                points = {row['player']: row['points'] for row in standings}
+                tiebreak = {row['player']: row['omw'] for row in standings}
+                opponents: Dict[str, Set[str]] = {}
+                had_bye = set()
+                for player1, player2, _ in history:
+                    if player2 == BYE:
+                        had_bye.add(player1)
+                    else:
+                        opponents.setdefault(player1, set()).add(player2)
+                        opponents.setdefault(player2, set()).add(player1)
+                pairs, bye = swiss_pairings(players, points, opponents, had_bye, tiebreak)
+                if bye is not None:
+                    pairs.append((bye, BYE))
+
+            now = datetime.now().isoformat()
+            matches = []
+            for index, (player1, player2) in enumerate(pairs, 1):
+                bye_match = player2 == BYE
+                matches.append({
+                    'code': f"R{round_number}-{index}", 'bracket': tournament['type'],
+                    'round': round_number, 'player1': player1, 'player2': player2,
+                    'result': 'player1' if bye_match else None,
+                    'winner': player1 if bye_match else None,
+                    'loser': BYE if bye_match else None,
+                    'reported_date': now if bye_match else None
+                })
+            self._write_matches(conn, tournament_id, matches)
+            conn.execute('UPDATE tournaments SET current_round = ? WHERE id = ?',
+                         (round_number, tournament_id))
+
+        logger.info("Paired round %d of tournament %s", round_number, tournament_id,
+                    extra={'event': 'tournament_round_paired', 'tournament_id': tournament_id})
+        return matches
+
+    def report_result(self, tournament_id: str, code: str, result: str, game_length: int = 0) -> Dict:
+        """Report 'player1', 'player2' or (Swiss/round robin only) 'draw' for a match"""
+        tournament = self._require(tournament_id)
+        if result not in ('player1', 'player2', 'draw'):
+            raise ValueError("Result must be 'player1', 'player2' or 'draw'")
+
+        with self._connection() as conn:
+            if tournament['type'] in ('single_elimination', 'double_elimination'):
+                bracket = EliminationBracket(_LazyMatches(self, conn, tournament_id))
+                bracket.report(code, result)
+                changed = [bracket.matches[c] for c in bracket.changed]
+                match = bracket.matches[code]
+                match['reported_date'] = datetime.now().isoformat()
+                self._write_matches(conn, tournament_id, changed)
+                if any(m['winner_to'] is None and m['result'] for m in changed):
+                    conn.execute("UPDATE tournaments SET status = 'complete' WHERE id = ?", (tournament_id,))
+            else:
+                row = conn.execute(f'''
+                    SELECT {self._MATCH_COLUMNS} FROM tournament_matches
+                    WHERE tournament_id = ? AND code = ?
+                ''', (tournament_id, code)).fetchone()
+                if not row:
+                    raise ValueError(f"Unknown match: {code}")
+                match = self._row_to_match(row)
+                if match['result'] is not None:
+                    raise ValueError(f"Match {code} already has a result")
+                match['result'] = result
+                if result != 'draw':
+                    match['winner'], match['loser'] = ((match['player1'], match['player2'])
+                                                       if result == 'player1'
+                                                       else (match['player2'], match['player1']))
+                match['reported_date'] = datetime.now().isoformat()
+                self._write_matches(conn, tournament_id, [match])
+                if match['round'] == tournament['rounds_total']:
+                    pending = conn.execute('''
+                        SELECT COUNT(*) FROM tournament_matches
+                        WHERE tournament_id = ? AND round = ? AND result IS NULL
+                    ''', (tournament_id, match['round'])).fetchone()[0]
+                    if not pending:
+                        conn.execute("UPDATE tournaments SET status = 'complete' WHERE id = ?",
+                                     (tournament_id,))
+
+        self._record_games(tournament_id, match, game_length)
+        return match
+
+    def _record_games(self, tournament_id: str, match: Dict, game_length: int):
+        """Record the match through GameTracker when both players are stored decks"""
+        players = (match['player1'], match['player2'])
+        with self._connection() as conn:
+            stored = {row[0] for row in conn.execute(
+                'SELECT id FROM decks WHERE id IN (?, ?)', players)}
+        if len(stored) < 2:
+            return
+
+        outcome = {'player1': ('win', 'loss'), 'player2': ('loss', 'win'), 'draw': ('draw', 'draw')}
+        note = f"Tournament {tournament_id} match {match['code']}"
+        game_ids = []
+        for deck_id, opponent, result in zip(players, reversed(players), outcome[match['result']]):
+            game_id = new_record_id('game')
+            if self.game_tracker.record_game(deck_id, opponent, result, game_length, note, game_id=game_id):
+                game_ids.append(game_id)
+            else:
+                game_ids.append(None)
+
+        match['player1_game_id'], match['player2_game_id'] = game_ids
+        with self._connection() as conn:
+            conn.execute('''
+                UPDATE tournament_matches SET player1_game_id = ?, player2_game_id = ?
+                WHERE tournament_id = ? AND code = ?
+            ''', (*game_ids, tournament_id, match['code']))
+
+    def standings(self, tournament_id: str) -> List[Dict]:
+        """Current standings with tiebreakers"""
+        tournament = self._require(tournament_id)
+        with self._connection() as conn:
+            history = conn.execute('''
+                SELECT player1, player2, result FROM tournament_matches
+                WHERE tournament_id = ? AND player1 IS NOT NULL AND player2 IS NOT NULL
+                  AND player1 != ''
+            ''', (tournament_id,)).fetchall()
+        return swiss_standings(tournament['participants'], history)
+
+
+class _LazyMatches(dict):
+    """Match dict that loads elimination matches from the database on first access"""
+
+    def __init__(self, manager: TournamentManager, conn, tournament_id: str):
+        super().__init__()
+        self.manager = manager
+        self.conn = conn
+        self.tournament_id = tournament_id
+
+    def __missing__(self, code: str) -> Dict:
+        row = self.conn.execute(f'''
+            SELECT {TournamentManager._MATCH_COLUMNS} FROM tournament_matches
+            WHERE tournament_id = ? AND code = ?
+        ''', (self.tournament_id, code)).fetchone()
+        if row is None:
+            raise KeyError(code)
+        match = self[code] = self.manager._row_to_match(row)
+        return match
+
+    def get(self, code, default=None):
+        try:
+            return self[code]
+        except KeyError:
+            return default
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+DeckWizard Tournament Simulation
+Monte Carlo projection of tournament outcomes from recorded matchup data,
+vectorized across runs with numpy and spread over worker processes
+"""
+
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+from deckwizard import SQLiteStore, logger
+from tournament import BYE, build_elimination_graph, round_robin_round, round_robin_total_rounds
+
+try:
+    import numpy as np
+except ImportError:  # simulation is optional; the rest of DeckWizard is stdlib only
+    np = None
+
+SIMULATION_TYPES = ('single_elimination', 'double_elimination', 'round_robin', 'swiss')
+
+# Pseudo-games of the overall-strength estimate mixed into each head-to-head record
+PRIOR_GAMES = 10
+
+# z for the 95% confidence intervals used by early stopping
+CI_Z = 1.96
+
+# Upper bound on runs x participants held in memory by one batch
+BATCH_CELLS = 2_000_000
+
+
+def log5(rate_a: float, rate_b: float) -> float:
+    """Probability that A beats B given each one's overall win rate"""
+    denominator = rate_a * (1 - rate_b) + rate_b * (1 - rate_a)
+    return rate_a * (1 - rate_b) / denominator if denominator else 0.5
+
+
+def _elimination_plan(player_count: int, double: bool) -> Dict:
+    """Flatten an elimination graph into index-based steps for the batch kernel.
+
+    Each step is ``(source0, source1, tier, eliminates, if_needed)`` where a
+    source is ``('seed', i)``, ``('winner', step)`` or ``('loser', step)``.
+    ``tier`` orders eliminations: a player knocked out in a later tier
+    finishes higher.
+    """
+    graph = build_elimination_graph(player_count, double=double)
+    index = {match['code']: i for i, match in enumerate(graph)}
+    last_round = max(m['round'] for m in graph if m['bracket'] != 'grand_final')
+
+    steps = []
+    for match in graph:
+        sources = []
+        for source in match['sources']:
+            if 'seed' in source:
+                sources.append(('seed', source['seed']))
+            elif 'winner_of' in source:
+                sources.append(('winner', index[source['winner_of']]))
+            else:
+                sources.append(('loser', index[source['loser_of']]))
+        tier = match['round'] + (last_round if match['bracket'] == 'grand_final' else 0)
+        # Losses that feed another match don't eliminate anyone
+        eliminates = match['loser_to'] is None or bool(match.get('if_needed'))
+        steps.append((sources[0], sources[1], tier, eliminates, bool(match.get('if_needed'))))
+    return {'steps': steps, 'champion_tier': max(step[2] for step in steps) + 1}
+
+
+def _simulate_batch(kind: str, matrix: List[List[float]], plan: Dict, runs: int,
+                    top_n: Sequence[int], seed) -> Dict:
+    """Simulate ``runs`` tournaments at once and count wins and top-N finishes.
+
+    ``matrix[i][j]`` is the probability that participant i beats j. Every run
+    finishes with a score per participant (elimination tier, or match points
+    for round robin and Swiss); ties are broken at random.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(matrix)
+    # Row/column n stands for BYE: everyone beats it, and BYE vs BYE stays BYE.
+    # Lookups go through the flattened matrix, which is cheaper than 2-D indexing.
+    probabilities = np.ones((n + 1, n + 1), dtype=np.float32)
+    probabilities[:n, :n] = matrix
+    probabilities[n, :n] = 0.0
+    flat = probabilities.ravel()
+    width = n + 1
+    run_index = np.arange(runs)
+    rows = run_index[:, None]
+    # Column n collects BYE's scores so updates never need masking
+    score = np.zeros((runs, n + 1), dtype=np.float32)
+
+    if kind in ('single_elimination', 'double_elimination'):
+        winners, losers = [], []
+        previous_a_wins = None
+        for source0, source1, tier, eliminates, if_needed in plan['steps']:
+            slots = []
+            for source_kind, value in (source0, source1):
+                if source_kind == 'seed':
+                    slots.append(np.full(runs, min(value, n), dtype=np.int32))
+                else:
+                    slots.append((winners if source_kind == 'winner' else losers)[value])
+            a, b = slots
+            a_wins = rng.random(runs, dtype=np.float32) < flat.take(a * width + b)
+            if if_needed:
+                # The reset is only played when the losers-bracket player took the first
+                # final; otherwise that final's loser goes out one tier earlier
+                played = ~previous_a_wins
+                a_wins |= ~played
+                tiers = np.where(played, tier, tier - 1)
+            else:
+                tiers = tier
+            winner = np.where(a_wins, a, b)
+            loser = a + b - winner
+            previous_a_wins = a_wins
+            winners.append(winner)
+            losers.append(loser)
+            if eliminates:
+                score[run_index, loser] = tiers
+        champion = winners[-1]
+        score[run_index, champion] = plan['champion_tier']
+    elif kind == 'round_robin':
+        for a, b in plan['rounds']:
+            a_wins = rng.random((runs, len(a)), dtype=np.float32) < flat.take(a * width + b)
+            score[rows, a] += 3 * a_wins
+            score[rows, b] += 3 * ~a_wins
+    else:
+        # Swiss: pair neighbours in the standings each round. Rematches are
+        # not avoided here, which barely moves the projected probabilities.
+        for _ in range(plan['rounds']):
+            order = np.argsort(-(score[:, :n] + rng.random((runs, n), dtype=np.float32) * 0.5), axis=1)
+            if n % 2:
+                score[run_index, order[:, -1]] += 3
+                order = order[:, :-1]
+            a, b = order[:, 0::2], order[:, 1::2]
+            a_wins = rng.random(a.shape, dtype=np.float32) < flat.take(a * width + b)
+            score[rows, a] += 3 * a_wins
+            score[rows, b] += 3 * ~a_wins
+
+    score = score[:, :n]
+    keys = score + rng.random((runs, n), dtype=np.float32) * 0.5
+    if kind not in ('single_elimination', 'double_elimination'):
+        champion = np.argmax(keys, axis=1)
+
+    counts = {'wins': np.bincount(champion, minlength=n).tolist(), 'top': {}}
+    keys = -keys
+    for size in top_n:
+        if size >= n:
+            counts['top'][size] = [runs] * n
+            continue
+        top = np.argpartition(keys, size - 1, axis=1)[:, :size]
+        counts['top'][size] = np.bincount(top.ravel(), minlength=n).tolist()
+    return counts
+
+
+class TournamentSimulator(SQLiteStore):
+    """Projects win and top-N probabilities for a bracket from game history.
+
+    The probability that participant A beats B combines their head-to-head
+    record in ``game_results`` (recorded from either side, draws counting
+    half) with PRIOR_GAMES pseudo-games of the log5 estimate from each
+    deck's overall win rate. Participants without any games are treated as
+    50% decks. Games played by the simulator in game_sim only count when
+    ``include_simulated`` is set.
+    """
+
+    def __init__(self, db_path: str = "deckwizard.db"):
+        self.db_path = db_path
+        self._require_schema()
+
+    def win_probabilities(self, participants: List[str],
+                          include_simulated: bool = False) -> List[List[float]]:
+        """Pairwise probability matrix; ``[i][j]`` is P(participant i beats j)"""
+        n = len(participants)
+        position = {player: i for i, player in enumerate(participants)}
+        placeholders = ','.join('?' * n)
+        overall = [[0.0, 0] for _ in participants]
+        head_to_head: Dict[tuple, List[float]] = {}
+
+        with self._connection() as conn:
+            rows = conn.execute(f'''
+                SELECT deck_id, opponent_deck,
+                       SUM(CASE result WHEN 'win' THEN 1.0 WHEN 'draw' THEN 0.5 ELSE 0 END),
+                       COUNT(*)
+                FROM game_results WHERE deck_id IN ({placeholders}){'' if include_simulated else ' AND simulated = 0'}
+                GROUP BY deck_id, opponent_deck
+            ''', participants).fetchall()
+
+        for deck_id, opponent, score, games in rows:
+            i = position[deck_id]
+            overall[i][0] += score
+            overall[i][1] += games
+            j = position.get(opponent)
+            if j is None or j == i:
+                continue
+            # Store every record from the lower index's point of view
+            key, points = ((i, j), score) if i < j else ((j, i), games - score)
+            record = head_to_head.setdefault(key, [0.0, 0])
+            record[0] += points
+            record[1] += games
+
+        rates = [(score + 1) / (games + 2) for score, games in overall]
+        matrix = [[0.5] * n for _ in participants]
+        for i in range(n):
+            for j in range(i + 1, n):
+                score, games = head_to_head.get((i, j), (0.0, 0))
+                p = (score + PRIOR_GAMES * log5(rates[i], rates[j])) / (games + PRIOR_GAMES)
+                matrix[i][j], matrix[j][i] = p, 1 - p
+        return matrix
+
+    def simulate(self, tournament_type: str, participants: List[str], runs: int = 1_000_000,
+                 top_n: Sequence[int] = (4, 8), rounds: Optional[int] = None,
+                 tolerance: float = 0.0025, min_runs: int = 10000, workers: Optional[int] = None,
+                 seed: Optional[int] = None,
+                 matrix: Optional[List[List[float]]] = None, include_simulated: bool = False) -> Dict:
+        """Simulate a tournament up to ``runs`` times.
+
+        Participants are in seed order, as in the brackets returned by
+        ``/api/tournament/bracket``. Runs are simulated in batches, one per
+        worker process per wave; after each wave the simulation stops early
+        once every win/top-N probability's 95% confidence half-width is
+        within ``tolerance``. ``workers=1`` keeps everything in-process.
+        """
+        if np is None:
+            raise RuntimeError("Tournament simulation requires numpy (pip install numpy)")
+        if tournament_type not in SIMULATION_TYPES:
+            raise ValueError(f"Unknown tournament type: {tournament_type}")
+        participants = [str(p) for p in participants]
+        n = len(participants)
+        if n < 2:
+            raise ValueError("A tournament needs at least two participants")
+        if len(set(participants)) != n or BYE in participants:
+            raise ValueError("Participants must be unique, non-empty names")
+        if runs < 1:
+            raise ValueError("Runs must be positive")
+        top_n = sorted({int(size) for size in top_n if int(size) > 0})
+
+        if tournament_type in ('single_elimination', 'double_elimination'):
+            plan = _elimination_plan(n, double=tournament_type == 'double_elimination')
+        elif tournament_type == 'round_robin':
+            index = {player: i for i, player in enumerate(participants)}
+            index[BYE] = n
+            plan = {'rounds': []}
+            for round_number in range(1, round_robin_total_rounds(n) + 1):
+                pairs = round_robin_round(participants, round_number)
+                plan['rounds'].append((np.array([index[a] for a, _ in pairs]),
+                                       np.array([index[b] for _, b in pairs])))
+        else:
+            plan = {'rounds': rounds or max(1, math.ceil(math.log2(n)))}
+
+        if matrix is None:
+            matrix = self.win_probabilities(participants, include_simulated=include_simulated)
+        workers = max(1, workers or os.cpu_count() or 1)
+        batch = max(1000, min(50000, BATCH_CELLS // n))
+        seeds = np.random.SeedSequence(seed)
+
+        wins = np.zeros(n)
+        top = {size: np.zeros(n) for size in top_n}
+        completed = 0
+        half_width = 1.0
+        start = time.perf_counter()
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            while completed < runs:
+                sizes = []
+                remaining = runs - completed
+                while remaining > 0 and len(sizes) < workers:
+                    sizes.append(min(batch, remaining))
+                    remaining -= sizes[-1]
+                jobs = [(tournament_type, matrix, plan, size, top_n, child)
+                        for size, child in zip(sizes, seeds.spawn(len(sizes)))]
+                results = (pool.map(_simulate_batch_args, jobs) if pool
+                           else map(_simulate_batch_args, jobs))
+                for counts in results:
+                    wins += counts['wins']
+                    for size in top_n:
+                        top[size] += counts['top'][size]
+                completed += sum(sizes)
+
+                half_width = max(self._half_width(wins, completed),
+                                 *(self._half_width(top[size], completed) for size in top_n))
+                if completed >= min_runs and half_width <= tolerance:
+                    break
+        finally:
+            if pool:
+                pool.shutdown()
+
+        elapsed = time.perf_counter() - start
+        logger.info("Simulated %s %d times in %.2fs", tournament_type, completed, elapsed,
+                    extra={'event': 'tournament_simulated'})
+
+        projections = []
+        for i, player in enumerate(participants):
+            projection = {
+                'player': player,
+                'seed': i + 1,
+                'win_probability': round(float(wins[i]) / completed, 6),
+                'win_ci': round(CI_Z * math.sqrt(self._variance(float(wins[i]), completed) / completed), 6)
+            }
+            for size in top_n:
+                projection[f'top_{size}'] = round(float(top[size][i]) / completed, 6)
+            projections.append(projection)
+        projections.sort(key=lambda p: (-p['win_probability'], p['seed']))
+
+        return {
+            'type': tournament_type,
+            'runs': completed,
+            'converged': half_width <= tolerance,
+            'max_ci_half_width': round(half_width, 6),
+            'elapsed_s': round(elapsed, 3),
+            'workers': workers,
+            'participants': projections
+        }
+
+    @staticmethod
+    def _variance(count: float, runs: int) -> float:
+        p = count / runs
+        return p * (1 - p)
+
+    @staticmethod
+    def _half_width(counts, runs: int) -> float:
+        p = counts / runs
+        return float(CI_Z * np.sqrt((p * (1 - p)).max() / runs))
+
+
+def _simulate_batch_args(job) -> Dict:
+    return _simulate_batch(*job)
@@ -4,20 +4,127 @@ DeckWizard Web Interface
 A Flask-based web application for the DeckWizard card game management suite
 """
 
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, Response, g, render_template, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
+from werkzeug.local import LocalProxy
 import json
+import math
 import os
 from datetime import datetime
-from deckwizard import CardDatabase, DeckManager, GameTracker, Card, Deck
+from deckwizard import CardDatabase, DeckManager, GameTracker, Card, Deck, VersionConflict, configure_logging
+from tournament import (EliminationBracket, TournamentManager, round_robin_round,
+                        round_robin_total_rounds, swiss_pairings)
+from tournament_sim import TournamentSimulator
+from deck_io import ARCHIVE_MIMETYPES, DeckExporter, DeckImporter, archive_filename
+from events import EventBroker, bracket_event, game_events
+from game_sim import GameSimulator
+from metagame import MetaRollup
 
 app = Flask(__name__)
 CORS(app)
 
 # Initialize DeckWizard components
-card_db = CardDatabase()
-deck_manager = DeckManager()
-game_tracker = GameTracker()
+DB_PATH = os.environ.get('DECKWIZARD_DB', 'deckwizard.db')
+
+# Upper bounds on the simulation work a single API request can ask for
+MAX_SIMULATION_RUNS = int(os.environ.get('DECKWIZARD_MAX_SIMULATION_RUNS', 1000000))
+MAX_SIMULATION_WORKERS = int(os.environ.get('DECKWIZARD_MAX_SIMULATION_WORKERS', min(4, os.cpu_count() or 1)))
+MAX_MATCHUP_GAMES = int(os.environ.get('DECKWIZARD_MAX_MATCHUP_GAMES', 10000))
+MAX_MATCHUP_OPPONENTS = int(os.environ.get('DECKWIZARD_MAX_MATCHUP_OPPONENTS', 16))
+
+# Largest lists one request can ask for (illegal decks, meta report rows)
+MAX_ILLEGAL_DECKS = 1000
+MAX_META_TOP = 100
+
+# With a workspace directory configured every API request names its
+# workspace (X-Workspace header or ?workspace=) and runs against that
+# workspace's database, with DB_PATH as the shared card catalog
+WORKSPACE_ROOT = os.environ.get('DECKWIZARD_WORKSPACES')
+
+if WORKSPACE_ROOT:
+    from tenancy import TenantRouter
+    
+    event_brokers = {}
+    
+    def _workspace_broker(name):
+        return event_brokers.setdefault(name, EventBroker())
+    
+    def _watch_games(workspace):
+        broker = _workspace_broker(workspace.name)
+        workspace.game_tracker.add_listener(lambda game, deck_totals: game_events(broker, game, deck_totals))
+    
+    tenant_router = TenantRouter(WORKSPACE_ROOT, DB_PATH,
+                                 max_open=int(os.environ.get('DECKWIZARD_MAX_OPEN_WORKSPACES', 64)),
+                                 on_open=_watch_games)
+    
+    def _current_workspace():
+        """The request's workspace, checked out of the pool until the request ends"""
+        if 'workspace' not in g:
+            g.workspace_checkout = tenant_router.workspace(g.workspace_name)
+            g.workspace = g.workspace_checkout.__enter__()
+        return g.workspace
+    
+    @app.before_request
+    def resolve_workspace():
+        if not request.path.startswith('/api/'):
+            return None
+        name = request.headers.get('X-Workspace') or request.args.get('workspace')
+        if not name:
+            return jsonify({'error': 'Missing workspace (X-Workspace header or workspace parameter)'}), 400
+        try:
+            if not tenant_router.exists(name):
+                return jsonify({'error': f'Workspace not found: {name}'}), 404
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        g.workspace_name = name
+        return None
+    
+    @app.teardown_request
+    def release_workspace(error=None):
+        checkout = g.pop('workspace_checkout', None)
+        if checkout is not None:
+            g.pop('workspace', None)
+            checkout.__exit__(None, None, None)
+    
+    card_db = LocalProxy(lambda: _current_workspace().card_db)
+    deck_manager = LocalProxy(lambda: _current_workspace().deck_manager)
+    game_tracker = LocalProxy(lambda: _current_workspace().game_tracker)
+    tournament_manager = LocalProxy(lambda: _current_workspace().tournament_manager)
+    tournament_simulator = LocalProxy(lambda: _current_workspace().store(TournamentSimulator))
+    deck_exporter = LocalProxy(lambda: _current_workspace().store(DeckExporter))
+    deck_importer = LocalProxy(lambda: _current_workspace().store(DeckImporter))
+    game_simulator = LocalProxy(lambda: _current_workspace().store(
+        lambda path: GameSimulator(path, deck_manager=deck_manager, game_tracker=game_tracker), 'game_simulator'))
+    format_registry = LocalProxy(lambda: _current_workspace().deck_manager.format_registry)
+    meta_rollup = LocalProxy(lambda: _current_workspace().store(
+        lambda path: MetaRollup(path, card_db=card_db), 'meta_rollup'))
+    event_broker = LocalProxy(lambda: _workspace_broker(g.workspace_name))
+else:
+    card_db = CardDatabase(DB_PATH)
+    deck_manager = DeckManager(DB_PATH, card_db=card_db)
+    game_tracker = GameTracker(DB_PATH)
+    tournament_manager = TournamentManager(DB_PATH, game_tracker=game_tracker)
+    tournament_simulator = TournamentSimulator(DB_PATH)
+    deck_exporter = DeckExporter(DB_PATH)
+    deck_importer = DeckImporter(DB_PATH)
+    game_simulator = GameSimulator(DB_PATH, deck_manager=deck_manager, game_tracker=game_tracker)
+    format_registry = deck_manager.format_registry
+    meta_rollup = MetaRollup(DB_PATH, card_db=card_db)
+    event_broker = EventBroker()
+    game_tracker.add_listener(lambda game, deck_totals: game_events(event_broker, game, deck_totals))
+    # Keep the meta-game rollups fresh in the background (seconds between refreshes)
+    if os.environ.get('DECKWIZARD_META_REFRESH'):
+        meta_rollup.start_scheduler(float(os.environ['DECKWIZARD_META_REFRESH']))
+
+@app.after_request
+def add_etag(response):
+    """Tag JSON responses so clients can revalidate them with If-None-Match"""
+    if (request.method == 'GET' and response.status_code == 200
+            and response.mimetype == 'application/json' and not response.is_streamed):
+        response.add_etag()
+        response.headers['Cache-Control'] = 'no-cache'
+        response = response.make_conditional(request)
+    return response
 
 @app.route('/')
 def index():
@@ -74,6 +181,7 @@ def add_card():
         
         success = card_db.add_card(card)
         if success:
+            deck_importer.refresh_index()
             return jsonify({'message': 'Card added successfully', 'card_id': card.id})
         else:
             return jsonify({'error': 'Failed to add card'}), 500
@@ -105,7 +213,8 @@ def create_deck():
                 'format': deck.format,
                 'cards': deck.cards,
                 'created_date': deck.created_date,
-                'last_modified': deck.last_modified
+                'last_modified': deck.last_modified,
+                'version': deck.version
             }
         })
     except Exception as e:
@@ -124,25 +233,89 @@ def analyze_deck(deck_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _deck_version_response(deck, **extra):
+    return jsonify({'deck_id': deck.id, 'version': deck.version, 'cards': deck.cards, **extra})
+
+def _version_conflict_response(conflict):
+    return jsonify({'error': str(conflict), 'current_version': conflict.current}), 409
+
 @app.route('/api/decks/<deck_id>/cards', methods=['POST'])
 def add_card_to_deck(deck_id):
-    """Add cards to a deck"""
+    """Add cards to a deck (pass 'version' to reject the change if the deck moved on)"""
     try:
         data = request.json
-        deck = deck_manager.load_deck(deck_id)
-        if not deck:
-            return jsonify({'error': 'Deck not found'}), 404
-        
-        success = deck_manager.add_card_to_deck(
-            deck, 
-            data['card_id'], 
-            data.get('quantity', 1)
-        )
-        
-        if success:
-            return jsonify({'message': 'Card added to deck successfully'})
-        else:
-            return jsonify({'error': 'Failed to add card to deck'}), 500
+        deck = deck_manager.update_deck_cards(
+            deck_id, [(data['card_id'], data.get('quantity', 1))], expected_version=data.get('version'))
+        return _deck_version_response(deck, message='Card added to deck successfully')
+    except VersionConflict as e:
+        return _version_conflict_response(e)
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/decks/<deck_id>/cards', methods=['PATCH'])
+def update_deck_cards(deck_id):
+    """Apply a batch of card deltas in one transaction.
+    
+    Body: {"version": 7, "changes": [{"card_id": "...", "quantity": 2},
+    {"card_id": "...", "quantity": -1}]}. "version" is optional; when given
+    the batch only applies if the deck is still at that version, otherwise
+    409 returns the current version.
+    """
+    try:
+        data = request.json or {}
+        changes = data.get('changes')
+        if not isinstance(changes, list) or not changes:
+            return jsonify({'error': "'changes' must be a non-empty list"}), 400
+        deltas = [(change.get('card_id'), change.get('quantity')) for change in changes if isinstance(change, dict)]
+        if len(deltas) != len(changes):
+            return jsonify({'error': 'Every change must be an object with card_id and quantity'}), 400
+        deck = deck_manager.update_deck_cards(deck_id, deltas, expected_version=data.get('version'))
+        return _deck_version_response(deck)
+    except VersionConflict as e:
+        return _version_conflict_response(e)
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/decks/<deck_id>/revisions', methods=['GET'])
+def get_deck_revisions(deck_id):
+    """Revision log of a deck with the win rate while each revision was current"""
+    try:
+        return jsonify({'deck_id': deck_id, 'revisions': deck_manager.revision_history(deck_id)})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/decks/<deck_id>/revisions/<int:version>', methods=['GET'])
+def get_deck_revision(deck_id, version):
+    """Card list of a deck at one version"""
+    try:
+        return jsonify({'deck_id': deck_id, 'version': version,
+                        'cards': deck_manager.cards_at(deck_id, version)})
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/decks/diff', methods=['GET'])
+def diff_decks():
+    """Compare ?from=deck_id[@version] with ?to=deck_id[@version] (default: current source)"""
+    try:
+        if not request.args.get('from'):
+            return jsonify({'error': "'from' is required"}), 400
+        return jsonify(deck_manager.diff_decks(request.args['from'], request.args.get('to')))
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -175,6 +348,24 @@ def get_deck_stats(deck_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/events', methods=['GET'])
+def event_stream():
+    """Server-sent events: games, deck stat deltas and bracket updates.
+    
+    Optional deck_id and tournament_id parameters (comma separated) limit
+    the stream to those decks and tournaments.
+    """
+    topics = set()
+    for param, prefix in (('deck_id', 'deck'), ('tournament_id', 'tournament')):
+        for value in request.args.get(param, '').split(','):
+            if value.strip():
+                topics.add(f"{prefix}:{value.strip()}")
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    subscription = event_broker.subscribe(
+        topics or None, int(last_event_id) if last_event_id and last_event_id.isdigit() else None)
+    return Response(event_broker.stream(subscription), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/import/cards', methods=['POST'])
 def import_cards():
     """Import cards from various formats"""
@@ -205,6 +396,8 @@ def import_cards():
             except Exception as e:
                 errors.append(f"Error parsing card: {str(e)}")
         
+        if imported_count:
+            deck_importer.refresh_index()
         return jsonify({
             'imported_count': imported_count,
             'errors': errors
@@ -212,6 +405,29 @@ def import_cards():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/import/decks', methods=['POST'])
+def import_decks():
+    """Create decks from MTG, Arena or plain-text deck lists"""
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
+        # Either {'decks': [{'list', 'name', 'format'}, ...]} or a single {'list', 'name', 'format'}
+        lists = data.get('decks') or [data]
+        if not isinstance(lists, list) or not all(isinstance(item, dict) for item in lists):
+            return jsonify({'error': "'decks' must be a list of objects"}), 400
+        if any(not isinstance(item.get('list', ''), str) for item in lists):
+            return jsonify({'error': "Each deck's 'list' must be a string"}), 400
+        reports = deck_importer.import_lists(lists, dry_run=bool(data.get('dry_run')))
+        return jsonify({
+            'imported_count': sum(1 for report in reports if report['id']),
+            'decks': reports
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/export/deck/<deck_id>', methods=['GET'])
 def export_deck(deck_id):
     """Export deck in various formats"""
@@ -239,6 +455,26 @@ def export_deck(deck_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/export/decks', methods=['GET'])
+def export_decks():
+    """Stream many decks as a zip or NDJSON archive"""
+    try:
+        archive = request.args.get('archive', 'zip')
+        ids = request.args.get('ids')
+        chunks = deck_exporter.stream(
+            archive=archive,
+            export_format=request.args.get('format', 'json'),
+            deck_ids=ids.split(',') if ids else None,
+            deck_format=request.args.get('deck_format')
+        )
+        return Response(stream_with_context(chunks), mimetype=ARCHIVE_MIMETYPES[archive], headers={
+            'Content-Disposition': f'attachment; filename="{archive_filename(archive)}"'
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/optimize/deck/<deck_id>', methods=['POST'])
 def optimize_deck(deck_id):
     """Optimize deck composition"""
@@ -253,6 +489,8 @@ def optimize_deck(deck_id):
             suggestions = optimize_mana_curve(deck)
         elif optimization_type == 'card_synergy':
             suggestions = optimize_card_synergy(deck)
+        elif optimization_type == 'simulation':
+            suggestions = optimize_by_simulation(deck, request.json)
         else:
             suggestions = []
         
@@ -260,6 +498,8 @@ def optimize_deck(deck_id):
             'suggestions': suggestions,
             'current_analysis': deck_manager.analyze_deck(deck)
         })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -268,17 +508,297 @@ def generate_tournament_bracket():
     """Generate tournament bracket"""
     try:
         data = request.json
-        participants = data.get('participants', [])
+        participants = [p for p in data.get('participants', []) if p]
         tournament_type = data.get('type', 'single_elimination')
+        if len(participants) < 2:
+            return jsonify({'error': 'At least two participants are required'}), 400
         
         if tournament_type == 'single_elimination':
             bracket = generate_single_elimination_bracket(participants)
         elif tournament_type == 'double_elimination':
             bracket = generate_double_elimination_bracket(participants)
+        elif tournament_type == 'swiss':
+            bracket = generate_swiss_bracket(participants)
         else:
-            bracket = generate_round_robin_bracket(participants)
+            bracket = generate_round_robin_bracket(participants, int(data.get('round', 1)))
         
         return jsonify(bracket)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _int_param(data, key, default=None, maximum=None, minimum=None):
+    """An integer request parameter, clamped to ``maximum``; ValueError when it
+    isn't a number or is below ``minimum``"""
+    value = data.get(key)
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        raise ValueError(f"'{key}' must be an integer")
+    try:
+        number = int(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"'{key}' must be an integer")
+    if minimum is not None and number < minimum:
+        raise ValueError(f"'{key}' must be at least {minimum}")
+    return number if maximum is None else min(number, maximum)
+
+def _positive_float_param(data, key, default=None):
+    """A float request parameter above 0; ValueError when it isn't one"""
+    value = data.get(key)
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        raise ValueError(f"'{key}' must be a number above 0")
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{key}' must be a number above 0")
+    if not 0 < number < math.inf:
+        raise ValueError(f"'{key}' must be a number above 0")
+    return number
+
+def _int_list_param(data, key, default=None):
+    """A list-of-integers request parameter; ValueError for anything else"""
+    value = data.get(key)
+    if value is None:
+        return default
+    if not isinstance(value, list) or not all(isinstance(item, int) and not isinstance(item, bool) for item in value):
+        raise ValueError(f"'{key}' must be a list of integers")
+    return value
+
+@app.route('/api/tournament/simulate', methods=['POST'])
+def simulate_tournament():
+    """Project win and top-N probabilities for a bracket by Monte Carlo simulation"""
+    try:
+        data = request.json or {}
+        # Accepts a bracket returned by /api/tournament/bracket or just type + participants
+        bracket = data.get('bracket', data) if isinstance(data, dict) else None
+        if not isinstance(bracket, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
+        participants = [p for p in bracket.get('participants', []) if p]
+        tournament_type = bracket.get('type', 'single_elimination')
+        result = tournament_simulator.simulate(
+            tournament_type, participants,
+            runs=_int_param(data, 'runs', MAX_SIMULATION_RUNS, MAX_SIMULATION_RUNS),
+            top_n=_int_list_param(data, 'top_n', [4, 8]),
+            rounds=bracket.get('total_rounds') if tournament_type == 'swiss' else None,
+            tolerance=_positive_float_param(data, 'tolerance', 0.0025),
+            workers=max(1, _int_param(data, 'workers', MAX_SIMULATION_WORKERS, MAX_SIMULATION_WORKERS)),
+            seed=_int_param(data, 'seed'),
+            include_simulated=bool(data.get('include_simulated'))
+        )
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 501
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/simulate/matchup', methods=['POST'])
+def simulate_matchup():
+    """Play two stored decks against each other with the game simulator.
+    
+    Games are only stored when the request sets ``record``.
+    """
+    try:
+        data = request.json or {}
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
+        opponents = data.get('opponents') or ([data['opponent_id']] if data.get('opponent_id') else [])
+        if not data.get('deck_id') or not opponents:
+            return jsonify({'error': "'deck_id' and 'opponent_id' (or 'opponents') are required"}), 400
+        if not isinstance(opponents, list) or len(opponents) > MAX_MATCHUP_OPPONENTS:
+            return jsonify({'error': f"'opponents' must be a list of at most {MAX_MATCHUP_OPPONENTS} deck ids"}), 400
+        result = game_simulator.gauntlet(
+            data['deck_id'], opponents,
+            games=_int_param(data, 'games', 1000, MAX_MATCHUP_GAMES),
+            workers=MAX_SIMULATION_WORKERS,
+            seed=_int_param(data, 'seed'),
+            record=data.get('record') is True
+        )
+        return jsonify(result)
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/formats', methods=['GET'])
+def get_formats():
+    """Every known format with its deck construction rules"""
+    try:
+        return jsonify({'formats': [rules.to_dict() for rules in format_registry.list_formats()]})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/formats/<name>', methods=['GET'])
+def get_format(name):
+    try:
+        return jsonify(format_registry.get_rules(name).to_dict())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/formats/<name>', methods=['PUT'])
+def update_format(name):
+    """Change deck size bounds, copy limit or legal sets; stored decks are re-checked"""
+    try:
+        data = request.json or {}
+        result = format_registry.update_rules(
+            name,
+            min_deck_size=data.get('min_deck_size'),
+            max_deck_size=data.get('max_deck_size'),
+            max_copies=data.get('max_copies'),
+            legal_sets=data.get('legal_sets'),
+            all_sets='legal_sets' in data and data['legal_sets'] is None,
+            no_max_size='max_deck_size' in data and data['max_deck_size'] is None
+        )
+        return jsonify({'rules': format_registry.get_rules(name).to_dict(), 'revalidation': result})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/formats/<name>/cards', methods=['POST'])
+def set_format_cards(name):
+    """Ban, restrict or unlimit cards (status null takes them off every list)"""
+    try:
+        data = request.json or {}
+        if not data.get('cards') or 'status' not in data:
+            return jsonify({'error': "'cards' and 'status' are required"}), 400
+        result = format_registry.set_card_status(name, data['cards'], data['status'])
+        return jsonify({'rules': format_registry.get_rules(name).to_dict(), 'revalidation': result})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/formats/<name>/illegal', methods=['GET'])
+def get_illegal_decks(name):
+    """Stored decks that failed their last legality check"""
+    try:
+        return jsonify({'decks': format_registry.illegal_decks(
+            name, limit=_int_param(request.args, 'limit', 100, MAX_ILLEGAL_DECKS, minimum=1))})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/decks/<deck_id>/legality', methods=['GET'])
+def get_deck_legality(deck_id):
+    try:
+        deck = deck_manager.load_deck(deck_id)
+        if not deck:
+            return jsonify({'error': 'Deck not found'}), 404
+        return jsonify(format_registry.validate(deck))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/meta', methods=['GET'])
+def get_meta_formats():
+    """Formats with meta-game rollups"""
+    try:
+        return jsonify({'formats': meta_rollup.formats()})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/meta/<deck_format>', methods=['GET'])
+def get_meta_report(deck_format):
+    """Archetypes, their share and win rates, and card inclusion rates of a format"""
+    try:
+        report = meta_rollup.format_report(
+            deck_format, top=_int_param(request.args, 'top', 20, MAX_META_TOP, minimum=1))
+        if report is None:
+            return jsonify({'error': f'No meta rollup for format: {deck_format}'}), 404
+        return jsonify(report)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/meta/refresh', methods=['POST'])
+def refresh_meta():
+    """Update the meta-game rollups now"""
+    try:
+        data = request.get_json(silent=True) or {}
+        formats = [data['format']] if data.get('format') else None
+        return jsonify(meta_rollup.refresh(full=bool(data.get('full')), formats=formats))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/tournaments', methods=['POST'])
+def create_tournament():
+    """Create a persisted tournament"""
+    try:
+        data = request.json
+        tournament = tournament_manager.create_tournament(
+            data.get('name', 'Tournament'),
+            data.get('type', 'swiss'),
+            data.get('participants', []),
+            rounds=data.get('rounds')
+        )
+        return jsonify(tournament), 201
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/tournaments/<tournament_id>', methods=['GET'])
+def get_tournament(tournament_id):
+    """Get a tournament with all of its matches"""
+    try:
+        tournament = tournament_manager.get_tournament(tournament_id)
+        if not tournament:
+            return jsonify({'error': 'Tournament not found'}), 404
+        tournament['matches'] = tournament_manager.get_matches(tournament_id)
+        return jsonify(tournament)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/tournaments/<tournament_id>/rounds', methods=['POST'])
+def pair_tournament_round(tournament_id):
+    """Pair the next Swiss or round-robin round"""
+    try:
+        matches = tournament_manager.pair_next_round(tournament_id)
+        bracket_event(event_broker, tournament_id, 'round_paired', matches)
+        return jsonify({'matches': matches}), 201
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/tournaments/<tournament_id>/rounds/<int:round_number>', methods=['GET'])
+def get_tournament_round(tournament_id, round_number):
+    """Get the matches of one round"""
+    try:
+        return jsonify({'matches': tournament_manager.get_matches(tournament_id, round_number)})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/tournaments/<tournament_id>/matches/<code>/result', methods=['POST'])
+def report_tournament_result(tournament_id, code):
+    """Report a match result"""
+    try:
+        data = request.json
+        match = tournament_manager.report_result(tournament_id, code, data.get('result'),
+                                                 int(data.get('game_length', 0)))
+        bracket_event(event_broker, tournament_id, 'result', [match])
+        return jsonify(match)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/tournaments/<tournament_id>/standings', methods=['GET'])
+def get_tournament_standings(tournament_id):
+    """Get standings with OMW% and OOMW% tiebreakers"""
+    try:
+        return jsonify({'standings': tournament_manager.standings(tournament_id)})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -315,30 +835,11 @@ def parse_hearthstone_card(card_data):
 
 def export_deck_mtg(deck):
     """Export deck in MTG format"""
-    cards_list = []
-    for card_id, quantity in deck.cards.items():
-        card = card_db.get_card(card_id)
-        if card:
-            cards_list.append(f"{quantity} {card.name}")
-    
-    return {
-        'name': deck.name,
-        'format': deck.format,
-        'mainboard': cards_list,
-        'sideboard': []
-    }
+    return deck_exporter.render(deck, 'mtg', deck_exporter.card_map(deck.cards))
 
 def export_deck_arena(deck):
     """Export deck in MTG Arena format"""
-    cards_list = []
-    for card_id, quantity in deck.cards.items():
-        card = card_db.get_card(card_id)
-        if card:
-            cards_list.append(f"{quantity} {card.name} ({card.set_name}) {card.id}")
-    
-    return {
-        'deck': '\n'.join(cards_list)
-    }
+    return deck_exporter.render(deck, 'arena', deck_exporter.card_map(deck.cards))
 
 def optimize_mana_curve(deck):
     """Optimize deck mana curve"""
@@ -381,72 +882,76 @@ def optimize_card_synergy(deck):
     
     return suggestions
 
+def optimize_by_simulation(deck, options):
+    """One-card swaps that raised the simulated win rate against a gauntlet"""
+    opponents = options.get('opponents')
+    if opponents is not None and (not isinstance(opponents, list) or len(opponents) > MAX_MATCHUP_OPPONENTS):
+        raise ValueError(f"'opponents' must be a list of at most {MAX_MATCHUP_OPPONENTS} deck ids")
+    result = game_simulator.evaluate_swaps(
+        deck.id, opponents, games=_int_param(options, 'games', 100, MAX_MATCHUP_GAMES),
+        workers=MAX_SIMULATION_WORKERS, seed=_int_param(options, 'seed'))
+    return [{
+        'type': 'swap',
+        'message': (f"Swap {swap['remove_name']} for {swap['add_name']}: simulated win rate "
+                    f"{result['baseline_win_rate']:.1%} -> {swap['win_rate']:.1%}"),
+        'priority': 'high' if swap['significant'] else 'medium',
+        'remove': swap['remove'],
+        'add': swap['add'],
+        'win_rate_change': swap['win_rate_change']
+    } for swap in result['swaps'] if swap['win_rate_change'] > 0]
+
+def _bracket_match(match):
+    """Match dict for the bracket preview, with byes shown as None"""
+    return {
+        'code': match['code'],
+        'player1': match['player1'] or None,
+        'player2': match['player2'] or None,
+        'winner': match['winner'] or None,
+        'if_needed': bool(match.get('if_needed'))
+    }
+
 def generate_single_elimination_bracket(participants):
     """Generate single elimination tournament bracket"""
-    import math
-    
-    # Pad to next power of 2
-    bracket_size = 2 ** math.ceil(math.log2(len(participants)))
-    padded_participants = participants + [None] * (bracket_size - len(participants))
-    
-    rounds = []
-    current_round = padded_participants
-    
-    while len(current_round) > 1:
-        next_round = []
-        matches = []
-        
-        for i in range(0, len(current_round), 2):
-            player1 = current_round[i]
-            player2 = current_round[i + 1] if i + 1 < len(current_round) else None
-            
-            matches.append({
-                'player1': player1,
-                'player2': player2,
-                'winner': None
-            })
-            
-            # Auto-advance if one player is None (bye)
-            if player2 is None:
-                next_round.append(player1)
-            else:
-                next_round.append(None)  # TBD
-        
-        rounds.append(matches)
-        current_round = next_round
-    
+    bracket = EliminationBracket.create(participants)
     return {
         'type': 'single_elimination',
-        'rounds': rounds,
+        'rounds': [[_bracket_match(m) for m in matches] for matches in bracket.rounds('winners')],
         'participants': participants
     }
 
 def generate_double_elimination_bracket(participants):
     """Generate double elimination tournament bracket"""
-    # Simplified double elimination
-    winners_bracket = generate_single_elimination_bracket(participants)
-    
+    bracket = EliminationBracket.create(participants, double=True)
+    rounds = lambda name: [[_bracket_match(m) for m in matches] for matches in bracket.rounds(name)]
     return {
         'type': 'double_elimination',
-        'winners_bracket': winners_bracket,
-        'losers_bracket': {'rounds': []},
+        'winners_bracket': {'rounds': rounds('winners')},
+        'losers_bracket': {'rounds': rounds('losers')},
+        'grand_final': [m for matches in rounds('grand_final') for m in matches],
         'participants': participants
     }
 
-def generate_round_robin_bracket(participants):
-    """Generate round robin tournament bracket"""
-    matches = []
-    
-    for i, player1 in enumerate(participants):
-        for j, player2 in enumerate(participants[i+1:], i+1):
-            matches.append({
-                'player1': player1,
-                'player2': player2,
-                'result': None
-            })
-    
+def generate_round_robin_bracket(participants, round_number=1):
+    """Generate one round of a round robin tournament"""
     return {
         'type': 'round_robin',
+        'round': round_number,
+        'total_rounds': round_robin_total_rounds(len(participants)),
+        'matches': [{'player1': p1, 'player2': p2 or None, 'result': None}
+                    for p1, p2 in round_robin_round(participants, round_number)],
+        'participants': participants
+    }
+
+def generate_swiss_bracket(participants):
+    """Generate the first round of Swiss pairings"""
+    pairs, bye = swiss_pairings(participants, {}, {}, set())
+    matches = [{'player1': p1, 'player2': p2, 'result': None} for p1, p2 in pairs]
+    if bye is not None:
+        matches.append({'player1': bye, 'player2': None, 'result': 'player1'})
+    return {
+        'type': 'swiss',
+        'round': 1,
+        'total_rounds': max(1, math.ceil(math.log2(len(participants)))),
         'matches': matches,
         'participants': participants
     }
@@ -455,7 +960,8 @@ if __name__ == '__main__':
     # Create templates directory if it doesn't exist
     os.makedirs('templates', exist_ok=True)
     os.makedirs('static', exist_ok=True)
-    
+    configure_logging()
+
     print("🃏 DeckWizard Web Interface Starting...")
     print("📊 Features: Card Management, Deck Building, Analytics, Tournament Brackets")
     print("🌐 Access at: http://localhost:5000")